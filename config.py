@@ -6,7 +6,7 @@ Loads settings from environment variables and provides defaults.
 
 import os
 from pathlib import Path
-from typing import Optional
+from typing import Optional, Dict, Tuple
 from dataclasses import dataclass, field
 
 # Load .env file from project root
@@ -68,12 +68,34 @@ class ZerodhaConfig:
     )
     output_dir: str = "historical_data"
     
+    # Kite allows 3 historical_data requests/second per API key
+    historical_requests_per_second: float = field(
+        default_factory=lambda: float(os.environ.get("STOCKSAGENT_KITE_HISTORICAL_RPS", "3"))
+    )
+    # Concurrent chunk/ticker downloads (all share the rate limiter)
+    fetch_workers: int = field(
+        default_factory=lambda: int(os.environ.get("STOCKSAGENT_KITE_FETCH_WORKERS", "4"))
+    )
+    fetch_retries: int = 3
+    retry_backoff_seconds: float = 0.5
+    
     @property
     def is_configured(self) -> bool:
         """Check if Zerodha credentials are set."""
         return bool(self.api_key and self.access_token)
 
 
+@dataclass
+class BarStoreConfig:
+    """Configuration for the local historical candle store (services/bar_store.py)."""
+    enabled: bool = field(
+        default_factory=lambda: os.environ.get("STOCKSAGENT_BAR_STORE_ENABLED", "true").lower() == "true"
+    )
+    path: str = field(
+        default_factory=lambda: os.environ.get("STOCKSAGENT_BAR_STORE_PATH", str(DATA_DIR / "bars"))
+    )
+
+
 @dataclass
 class MonteCarloConfig:
     """Default configuration for Monte Carlo simulations."""
@@ -82,6 +104,57 @@ class MonteCarloConfig:
     simulation_days: int = 15
     days_history: int = 100
     default_mode: str = "real"  # "mock" or "real"
+    
+    # Parallel simulation (results are reproducible for a given seed + worker count)
+    workers: int = field(
+        default_factory=lambda: int(os.environ.get("STOCKSAGENT_MC_WORKERS", str(min(8, os.cpu_count() or 1))))
+    )
+    backend: str = field(
+        default_factory=lambda: os.environ.get("STOCKSAGENT_MC_BACKEND", "thread")
+    )
+    seed: Optional[int] = field(
+        default_factory=lambda: int(os.environ["STOCKSAGENT_MC_SEED"]) if os.environ.get("STOCKSAGENT_MC_SEED") else None
+    )
+    
+    # Variance reduction: iid | antithetic | stratified | block, and optional early stop
+    # once the standard errors fall below `tolerance` percentage points
+    sampling: str = field(
+        default_factory=lambda: os.environ.get("STOCKSAGENT_MC_SAMPLING", "iid")
+    )
+    tolerance: Optional[float] = field(
+        default_factory=lambda: float(os.environ["STOCKSAGENT_MC_TOLERANCE"]) if os.environ.get("STOCKSAGENT_MC_TOLERANCE") else None
+    )
+    
+    # Return model: bootstrap | ewma | garch (volatility-conditioned, fitted per ticker and cached)
+    model: str = field(
+        default_factory=lambda: os.environ.get("STOCKSAGENT_MC_MODEL", "bootstrap")
+    )
+
+
+@dataclass
+class LiveReturnsConfig:
+    """Configuration for the streaming rolling log-return service (services/live_returns.py)."""
+    # Whether the Monte Carlo agent uses a fresh published window instead of reloading bars
+    enabled: bool = field(
+        default_factory=lambda: os.environ.get("STOCKSAGENT_LIVE_RETURNS_ENABLED", "true").lower() == "true"
+    )
+    path: str = field(
+        default_factory=lambda: os.environ.get("STOCKSAGENT_LIVE_RETURNS_PATH", str(DATA_DIR / "live_returns"))
+    )
+    window_days: int = field(
+        default_factory=lambda: int(os.environ.get("STOCKSAGENT_LIVE_RETURNS_WINDOW_DAYS", "100"))
+    )
+    # Published windows older than this are ignored by readers
+    max_age_seconds: float = field(
+        default_factory=lambda: float(os.environ.get("STOCKSAGENT_LIVE_RETURNS_MAX_AGE", "900"))
+    )
+    poll_seconds: float = field(
+        default_factory=lambda: float(os.environ.get("STOCKSAGENT_LIVE_RETURNS_POLL_SECONDS", "60"))
+    )
+    # Kafka topic for per-bar updates; empty disables publishing to Kafka
+    kafka_topic: str = field(
+        default_factory=lambda: os.environ.get("STOCKSAGENT_LIVE_RETURNS_TOPIC", "")
+    )
 
 
 @dataclass
@@ -91,13 +164,92 @@ class PathwayConfig:
     hop_duration_minutes: int = 5
 
 
+@dataclass
+class CacheConfig:
+    """Configuration for the agent result cache (in-memory + optional Redis tier)."""
+    enabled: bool = field(
+        default_factory=lambda: os.environ.get("STOCKSAGENT_CACHE_ENABLED", "true").lower() == "true"
+    )
+    redis_url: Optional[str] = field(
+        default_factory=lambda: os.environ.get("REDIS_URL")
+    )
+    key_prefix: str = "stocksagent:result"
+    max_memory_entries: int = 512
+    
+    # Freshness policy per agent (seconds). Agents missing here are never cached.
+    agent_ttl_seconds: Dict[str, int] = field(default_factory=lambda: {
+        "news_agent": 10 * 60,
+        "twitter_agent": 10 * 60,
+        "technical_agent": 5 * 60,
+        "montecarlo_agent": 24 * 60 * 60,
+        "fundamental_agent": 24 * 60 * 60,
+    })
+
+
+@dataclass
+class LLMGatewayConfig:
+    """Configuration for the shared LLM gateway (response cache, rate limits, accounting)."""
+    cache_enabled: bool = field(
+        default_factory=lambda: os.environ.get("STOCKSAGENT_LLM_CACHE_ENABLED", "true").lower() == "true"
+    )
+    # Local tier (SQLite); the Redis tier reuses REDIS_URL
+    cache_path: str = field(
+        default_factory=lambda: os.environ.get(
+            "STOCKSAGENT_LLM_CACHE_PATH",
+            str(Path(__file__).parent / "data" / "llm_cache.sqlite")
+        )
+    )
+    redis_url: Optional[str] = field(
+        default_factory=lambda: os.environ.get("REDIS_URL")
+    )
+    key_prefix: str = "stocksagent:llm"
+    default_ttl_seconds: int = field(
+        default_factory=lambda: int(os.environ.get("STOCKSAGENT_LLM_CACHE_TTL", str(6 * 60 * 60)))
+    )
+    
+    # Per-model (requests/minute, tokens/minute) token buckets; "default" for unlisted models
+    rate_limits: Dict[str, Tuple[int, int]] = field(default_factory=lambda: {
+        "gpt-4o": (500, 30_000),
+        "gpt-4o-mini": (500, 200_000),
+        "default": (500, 100_000),
+    })
+
+
+@dataclass
+class DeadlineConfig:
+    """Per-query latency budget and per-agent deadlines for the parallel fan-out."""
+    enabled: bool = field(
+        default_factory=lambda: os.environ.get("STOCKSAGENT_DEADLINES_ENABLED", "true").lower() == "true"
+    )
+    # Whole query, from graph start to final response
+    query_budget_seconds: float = field(
+        default_factory=lambda: float(os.environ.get("STOCKSAGENT_QUERY_BUDGET", "90"))
+    )
+    # Part of the budget kept back for the explainability step
+    explainability_reserve_seconds: float = 15.0
+    
+    # Max wall time per agent (capped further by the remaining query budget)
+    agent_timeout_seconds: Dict[str, float] = field(default_factory=lambda: {
+        "news_agent": 30.0,
+        "twitter_agent": 30.0,
+        "technical_agent": 45.0,
+        "montecarlo_agent": 60.0,
+        "fundamental_agent": 60.0,
+    })
+
+
 @dataclass
 class AgentConfig:
     """Master configuration for all agents."""
     
     zerodha: ZerodhaConfig = field(default_factory=ZerodhaConfig)
+    bars: BarStoreConfig = field(default_factory=BarStoreConfig)
     montecarlo: MonteCarloConfig = field(default_factory=MonteCarloConfig)
     pathway: PathwayConfig = field(default_factory=PathwayConfig)
+    live_returns: LiveReturnsConfig = field(default_factory=LiveReturnsConfig)
+    cache: CacheConfig = field(default_factory=CacheConfig)
+    deadlines: DeadlineConfig = field(default_factory=DeadlineConfig)
+    llm: LLMGatewayConfig = field(default_factory=LLMGatewayConfig)
     
     # Logging
     log_level: str = field(
@@ -146,7 +298,24 @@ def print_config_status():
         print(f"  API Key: {config.zerodha.api_key[:8]}...")
     print(f"  Universe Path: {config.zerodha.universe_path}")
     print(f"  Instruments Path: {config.zerodha.instruments_path}")
+    print(f"\nBar Store:")
+    print(f"  Enabled: {config.bars.enabled} ({config.bars.path})")
     print(f"\nMonte Carlo Defaults:")
     print(f"  Simulations: {config.montecarlo.num_simulations}")
     print(f"  Simulation Days: {config.montecarlo.simulation_days}")
-    print(f"  History Days: {config.montecarlo.days_history}")
\ No newline at end of file
+    print(f"  History Days: {config.montecarlo.days_history}")
+    print(f"  Workers: {config.montecarlo.workers} ({config.montecarlo.backend})")
+    print(f"  Sampling: {config.montecarlo.sampling} (tolerance: {config.montecarlo.tolerance})")
+    print(f"  Model: {config.montecarlo.model}")
+    print(f"\nLive Returns:")
+    print(f"  Enabled: {config.live_returns.enabled} ({config.live_returns.path})")
+    print(f"  Window: {config.live_returns.window_days} days, max age {config.live_returns.max_age_seconds}s")
+    print(f"  Kafka Topic: {config.live_returns.kafka_topic or 'Not set'}")
+    print(f"\nResult Cache:")
+    print(f"  Enabled: {config.cache.enabled}")
+    print(f"  Redis Tier: {'Configured' if config.cache.redis_url else 'Not set (memory only)'}")
+    print(f"\nLLM Gateway:")
+    print(f"  Response Cache: {config.llm.cache_enabled} ({config.llm.cache_path})")
+    print(f"\nDeadlines:")
+    print(f"  Enabled: {config.deadlines.enabled}")
+    print(f"  Query Budget: {config.deadlines.query_budget_seconds}s")
\ No newline at end of file
@@ -19,6 +19,7 @@ import sys
 import asyncio
 import logging
 import uuid
+import time
 from datetime import datetime
 from typing import Dict, Any
 from concurrent.futures import ThreadPoolExecutor
@@ -32,6 +33,7 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 import config  
 
 from stocks_agent.graph import get_compiled_graph
+from stocks_agent.orchestrator import build_kafka_intent
 from stocks_agent.services.kafka_service import (
     KafkaProducerService, 
     KafkaConsumerService,
@@ -199,12 +201,17 @@ class StocksAgentKafkaConsumer:
                     initial_state = {
                         "query": f"Analyze {ticker} based on technical {action} signal",
                         "message_type": "technical_kafka",
+                        "started_at": time.time(),
+                        # Template report, no explainability LLM round-trip
+                        "no_llm_flag": True,
                         "trigger_signal": signal,
                         "ticker": [ticker],
                         "parsed_intent": {},
                         "agent_contributions": [],
                         "errors": []
                     }
+                    # Ticker and agents are known: pre-build the intent so the graph skips the orchestrator
+                    initial_state["parsed_intent"] = build_kafka_intent(initial_state) or {}
                     
                     logger.info(f"[{task_id}] Running LangGraph analysis for {ticker}...")
                     
@@ -286,12 +293,17 @@ class StocksAgentKafkaConsumer:
                     initial_state = {
                         "query": f"Analyze {ticker} based on high-impact news",
                         "message_type": "news_kafka",
+                        "started_at": time.time(),
+                        # Template report, no explainability LLM round-trip
+                        "no_llm_flag": True,
                         "news_kafka_input": news_input,
                         "ticker": [ticker],
                         "parsed_intent": {},
                         "agent_contributions": [],
                         "errors": []
                     }
+                    # Ticker and agents are known: pre-build the intent so the graph skips the orchestrator
+                    initial_state["parsed_intent"] = build_kafka_intent(initial_state) or {}
                     
                     logger.info(f"[{task_id}] Running LangGraph analysis for {ticker} (news-triggered)...")
                     
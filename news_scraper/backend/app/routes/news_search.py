@@ -23,6 +23,8 @@ import hashlib
 import json
 from concurrent.futures import ThreadPoolExecutor
 
+from app.services.finbert import SENTIMENT_BACKEND, SENTIMENT_SERVER_URL, build_sentiment_classifier
+
 # Gemini LLM
 try:
     import google.generativeai as genai
@@ -30,13 +32,9 @@ try:
 except ImportError:
     GEMINI_AVAILABLE = False
 
-# FinBERT
-try:
-    from transformers import pipeline
-    import torch
-    SENTIMENT_AVAILABLE = True
-except ImportError:
-    SENTIMENT_AVAILABLE = False
+# FinBERT: loaded by load_sentiment_model() (shared server client or local model)
+SENTIMENT_AVAILABLE = False
+sentiment_classifier = None
 
 app = FastAPI(title="Financial News API - Filtered", version="6.0")
 
@@ -54,23 +52,18 @@ def load_sentiment_model():
     """
     Load FinBERT exactly once at startup.
     Call this function inside FastAPI startup event OR manually for scripts.
+    With SENTIMENT_SERVER_URL set this only creates a client for the shared
+    sentiment server; no model is loaded in this process.
     """
     global sentiment_classifier, SENTIMENT_AVAILABLE
 
     try:
-        print("Loading FinBERT model...")
+        if SENTIMENT_SERVER_URL:
+            print(f"Using sentiment server: {SENTIMENT_SERVER_URL}")
+        else:
+            print(f"Loading FinBERT model ({SENTIMENT_BACKEND})...")
 
-        from transformers import pipeline
-        import torch
-        
-        sentiment_classifier = pipeline(
-            "sentiment-analysis",
-            model="ProsusAI/finbert",
-            device=0 if torch.cuda.is_available() else -1,
-            truncation=True,
-            max_length=512,
-            batch_size=8
-        )
+        sentiment_classifier = build_sentiment_classifier()
 
         SENTIMENT_AVAILABLE = True
         print("✓ FinBERT loaded successfully")
@@ -80,24 +73,6 @@ def load_sentiment_model():
         SENTIMENT_AVAILABLE = False
 
 
-sentiment_classifier = None
-if SENTIMENT_AVAILABLE:
-    try:
-        print("Loading FinBERT...")
-        sentiment_classifier = pipeline(
-            "sentiment-analysis",
-            model="ProsusAI/finbert",
-            device=0 if torch.cuda.is_available() else -1,
-            truncation=True,
-            max_length=512,
-            batch_size=8
-        )
-        print("✓ FinBERT loaded")
-    except Exception as e:
-        print(f"✗ FinBERT error: {e}")
-        SENTIMENT_AVAILABLE = False
-
-
 # Initialize Gemini API
 gemini_model = None
 if GEMINI_AVAILABLE:
@@ -0,0 +1,176 @@
+"""
+FinBERT classifier construction for the news search route.
+
+SENTIMENT_BACKEND selects the inference backend (same values as the enrichment
+pipeline):
+- torch:      transformers pipeline, full precision (GPU if available)
+- torch-int8: same pipeline over a torch dynamic-int8 quantized model (CPU)
+- onnx-int8:  ONNX Runtime on the int8 export in SENTIMENT_ONNX_DIR, written by
+              the enrichment pipeline (services/enrichment-pipeline/onnx_export.py)
+
+If SENTIMENT_SERVER_URL is set (http://host:port or unix:///path/to.sock), no
+model is loaded here: texts are scored by the shared sentiment server
+(services/enrichment-pipeline/sentiment_server.py) and SENTIMENT_BACKEND is
+the server's setting.
+
+Every option returns a callable with the transformers pipeline interface:
+classifier(text or [texts]) -> [{'label': str, 'score': float}, ...].
+"""
+
+import http.client
+import json
+import logging
+import os
+import socket
+from pathlib import Path
+from typing import Any, Dict, List, Union
+from urllib.parse import urlsplit
+
+logger = logging.getLogger(__name__)
+
+MODEL_NAME = "ProsusAI/finbert"
+SENTIMENT_BACKENDS = ('torch', 'torch-int8', 'onnx-int8')
+SENTIMENT_BACKEND = os.getenv('SENTIMENT_BACKEND', 'torch')
+SENTIMENT_ONNX_DIR = os.getenv('SENTIMENT_ONNX_DIR', os.path.expanduser('~/.cache/finbert-onnx'))
+ONNX_INT8_FILENAME = "finbert-int8.onnx"
+SENTIMENT_SERVER_URL = os.getenv('SENTIMENT_SERVER_URL', '')
+SENTIMENT_SERVER_TIMEOUT = float(os.getenv('SENTIMENT_SERVER_TIMEOUT', '30'))
+MAX_LENGTH = 512
+BATCH_SIZE = 8
+
+
+class _UnixHTTPConnection(http.client.HTTPConnection):
+    """HTTPConnection over a Unix domain socket."""
+
+    def __init__(self, path: str, timeout: float):
+        super().__init__('localhost', timeout=timeout)
+        self._path = path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self._path)
+
+
+class RemoteSentimentClassifier:
+    """Pipeline-style callable backed by the shared sentiment server (POST /classify)."""
+
+    def __init__(self, url: str = None, timeout: float = SENTIMENT_SERVER_TIMEOUT):
+        self.url = url or SENTIMENT_SERVER_URL
+        self.timeout = timeout
+        parts = urlsplit(self.url)
+        if parts.scheme not in ('http', 'unix'):
+            raise ValueError(f"SENTIMENT_SERVER_URL must be http://host:port or unix:///path, got {self.url!r}")
+        self._scheme = parts.scheme
+        self._netloc = parts.netloc
+        self._path = parts.path
+
+    def _connection(self) -> http.client.HTTPConnection:
+        if self._scheme == 'unix':
+            return _UnixHTTPConnection(self._path, self.timeout)
+        return http.client.HTTPConnection(self._netloc, timeout=self.timeout)
+
+    def _request(self, method: str, path: str, payload: Dict[str, Any] = None) -> Dict[str, Any]:
+        connection = self._connection()
+        try:
+            body = json.dumps(payload) if payload is not None else None
+            connection.request(method, path, body=body, headers={'Content-Type': 'application/json'})
+            response = connection.getresponse()
+            data = response.read()
+            if response.status != 200:
+                raise RuntimeError(f"Sentiment server returned {response.status}: {data[:200]!r}")
+            return json.loads(data)
+        finally:
+            connection.close()
+
+    def health(self) -> Dict[str, Any]:
+        return self._request('GET', '/health')
+
+    def __call__(self, texts: Union[str, List[str]]) -> List[Dict[str, Any]]:
+        if isinstance(texts, str):
+            texts = [texts]
+        return self._request('POST', '/classify', {'texts': list(texts)})['results']
+
+
+class OnnxSentimentClassifier:
+    """FinBERT on ONNX Runtime (int8), callable like a transformers text-classification pipeline."""
+
+    def __init__(self, onnx_dir: str = SENTIMENT_ONNX_DIR):
+        import onnxruntime as ort
+        from transformers import AutoConfig, AutoTokenizer
+
+        quantized_path = Path(onnx_dir) / ONNX_INT8_FILENAME
+        if not quantized_path.exists():
+            raise FileNotFoundError(
+                f"No FinBERT ONNX export at {quantized_path}; run "
+                f"'python onnx_export.py --onnx-dir {onnx_dir}' in the enrichment pipeline"
+            )
+
+        self.tokenizer = AutoTokenizer.from_pretrained(MODEL_NAME)
+        id2label = AutoConfig.from_pretrained(MODEL_NAME).id2label
+        self.labels = [id2label[i] for i in range(len(id2label))]
+        self.session = ort.InferenceSession(str(quantized_path), providers=["CPUExecutionProvider"])
+        self._input_names = [i.name for i in self.session.get_inputs()]
+
+    def __call__(self, texts: Union[str, List[str]]) -> List[Dict[str, Any]]:
+        import numpy as np
+
+        if isinstance(texts, str):
+            texts = [texts]
+        results = []
+        for start in range(0, len(texts), BATCH_SIZE):
+            inputs = self.tokenizer(
+                texts[start:start + BATCH_SIZE],
+                return_tensors="np",
+                truncation=True,
+                max_length=MAX_LENGTH,
+                padding=True
+            )
+            logits = self.session.run(["logits"], {name: inputs[name].astype(np.int64) for name in self._input_names})[0]
+            exp = np.exp(logits - logits.max(axis=-1, keepdims=True))
+            probs = exp / exp.sum(axis=-1, keepdims=True)
+            for row in probs:
+                best = int(row.argmax())
+                results.append({'label': self.labels[best], 'score': float(row[best])})
+        return results
+
+
+def build_sentiment_classifier(backend: str = None):
+    """
+    FinBERT classifier: the shared sentiment server if SENTIMENT_SERVER_URL is
+    set, otherwise a local model for `backend` (default SENTIMENT_BACKEND).
+    """
+    if SENTIMENT_SERVER_URL and backend is None:
+        return RemoteSentimentClassifier(SENTIMENT_SERVER_URL)
+
+    backend = backend or SENTIMENT_BACKEND
+    if backend not in SENTIMENT_BACKENDS:
+        raise ValueError(f"SENTIMENT_BACKEND must be one of {SENTIMENT_BACKENDS}, got {backend!r}")
+
+    if backend == 'onnx-int8':
+        return OnnxSentimentClassifier()
+
+    import torch
+    from transformers import AutoModelForSequenceClassification, AutoTokenizer, pipeline
+
+    if backend == 'torch-int8':
+        model = AutoModelForSequenceClassification.from_pretrained(MODEL_NAME).eval()
+        model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        return pipeline(
+            "sentiment-analysis",
+            model=model,
+            tokenizer=AutoTokenizer.from_pretrained(MODEL_NAME),
+            device=-1,
+            truncation=True,
+            max_length=MAX_LENGTH,
+            batch_size=BATCH_SIZE
+        )
+
+    return pipeline(
+        "sentiment-analysis",
+        model=MODEL_NAME,
+        device=0 if torch.cuda.is_available() else -1,
+        truncation=True,
+        max_length=MAX_LENGTH,
+        batch_size=BATCH_SIZE
+    )
@@ -1,5 +1,6 @@
 # main.py
 
+import asyncio
 import logging
 
 # Configure logging FIRST before any other imports
@@ -36,7 +37,8 @@ app.add_middleware(
 @app.on_event("startup")
 async def startup_event():
     await connect_to_mongo()
-    load_sentiment_model()
+    # Sentiment client/model loads in the background; search falls back to neutral until it is ready
+    asyncio.get_running_loop().run_in_executor(None, load_sentiment_model)
     start_scheduler()  # Start video generation scheduler
 
 @app.on_event("shutdown")
@@ -0,0 +1,77 @@
+"""
+FinBERT ONNX int8 export
+- Exports FinBERT to ONNX (dynamic batch/sequence axes) and quantizes the
+  weights to int8 with ONNX Runtime dynamic quantization
+- The only export implementation: the onnx-int8 backend of sentiment.py calls
+  it on first use, and the API's onnx-int8 backend loads the file it writes
+- Intermediate files get unique temp names and the result is renamed into
+  place, so concurrent exports into the same directory do not clobber each other
+
+Run:
+    python onnx_export.py [--onnx-dir DIR]
+"""
+
+import argparse
+import logging
+import os
+import tempfile
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+MODEL_NAME = "ProsusAI/finbert"
+SENTIMENT_ONNX_DIR = os.getenv('SENTIMENT_ONNX_DIR', os.path.expanduser('~/.cache/finbert-onnx'))
+ONNX_INT8_FILENAME = "finbert-int8.onnx"
+
+
+def _temp_path(directory: Path, prefix: str) -> Path:
+    """Unique file name in `directory` (created empty, closed)."""
+    fd, path = tempfile.mkstemp(prefix=prefix, suffix=".onnx", dir=directory)
+    os.close(fd)
+    return Path(path)
+
+
+def export_onnx_int8(quantized_path: Path):
+    """Export FinBERT to ONNX, quantize weights to int8, and move the result to `quantized_path`."""
+    import torch
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+    from transformers import AutoModelForSequenceClassification, AutoTokenizer
+
+    logger.info(f"Exporting FinBERT to ONNX: {quantized_path}")
+    quantized_path.parent.mkdir(parents=True, exist_ok=True)
+    fp32_path = _temp_path(quantized_path.parent, "finbert-fp32-")
+    tmp_path = _temp_path(quantized_path.parent, "finbert-int8-")
+
+    try:
+        tokenizer = AutoTokenizer.from_pretrained(MODEL_NAME)
+        model = AutoModelForSequenceClassification.from_pretrained(MODEL_NAME).eval()
+        sample = tokenizer(["FinBERT export sample"], return_tensors="pt")
+        input_names = ["input_ids", "attention_mask", "token_type_ids"]
+        dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+        dynamic_axes["logits"] = {0: "batch"}
+
+        with torch.no_grad():
+            torch.onnx.export(
+                model,
+                tuple(sample[name] for name in input_names),
+                str(fp32_path),
+                input_names=input_names,
+                output_names=["logits"],
+                dynamic_axes=dynamic_axes,
+                opset_version=14
+            )
+
+        quantize_dynamic(str(fp32_path), str(tmp_path), weight_type=QuantType.QInt8)
+        os.replace(tmp_path, quantized_path)
+    finally:
+        for path in (fp32_path, tmp_path):
+            path.unlink(missing_ok=True)
+    logger.info(f"FinBERT ONNX int8 export saved: {quantized_path}")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Export FinBERT to ONNX with int8 weights")
+    parser.add_argument("--onnx-dir", default=SENTIMENT_ONNX_DIR)
+    args = parser.parse_args()
+    export_onnx_int8(Path(args.onnx_dir) / ONNX_INT8_FILENAME)
@@ -20,7 +20,8 @@ from pymongo import MongoClient
 from dedup import DeduplicationManager
 from features import extract_features
 from fetcher import fetch_article
-from sentiment import FinBERTAnalyzer
+from sentiment import FinBERTAnalyzer, SentimentBatcher
+from sentiment_client import SENTIMENT_SERVER_URL, SentimentClient
 from storage import StorageHandler
 
 # ===========================
@@ -141,9 +142,10 @@ async def process_article(message: Dict[str, Any]) -> bool:
             content_quality = 'poor'
             logger.warning(f"Poor content quality ({len(content) if content else 0} chars): {company} - {title[:40]}...")
         
-        # STEP 6: Sentiment Analysis (with title fallback for poor content)
+        # STEP 6: Sentiment Analysis (with title fallback for poor content),
+        # batched with other in-flight articles on the inference thread
         text_for_sentiment = f"{title}. {content[:2000]}" if content else title
-        sentiment = sentiment_analyzer.analyze(text_for_sentiment, title=title)
+        sentiment = await sentiment_analyzer.analyze_async(text_for_sentiment, title=title)
         
         # STEP 7: Feature Extraction
         features = extract_features(title, content, sentiment, factor_type)
@@ -242,7 +244,13 @@ async def run_pipeline():
     logger.info(f"Redis connected: {REDIS_HOST}:{REDIS_PORT}")
     
     dedup_manager = DeduplicationManager(redis_client)
-    sentiment_analyzer = FinBERTAnalyzer()
+    if SENTIMENT_SERVER_URL:
+        # Shared model in sentiment_server.py instead of a copy in this process
+        sentiment_analyzer = SentimentClient(SENTIMENT_SERVER_URL)
+        await sentiment_analyzer.wait_until_ready()
+        logger.info(f"Using sentiment server: {SENTIMENT_SERVER_URL}")
+    else:
+        sentiment_analyzer = SentimentBatcher(FinBERTAnalyzer())
     storage = StorageHandler(MONGO_URI, MONGO_DB)
     
     # Connect to MongoDB for polling raw articles
@@ -265,7 +273,7 @@ async def run_pipeline():
     logger.info("  1. MongoDB (raw_articles) - Poll for new articles")
     logger.info("  2. Redis dedup check (URL -> Content -> Fuzzy Title)")
     logger.info("  3. Fetch article content (aiohttp/Playwright)")
-    logger.info("  4. FinBERT sentiment analysis")
+    logger.info("  4. FinBERT sentiment analysis (micro-batched across articles)")
     logger.info("  5. Feature extraction")
     logger.info("  6. MongoDB storage (enriched_articles)")
     logger.info("=" * 60)
@@ -312,6 +320,10 @@ async def run_pipeline():
     except KeyboardInterrupt:
         logger.info("Shutdown requested")
     finally:
+        if isinstance(sentiment_analyzer, SentimentClient):
+            await sentiment_analyzer.close()
+        else:
+            sentiment_analyzer.close()
         mongo_client.close()
         logger.info("Pipeline stopped")
 
@@ -3,17 +3,42 @@ FinBERT Sentiment Analyzer
 - Real FinBERT model (ProsusAI/finbert)
 - GPU acceleration when available
 - Returns label, score, confidence
+- Optional CPU backends (SENTIMENT_BACKEND): torch dynamic int8 quantization,
+  or an ONNX Runtime export with dynamic int8 quantization
+- SentimentBatcher: one inference thread that micro-batches chunks from all
+  concurrent articles (up to a max batch size or latency budget)
 """
 
+import asyncio
 import logging
-from typing import Any, Dict
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
 
 import numpy as np
 import torch
 from transformers import AutoModelForSequenceClassification, AutoTokenizer
 
+from onnx_export import ONNX_INT8_FILENAME, SENTIMENT_ONNX_DIR, export_onnx_int8
+
 logger = logging.getLogger(__name__)
 
+# Micro-batching: a batch runs once it has SENTIMENT_BATCH_SIZE chunks or its
+# first chunk has waited SENTIMENT_MAX_WAIT_MS
+SENTIMENT_BATCH_SIZE = int(os.getenv('SENTIMENT_BATCH_SIZE', '32'))
+SENTIMENT_MAX_WAIT_MS = float(os.getenv('SENTIMENT_MAX_WAIT_MS', '20'))
+
+# Inference backend: torch (fp32) | torch-int8 | onnx-int8 (the int8 backends run on CPU)
+SENTIMENT_BACKENDS = ('torch', 'torch-int8', 'onnx-int8')
+SENTIMENT_BACKEND = os.getenv('SENTIMENT_BACKEND', 'torch')
+
+CHUNK_SIZE = 450  # Characters per chunk; leaves room for tokenization
+MAX_LENGTH = 512
+
 
 class FinBERTAnalyzer:
     """FinBERT sentiment analysis for financial news"""
@@ -21,33 +46,160 @@ class FinBERTAnalyzer:
     LABELS = ['positive', 'negative', 'neutral']
     MODEL_NAME = "ProsusAI/finbert"
     
-    def __init__(self):
+    def __init__(self, backend: str = None):
+        self.backend = backend or SENTIMENT_BACKEND
+        if self.backend not in SENTIMENT_BACKENDS:
+            raise ValueError(f"SENTIMENT_BACKEND must be one of {SENTIMENT_BACKENDS}, got {self.backend!r}")
         self.tokenizer = None
         self.model = None
+        self.session = None
         self.device = None
         self._initialize()
     
     def _initialize(self):
         """Load FinBERT model"""
         try:
-            logger.info(f"Loading FinBERT model: {self.MODEL_NAME}")
+            logger.info(f"Loading FinBERT model: {self.MODEL_NAME} ({self.backend})")
             
             self.tokenizer = AutoTokenizer.from_pretrained(self.MODEL_NAME)
-            self.model = AutoModelForSequenceClassification.from_pretrained(self.MODEL_NAME)
             
-            # Use GPU if available
-            self.device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
-            self.model.to(self.device)
+            if self.backend == 'onnx-int8':
+                self.device = torch.device('cpu')
+                self.session = self._load_onnx_session()
+                logger.info("FinBERT loaded on ONNX Runtime (int8)")
+                return
+            
+            self.model = AutoModelForSequenceClassification.from_pretrained(self.MODEL_NAME)
             self.model.eval()
             
+            if self.backend == 'torch-int8':
+                # Quantized kernels are CPU-only
+                self.device = torch.device('cpu')
+                self.model = torch.quantization.quantize_dynamic(
+                    self.model, {torch.nn.Linear}, dtype=torch.qint8
+                )
+            else:
+                # Use GPU if available
+                self.device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
+                self.model.to(self.device)
+            
             logger.info(f"FinBERT loaded on {self.device}")
         except Exception as e:
             logger.error(f"Failed to load FinBERT: {e}")
             raise
     
+    def _load_onnx_session(self):
+        """ONNX Runtime session for the int8 export, exporting on first use."""
+        import onnxruntime as ort
+        
+        quantized_path = Path(SENTIMENT_ONNX_DIR) / ONNX_INT8_FILENAME
+        if not quantized_path.exists():
+            export_onnx_int8(quantized_path)
+        return ort.InferenceSession(str(quantized_path), providers=["CPUExecutionProvider"])
+    
+    @property
+    def ready(self) -> bool:
+        return self.model is not None or self.session is not None
+    
+    def plan(self, text: str, title: str = None) -> Tuple[List[str], List[float], bool]:
+        """
+        Texts to score for one article, their aggregation weights, and whether
+        this is a title-only (low confidence) result.
+        
+        For short/poor content, relies on the title alone.
+        For long texts, takes the beginning and the middle of the text.
+        """
+        # If content is very short (likely failed fetch), analyze title separately
+        # and mark as low confidence
+        if len(text) < 200 and title:
+            logger.warning(f"Short content ({len(text)} chars), using title for sentiment")
+            return [title], [1.0], True
+        
+        # Strategy: Focus on beginning (most important in news)
+        chunks = []
+        if len(text) > CHUNK_SIZE:
+            # First chunk (highest weight)
+            chunks.append(text[:CHUNK_SIZE])
+            
+            # Only add more chunks if text is substantially longer
+            if len(text) > CHUNK_SIZE * 2:
+                # Middle chunk
+                mid_start = len(text) // 2 - CHUNK_SIZE // 2
+                chunks.append(text[mid_start:mid_start + CHUNK_SIZE])
+        else:
+            chunks = [text]
+        
+        # First chunk gets 70%, rest split 30%
+        if len(chunks) == 1:
+            weights = [1.0]
+        else:
+            weights = [0.7] + [0.3 / (len(chunks) - 1)] * (len(chunks) - 1)
+        return chunks, weights, False
+    
+    def infer(self, texts: List[str]) -> np.ndarray:
+        """
+        Class probabilities (len(texts) x 3, in LABELS order) from one forward pass.
+        Padding is dynamic: to the longest text in this batch, not max_length.
+        """
+        if self.session is not None:
+            inputs = self.tokenizer(
+                texts,
+                return_tensors="np",
+                truncation=True,
+                max_length=MAX_LENGTH,
+                padding=True
+            )
+            feed = {i.name: inputs[i.name].astype(np.int64) for i in self.session.get_inputs()}
+            logits = self.session.run(["logits"], feed)[0]
+            exp = np.exp(logits - logits.max(axis=-1, keepdims=True))
+            return exp / exp.sum(axis=-1, keepdims=True)
+        
+        inputs = self.tokenizer(
+            texts,
+            return_tensors="pt",
+            truncation=True,
+            max_length=MAX_LENGTH,
+            padding=True
+        ).to(self.device)
+        
+        with torch.no_grad():
+            outputs = self.model(**inputs)
+            probs = torch.nn.functional.softmax(outputs.logits, dim=-1)
+        
+        return probs.cpu().numpy()
+    
+    def aggregate(self, all_scores: List[np.ndarray], weights: List[float], title_only: bool) -> Dict[str, Any]:
+        """Combine per-chunk probabilities into the analyze() result."""
+        scores = np.average(np.asarray(all_scores), axis=0, weights=weights)
+        
+        max_idx = int(np.argmax(scores))
+        label = self.LABELS[max_idx]
+        score = float(scores[max_idx])
+        
+        # Confidence level - stricter thresholds
+        if title_only:
+            confidence = "low"  # Always low confidence for title-only
+        elif score > 0.85:
+            confidence = "high"
+        elif score > 0.65:
+            confidence = "medium"
+        else:
+            confidence = "low"
+        
+        return {
+            'label': label,
+            'score': score,
+            'confidence': confidence,
+            'scores': {
+                'positive': float(scores[0]),
+                'negative': float(scores[1]),
+                'neutral': float(scores[2])
+            }
+        }
+    
     def analyze(self, text: str, title: str = None) -> Dict[str, Any]:
         """
-        Analyze sentiment of text using FinBERT.
+        Analyze sentiment of text using FinBERT (all chunks in one forward pass).
         
         For short/poor content, relies more on title analysis.
         For long texts, analyzes multiple chunks and aggregates results.
@@ -64,105 +216,12 @@ class FinBERTAnalyzer:
                 'scores': {'positive': float, 'negative': float, 'neutral': float}
             }
         """
-        if not text or not self.model:
+        if not text or not self.ready:
             return self._default_result()
         
         try:
-            # If content is very short (likely failed fetch), analyze title separately
-            # and mark as low confidence
-            if len(text) < 200 and title:
-                logger.warning(f"Short content ({len(text)} chars), using title for sentiment")
-                
-                inputs = self.tokenizer(
-                    title,
-                    return_tensors="pt",
-                    truncation=True,
-                    max_length=512,
-                    padding=True
-                ).to(self.device)
-                
-                with torch.no_grad():
-                    outputs = self.model(**inputs)
-                    probs = torch.nn.functional.softmax(outputs.logits, dim=-1)
-                
-                scores = probs[0].cpu().numpy()
-                max_idx = np.argmax(scores)
-                
-                return {
-                    'label': self.LABELS[max_idx],
-                    'score': float(scores[max_idx]),
-                    'confidence': 'low',  # Always low confidence for title-only
-                    'scores': {
-                        'positive': float(scores[0]),
-                        'negative': float(scores[1]),
-                        'neutral': float(scores[2])
-                    }
-                }
-            
-            # For longer texts, analyze strategically selected chunks
-            chunks = []
-            chunk_size = 450  # Leave room for tokenization
-            
-            # Strategy: Focus on beginning (most important in news)
-            if len(text) > chunk_size:
-                # First chunk (highest weight)
-                chunks.append(text[:chunk_size])
-                
-                # Only add more chunks if text is substantially longer
-                if len(text) > chunk_size * 2:
-                    # Middle chunk
-                    mid_start = len(text) // 2 - chunk_size // 2
-                    chunks.append(text[mid_start:mid_start + chunk_size])
-            else:
-                chunks = [text]
-            
-            # Analyze each chunk
-            all_scores = []
-            for chunk in chunks:
-                inputs = self.tokenizer(
-                    chunk,
-                    return_tensors="pt",
-                    truncation=True,
-                    max_length=512,
-                    padding=True
-                ).to(self.device)
-                
-                with torch.no_grad():
-                    outputs = self.model(**inputs)
-                    probs = torch.nn.functional.softmax(outputs.logits, dim=-1)
-                
-                all_scores.append(probs[0].cpu().numpy())
-            
-            # Aggregate scores (first chunk gets 70%, rest split 30%)
-            if len(all_scores) == 1:
-                scores = all_scores[0]
-            else:
-                weights = [0.7] + [0.3 / (len(all_scores) - 1)] * (len(all_scores) - 1)
-                scores = np.average(all_scores, axis=0, weights=weights)
-            
-            max_idx = np.argmax(scores)
-            label = self.LABELS[max_idx]
-            score = float(scores[max_idx])
-            
-            # Confidence level - stricter thresholds
-            if score > 0.85:
-                confidence = "high"
-            elif score > 0.65:
-                confidence = "medium"
-            else:
-                confidence = "low"
-            
-            return {
-                'label': label,
-                'score': score,
-                'confidence': confidence,
-                'scores': {
-                    'positive': float(scores[0]),
-                    'negative': float(scores[1]),
-                    'neutral': float(scores[2])
-                }
-            }
-        
+            chunks, weights, title_only = self.plan(text, title)
+            return self.aggregate(list(self.infer(chunks)), weights, title_only)
         except Exception as e:
             logger.error(f"Sentiment analysis error: {e}")
             return self._default_result()
@@ -176,3 +235,119 @@ class FinBERTAnalyzer:
             'confidence': 'low',
             'scores': {'positive': 0.33, 'negative': 0.33, 'neutral': 0.34}
         }
+
+
+class SentimentBatcher:
+    """
+    Dedicated inference thread for a FinBERTAnalyzer.
+    
+    Chunks submitted from any thread or coroutine are queued; the worker takes
+    the first waiting chunk, collects more until it has max_batch_size or
+    max_wait_ms has passed, and scores them in one dynamically padded forward
+    pass. Each chunk gets a concurrent.futures.Future, so the event loop never
+    blocks on the model.
+    """
+    
+    def __init__(
+        self,
+        analyzer: FinBERTAnalyzer,
+        max_batch_size: int = SENTIMENT_BATCH_SIZE,
+        max_wait_ms: float = SENTIMENT_MAX_WAIT_MS
+    ):
+        self.analyzer = analyzer
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000
+        self._queue: "queue.Queue[Optional[Tuple[str, Future]]]" = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="finbert-batcher", daemon=True)
+        self._closed = False
+        
+        # Stats
+        self.batches = 0
+        self.items = 0
+        
+        self._thread.start()
+        logger.info(f"Sentiment batcher started (batch {self.max_batch_size}, wait {max_wait_ms}ms)")
+    
+    def submit(self, texts: List[str]) -> List[Future]:
+        """Queue texts for scoring; each future resolves to its probability row."""
+        if self._closed:
+            raise RuntimeError("SentimentBatcher is closed")
+        futures = []
+        for text in texts:
+            future = Future()
+            self._queue.put((text, future))
+            futures.append(future)
+        return futures
+    
+    def _collect(self) -> Tuple[List[Tuple[str, Future]], bool]:
+        """Next micro-batch, and whether close() was requested."""
+        item = self._queue.get()
+        if item is None:
+            return [], True
+        batch = [item]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                return batch, True
+            batch.append(item)
+        return batch, False
+    
+    def _run(self):
+        stop = False
+        while not stop:
+            batch, stop = self._collect()
+            live = [(text, future) for text, future in batch if future.set_running_or_notify_cancel()]
+            if not live:
+                continue
+            try:
+                probs = self.analyzer.infer([text for text, _ in live])
+            except Exception as e:
+                logger.error(f"Sentiment batch of {len(live)} failed: {e}")
+                for _, future in live:
+                    future.set_exception(e)
+                continue
+            for (_, future), row in zip(live, probs):
+                future.set_result(row)
+            self.batches += 1
+            self.items += len(live)
+    
+    def analyze(self, text: str, title: str = None) -> Dict[str, Any]:
+        """Blocking FinBERTAnalyzer.analyze() through the shared batches."""
+        if not text or not self.analyzer.ready:
+            return FinBERTAnalyzer._default_result()
+        try:
+            chunks, weights, title_only = self.analyzer.plan(text, title)
+            scores = [future.result() for future in self.submit(chunks)]
+            return self.analyzer.aggregate(scores, weights, title_only)
+        except Exception as e:
+            logger.error(f"Sentiment analysis error: {e}")
+            return FinBERTAnalyzer._default_result()
+    
+    async def analyze_async(self, text: str, title: str = None) -> Dict[str, Any]:
+        """FinBERTAnalyzer.analyze() for coroutines: awaits the batch instead of blocking the loop."""
+        if not text or not self.analyzer.ready:
+            return FinBERTAnalyzer._default_result()
+        try:
+            chunks, weights, title_only = self.analyzer.plan(text, title)
+            scores = await asyncio.gather(*(asyncio.wrap_future(f) for f in self.submit(chunks)))
+            return self.analyzer.aggregate(list(scores), weights, title_only)
+        except Exception as e:
+            logger.error(f"Sentiment analysis error: {e}")
+            return FinBERTAnalyzer._default_result()
+    
+    @property
+    def mean_batch_size(self) -> float:
+        return self.items / self.batches if self.batches else 0.0
+    
+    def close(self, timeout: float = 10.0):
+        """Finish queued chunks and stop the worker thread."""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(None)
+        self._thread.join(timeout)
@@ -0,0 +1,200 @@
+"""
+FinBERT Throughput Benchmark (CPU)
+- per-chunk: the old path, one forward pass per chunk (batch size 1)
+- per-article: FinBERTAnalyzer.analyze, one pass per article
+- batched: SentimentBatcher with many concurrent articles, per max batch size
+
+With --backends, compares inference backends instead: docs/sec through the
+batcher, accuracy on a labelled sample, and agreement with fp32 torch (label
+match rate and max probability difference). Exits non-zero if a backend's
+agreement is below --min-agreement.
+
+Run:
+    python sentiment_benchmark.py [--docs 256] [--concurrency 20] [--batch-sizes 8 16 32 64]
+    python sentiment_benchmark.py --backends torch torch-int8 onnx-int8 [--labelled sample.csv]
+"""
+
+import argparse
+import asyncio
+import csv
+import random
+import sys
+import time
+
+import numpy as np
+import torch
+
+from sentiment import FinBERTAnalyzer, SentimentBatcher
+
+SENTENCES = [
+    "Shares of the company rose 4% after quarterly profit beat analyst estimates.",
+    "The board approved a dividend payout and announced a share buyback programme.",
+    "Regulators imposed a penalty on the lender for compliance lapses.",
+    "Revenue growth slowed as input costs weighed on operating margins.",
+    "The firm cut its full-year guidance citing weak demand in export markets.",
+    "Analysts upgraded the stock to buy on improving order inflows.",
+    "The company said it will raise capital through a rights issue.",
+    "Net interest margin was stable while asset quality improved marginally.",
+    "Management expects capacity expansion to be completed by the next fiscal year.",
+    "The stock fell sharply after the auditor resigned citing governance concerns.",
+]
+
+
+# Labelled sample for the parity check (override with --labelled text,label CSV)
+LABELLED_SAMPLE = [
+    ("Net profit jumped 38% year on year, beating street estimates.", "positive"),
+    ("The company reported record quarterly revenue on strong domestic demand.", "positive"),
+    ("Operating margin expanded 250 basis points on lower raw material costs.", "positive"),
+    ("The bank's gross NPAs declined to a five-year low.", "positive"),
+    ("Brokerages upgraded the stock after a strong order book update.", "positive"),
+    ("The board declared a special dividend and approved a buyback.", "positive"),
+    ("Sales volumes grew in double digits across all segments.", "positive"),
+    ("The firm won a large multi-year contract from a global client.", "positive"),
+    ("Quarterly loss widened as costs surged and demand weakened.", "negative"),
+    ("The regulator imposed a heavy penalty for disclosure violations.", "negative"),
+    ("Shares slumped after the company cut its annual revenue guidance.", "negative"),
+    ("Credit rating agencies downgraded the company's debt outlook to negative.", "negative"),
+    ("Margins contracted sharply due to pricing pressure and higher wages.", "negative"),
+    ("The auditor resigned, raising concerns over corporate governance.", "negative"),
+    ("The plant was shut after a fire, disrupting production for weeks.", "negative"),
+    ("Promoters pledged a larger share of their holding amid a liquidity crunch.", "negative"),
+    ("The company will hold its annual general meeting on 15 September.", "neutral"),
+    ("The board will meet next week to consider quarterly results.", "neutral"),
+    ("The stock is part of the benchmark Nifty 50 index.", "neutral"),
+    ("The firm has appointed a new company secretary effective Monday.", "neutral"),
+    ("The company operates manufacturing plants in three states.", "neutral"),
+    ("Trading volumes were in line with the monthly average.", "neutral"),
+    ("The record date for the dividend has been fixed as 20 August.", "neutral"),
+    ("The company filed its shareholding pattern with the exchanges.", "neutral"),
+]
+
+
+def load_labelled(path: str = None):
+    if not path:
+        return LABELLED_SAMPLE
+    with open(path, newline='') as f:
+        return [(row['text'], row['label'].strip().lower()) for row in csv.DictReader(f)]
+
+
+def make_documents(count: int, seed: int = 7):
+    """(title, text) pairs with a mix of short (title-only), medium and long bodies."""
+    rng = random.Random(seed)
+    docs = []
+    for _ in range(count):
+        title = rng.choice(SENTENCES)
+        body = " ".join(rng.choice(SENTENCES) for _ in range(rng.randint(1, 30)))
+        docs.append((title, f"{title}. {body[:2000]}"))
+    return docs
+
+
+def per_chunk(analyzer: FinBERTAnalyzer, docs) -> None:
+    for title, text in docs:
+        chunks, _, _ = analyzer.plan(text, title)
+        for chunk in chunks:
+            analyzer.infer([chunk])
+
+
+def per_article(analyzer: FinBERTAnalyzer, docs) -> None:
+    for title, text in docs:
+        analyzer.analyze(text, title=title)
+
+
+async def batched(batcher: SentimentBatcher, docs, concurrency: int) -> None:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(title, text):
+        async with semaphore:
+            await batcher.analyze_async(text, title=title)
+
+    await asyncio.gather(*(one(title, text) for title, text in docs))
+
+
+def timed(fn) -> float:
+    started = time.perf_counter()
+    fn()
+    return time.perf_counter() - started
+
+
+def backend_report(backends, docs, labelled, concurrency: int, batch_size: int, min_agreement: float) -> bool:
+    """docs/sec and parity with fp32 torch for each backend. Returns False if any backend fails parity."""
+    texts = [text for text, _ in labelled]
+    labels = np.array([label for _, label in labelled])
+
+    print(f"{len(docs)} docs, {len(labelled)} labelled, {torch.get_num_threads()} torch threads\n")
+    print(f"{'backend':11} | {'load s':>6} | {'docs/sec':>8} | {'accuracy':>8} | {'agreement':>9} | {'max |dp|':>8}")
+    print("-" * 68)
+    reference = None
+    passed = True
+    for backend in backends:
+        started = time.perf_counter()
+        analyzer = FinBERTAnalyzer(backend=backend)
+        load_seconds = time.perf_counter() - started
+
+        probs = np.concatenate([analyzer.infer(texts[i:i + batch_size]) for i in range(0, len(texts), batch_size)])
+        predicted = np.array(FinBERTAnalyzer.LABELS)[probs.argmax(axis=1)]
+        if reference is None:
+            reference = probs
+        agreement = float((probs.argmax(axis=1) == reference.argmax(axis=1)).mean())
+        max_diff = float(np.abs(probs - reference).max())
+
+        analyzer.analyze(*reversed(docs[0]))  # warm-up
+        batcher = SentimentBatcher(analyzer, max_batch_size=batch_size)
+        elapsed = timed(lambda: asyncio.run(batched(batcher, docs, concurrency)))
+        batcher.close()
+
+        ok = agreement >= min_agreement
+        passed = passed and ok
+        print(
+            f"{backend:11} | {load_seconds:>6.1f} | {len(docs) / elapsed:>8.1f} | "
+            f"{float((predicted == labels).mean()):>8.1%} | {agreement:>9.1%} | {max_diff:>8.4f}"
+            f"{'' if ok else '   PARITY FAIL'}"
+        )
+    print(f"\n(agreement and max |dp| are against {backends[0]})")
+    return passed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="FinBERT docs/sec on CPU")
+    parser.add_argument("--docs", type=int, default=256)
+    parser.add_argument("--concurrency", type=int, default=20, help="In-flight articles (MAX_CONCURRENT_FETCHES)")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[8, 16, 32, 64])
+    parser.add_argument("--max-wait-ms", type=float, default=20)
+    parser.add_argument("--threads", type=int, default=None, help="torch intra-op threads")
+    parser.add_argument("--backends", nargs="+", default=None, help="Compare backends (first is the reference)")
+    parser.add_argument("--labelled", default=None, help="CSV with text,label columns for the parity check")
+    parser.add_argument("--min-agreement", type=float, default=0.95)
+    args = parser.parse_args()
+
+    if args.threads:
+        torch.set_num_threads(args.threads)
+    if args.backends:
+        passed = backend_report(
+            args.backends, make_documents(args.docs), load_labelled(args.labelled),
+            args.concurrency, max(args.batch_sizes), args.min_agreement
+        )
+        sys.exit(0 if passed else 1)
+    analyzer = FinBERTAnalyzer()
+    docs = make_documents(args.docs)
+    analyzer.analyze(*reversed(docs[0]))  # warm-up
+
+    print(f"{len(docs)} docs on {analyzer.device}, {torch.get_num_threads()} torch threads\n")
+    print(f"{'mode':22} | {'seconds':>8} | {'docs/sec':>8} | {'mean batch':>10}")
+    print("-" * 58)
+
+    baseline = timed(lambda: per_chunk(analyzer, docs))
+    print(f"{'per-chunk (old)':22} | {baseline:>8.2f} | {len(docs) / baseline:>8.1f} | {1:>10.1f}")
+    elapsed = timed(lambda: per_article(analyzer, docs))
+    print(f"{'per-article':22} | {elapsed:>8.2f} | {len(docs) / elapsed:>8.1f} | {'-':>10}")
+
+    for batch_size in args.batch_sizes:
+        batcher = SentimentBatcher(analyzer, max_batch_size=batch_size, max_wait_ms=args.max_wait_ms)
+        elapsed = timed(lambda: asyncio.run(batched(batcher, docs, args.concurrency)))
+        batcher.close()
+        print(
+            f"{'batched max ' + str(batch_size):22} | {elapsed:>8.2f} | {len(docs) / elapsed:>8.1f} | "
+            f"{batcher.mean_batch_size:>10.1f}   ({baseline / elapsed:.1f}x)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Client for the FinBERT sentiment server (sentiment_server.py).
+
+SentimentClient has the same analyze_async() interface as SentimentBatcher, so
+the pipeline can use the shared server instead of loading its own model.
+SENTIMENT_SERVER_URL is either http://host:port or unix:///path/to.sock.
+"""
+
+import asyncio
+import logging
+import os
+from typing import Any, Dict, List, Optional
+
+import aiohttp
+
+from sentiment import FinBERTAnalyzer
+
+logger = logging.getLogger(__name__)
+
+SENTIMENT_SERVER_URL = os.getenv('SENTIMENT_SERVER_URL', '')
+SENTIMENT_SERVER_TIMEOUT = float(os.getenv('SENTIMENT_SERVER_TIMEOUT', '30'))
+
+
+class SentimentClient:
+    """Async client for a shared sentiment server."""
+
+    def __init__(self, url: str = None, timeout: float = SENTIMENT_SERVER_TIMEOUT):
+        url = url or SENTIMENT_SERVER_URL
+        if not url:
+            raise ValueError("SENTIMENT_SERVER_URL is not set")
+        if url.startswith('unix://'):
+            self._socket_path = url[len('unix://'):]
+            self.base_url = 'http://localhost'
+        else:
+            self._socket_path = None
+            self.base_url = url.rstrip('/')
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            connector = aiohttp.UnixConnector(path=self._socket_path) if self._socket_path else None
+            self._session = aiohttp.ClientSession(connector=connector, timeout=self.timeout)
+        return self._session
+
+    async def _post(self, path: str, payload: Dict[str, Any]) -> List[Dict[str, Any]]:
+        async with self._get_session().post(f"{self.base_url}{path}", json=payload) as response:
+            response.raise_for_status()
+            return (await response.json())['results']
+
+    async def health(self) -> Dict[str, Any]:
+        async with self._get_session().get(f"{self.base_url}/health") as response:
+            return await response.json()
+
+    async def wait_until_ready(self, poll_seconds: float = 2.0, timeout: float = 600.0):
+        """Wait for the server to report a loaded model."""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while True:
+            try:
+                status = (await self.health()).get('status')
+            except aiohttp.ClientError:
+                status = 'unreachable'
+            if status == 'ready':
+                return
+            if status == 'failed':
+                raise RuntimeError("Sentiment server failed to load the model")
+            if loop.time() > deadline:
+                raise TimeoutError(f"Sentiment server not ready after {timeout:.0f}s ({status})")
+            logger.info(f"Waiting for sentiment server ({status})...")
+            await asyncio.sleep(poll_seconds)
+
+    async def analyze_many(self, documents: List[Dict[str, str]]) -> List[Dict[str, Any]]:
+        """FinBERTAnalyzer.analyze() for several {'text', 'title'} documents in one request."""
+        return await self._post('/analyze', {'documents': documents})
+
+    async def analyze_async(self, text: str, title: str = None) -> Dict[str, Any]:
+        """Same result as SentimentBatcher.analyze_async(), scored by the server."""
+        if not text:
+            return FinBERTAnalyzer._default_result()
+        try:
+            return (await self.analyze_many([{'text': text, 'title': title}]))[0]
+        except Exception as e:
+            logger.error(f"Sentiment server error: {e}")
+            return FinBERTAnalyzer._default_result()
+
+    async def classify(self, texts: List[str]) -> List[Dict[str, Any]]:
+        """Label and score for each text (one forward pass each, no chunking)."""
+        return await self._post('/classify', {'texts': texts})
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
@@ -0,0 +1,152 @@
+"""
+FinBERT Sentiment Server
+- One FinBERT model per host, shared by the enrichment pipeline and the API
+- Requests from all clients go through one SentimentBatcher, so concurrent
+  callers are scored in shared micro-batches
+- HTTP on SENTIMENT_SERVER_PORT and/or a Unix socket (SENTIMENT_SERVER_SOCKET)
+- The model loads in the background: /health answers immediately and reports
+  "loading" until the model is ready; scoring requests get 503 until then
+
+Endpoints:
+    GET  /health    -> {"status": "loading"|"ready"|"failed", "backend", "batches", "mean_batch_size"}
+    POST /analyze   {"documents": [{"text": str, "title": str}]} -> {"results": [FinBERTAnalyzer.analyze() dicts]}
+    POST /classify  {"texts": [str]} -> {"results": [{"label", "score", "scores"}]}  (one forward pass per text)
+
+Run:
+    python sentiment_server.py
+"""
+
+import asyncio
+import logging
+import os
+from typing import Any, Dict
+
+from aiohttp import web
+
+from sentiment import SENTIMENT_BACKEND, FinBERTAnalyzer, SentimentBatcher
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+# ===========================
+# Configuration
+# ===========================
+
+SENTIMENT_SERVER_HOST = os.getenv('SENTIMENT_SERVER_HOST', '0.0.0.0')
+SENTIMENT_SERVER_PORT = int(os.getenv('SENTIMENT_SERVER_PORT', '8090'))
+SENTIMENT_SERVER_SOCKET = os.getenv('SENTIMENT_SERVER_SOCKET', '')  # e.g. /tmp/finbert.sock
+MAX_DOCUMENTS_PER_REQUEST = int(os.getenv('SENTIMENT_MAX_DOCUMENTS', '256'))
+
+
+class SentimentServer:
+    """aiohttp application around one FinBERTAnalyzer + SentimentBatcher."""
+
+    def __init__(self, backend: str = None):
+        self.backend = backend or SENTIMENT_BACKEND
+        self.batcher = None
+        self.status = 'loading'
+        self.app = web.Application(client_max_size=16 * 1024 * 1024)
+        self.app.router.add_get('/health', self.health)
+        self.app.router.add_post('/analyze', self.analyze)
+        self.app.router.add_post('/classify', self.classify)
+        self.app.on_startup.append(self._start_loading)
+        self.app.on_cleanup.append(self._close)
+
+    async def _start_loading(self, app: web.Application):
+        # Load off the event loop so the server accepts health checks while the model loads
+        app['model_loader'] = asyncio.get_running_loop().create_task(self._load())
+
+    async def _load(self):
+        try:
+            analyzer = await asyncio.get_running_loop().run_in_executor(None, FinBERTAnalyzer, self.backend)
+            if not analyzer.ready:
+                raise RuntimeError("FinBERT failed to initialize")
+            self.batcher = SentimentBatcher(analyzer)
+            self.status = 'ready'
+            logger.info(f"Sentiment server ready ({self.backend} on {analyzer.device})")
+        except Exception as e:
+            self.status = 'failed'
+            logger.error(f"Sentiment model load failed: {e}")
+
+    async def _close(self, app: web.Application):
+        if self.batcher:
+            self.batcher.close()
+
+    async def _payload(self, request: web.Request, key: str) -> list:
+        if self.status != 'ready':
+            raise web.HTTPServiceUnavailable(text=f"model {self.status}")
+        try:
+            items = (await request.json())[key]
+        except Exception:
+            raise web.HTTPBadRequest(text=f"expected a JSON object with a '{key}' list")
+        if not isinstance(items, list):
+            raise web.HTTPBadRequest(text=f"'{key}' must be a list")
+        if len(items) > MAX_DOCUMENTS_PER_REQUEST:
+            raise web.HTTPRequestEntityTooLarge(
+                max_size=MAX_DOCUMENTS_PER_REQUEST, actual_size=len(items)
+            )
+        return items
+
+    async def health(self, request: web.Request) -> web.Response:
+        return web.json_response({
+            'status': self.status,
+            'backend': self.backend,
+            'batches': self.batcher.batches if self.batcher else 0,
+            'mean_batch_size': round(self.batcher.mean_batch_size, 2) if self.batcher else 0.0,
+        })
+
+    async def analyze(self, request: web.Request) -> web.Response:
+        documents = await self._payload(request, 'documents')
+        results = await asyncio.gather(*(
+            self.batcher.analyze_async(doc.get('text') or '', title=doc.get('title'))
+            for doc in documents
+        ))
+        return web.json_response({'results': results})
+
+    async def classify(self, request: web.Request) -> web.Response:
+        texts = await self._payload(request, 'texts')
+        rows = await asyncio.gather(*(asyncio.wrap_future(f) for f in self.batcher.submit([str(t) for t in texts])))
+        return web.json_response({'results': [self._label(row) for row in rows]})
+
+    @staticmethod
+    def _label(row) -> Dict[str, Any]:
+        """Pipeline-style label/score for one probability row."""
+        best = int(row.argmax())
+        return {
+            'label': FinBERTAnalyzer.LABELS[best],
+            'score': float(row[best]),
+            'scores': {label: float(p) for label, p in zip(FinBERTAnalyzer.LABELS, row)}
+        }
+
+
+async def serve():
+    server = SentimentServer()
+    runner = web.AppRunner(server.app)
+    await runner.setup()
+
+    sites = [web.TCPSite(runner, SENTIMENT_SERVER_HOST, SENTIMENT_SERVER_PORT)]
+    if SENTIMENT_SERVER_SOCKET:
+        if os.path.exists(SENTIMENT_SERVER_SOCKET):
+            os.unlink(SENTIMENT_SERVER_SOCKET)
+        sites.append(web.UnixSite(runner, SENTIMENT_SERVER_SOCKET))
+    for site in sites:
+        await site.start()
+    logger.info(
+        f"Sentiment server listening on {SENTIMENT_SERVER_HOST}:{SENTIMENT_SERVER_PORT}"
+        f"{' and ' + SENTIMENT_SERVER_SOCKET if SENTIMENT_SERVER_SOCKET else ''}"
+    )
+
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await runner.cleanup()
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        logger.info("Sentiment server stopped")
@@ -1,20 +1,25 @@
 """
 Agent implementations for the StocksAgent system.
+
+Agents are imported on first attribute access so importing one agent module
+does not pull in every other agent's dependencies.
 """
 
-from .news_agent import NewsAgent
-from .twitter_agent import TwitterAgent
-from .montecarlo_agent import MontecarloAgent
-from .technical_agent2 import TechnicalAgent
-from .fundamental_agent import FundamentalAgent
-from .explainability_agent import ExplainabilityAgent
+import importlib
+
+_EXPORTS = {
+    "NewsAgent": ".news_agent",
+    "TwitterAgent": ".twitter_agent",
+    "MontecarloAgent": ".montecarlo_agent",
+    "TechnicalAgent": ".technical_agent2",
+    "FundamentalAgent": ".fundamental_agent",
+    "ExplainabilityAgent": ".explainability_agent",
+}
+
+__all__ = list(_EXPORTS)
 
-__all__ = [
-    "NewsAgent",
-    "TwitterAgent",
-    "MontecarloAgent",
-    "TechnicalAgent",
-    "FundamentalAgent",
-    "ExplainabilityAgent",
-]
 
+def __getattr__(name):
+    if name in _EXPORTS:
+        return getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -2,12 +2,23 @@
     Core business logic for StocksAgent.
 """
 
-from .montecarlo import MonteCarloSimulator
-from .technical import TechnicalIndicators
-from .sentiment import SentimentAnalyzer
-
-__all__ = [
-    "MonteCarloSimulator",
-    "TechnicalIndicators",
-    "SentimentAnalyzer",
-]
+import importlib
+
+_EXPORTS = {
+    "MonteCarloSimulator": ".montecarlo",
+    "fit_volatility_model": ".volatility",
+    "get_volatility_cache": ".volatility",
+    "PortfolioMonteCarlo": ".portfolio_risk",
+    "assess_portfolio": ".portfolio_risk",
+    "TechnicalIndicators": ".technical",
+    "SentimentAnalyzer": ".sentiment",
+    "render_report": ".report_renderer",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    if name in _EXPORTS:
+        return getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -4,29 +4,341 @@ Core Monte Carlo Simulation Logic.
 This module contains pure simulation functions with no external API dependencies.
 """
 
+import os
+import sys
 import logging
-from typing import Dict, Any, Optional
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from typing import Dict, Any, Optional, Tuple
 from pathlib import Path
 
 import numpy as np
 import pandas as pd
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from services.bar_store import read_bars
+from agents.accessories.volatility import (
+    VOLATILITY_MODELS, VolatilityModel, fit_volatility_model, get_volatility_cache
+)
+
 
 logger = logging.getLogger(__name__)
 
+# Paths simulated per block; peak memory is ~3 x 8 bytes x chunk_size
+DEFAULT_CHUNK_SIZE = 100_000
+# Above this many paths, percentiles come from a histogram sketch instead of a full sort
+EXACT_PERCENTILE_LIMIT = 2_000_000
+SKETCH_BINS = 1 << 16
+# "thread": NumPy releases the GIL while drawing/gathering; "process": separate interpreters
+PARALLEL_BACKENDS = ("thread", "process")
+
+# How each path's returns are drawn from history:
+#   iid         independent draws with replacement
+#   antithetic  paths in mirrored pairs (rank i <-> rank n-1-i of the sorted returns)
+#   stratified  per step, one draw from each of `size` equal-probability strata (Latin hypercube)
+#   block       moving-block bootstrap of consecutive returns (keeps intraday autocorrelation)
+SAMPLING_MODES = ("iid", "antithetic", "stratified", "block")
+DEFAULT_BLOCK_LENGTH = 12   # one hour of 5-minute returns
+# Return model: "bootstrap" resamples history i.i.d. (or by SAMPLING_MODES); "ewma" and
+# "garch" scale resampled standardized residuals by each path's conditional volatility
+SIMULATION_MODELS = ("bootstrap",) + VOLATILITY_MODELS
+# Sampling modes that apply to the volatility models' residual draws
+VOLATILITY_SAMPLING_MODES = ("iid", "antithetic")
+# Paths per round when stopping adaptively (per worker, before checking the standard errors)
+ADAPTIVE_ROUND_PATHS = 50_000
+# Variance-reduced paths are not independent (mirrored pairs, strata shared within a block),
+# so their standard errors come from the spread of per-block estimates (batch means).
+# Adaptive rounds are split into this many blocks per worker, and at least
+# MIN_REPLICATES blocks are needed before the batch-means errors replace the i.i.d. ones.
+REPLICATES_PER_ROUND = 10
+MIN_REPLICATES = 8
+
+
+class ReturnStatistics:
+    """
+    Streaming summary of simulated total returns (%): count, mean/std (pairwise
+    merge of block moments), min/max, loss count and percentiles.
+
+    Percentiles are exact (the returns are kept, 8 bytes per path) or come from a
+    fixed-size histogram sketch over `bounds`. Summaries with the same bounds can
+    be merged, which is how parallel workers are combined.
+
+    With `replicates`, each added block is also kept as one replicate (its size,
+    mean, loss share and 5th percentile) for batch-means standard errors.
+    """
+
+    def __init__(
+        self,
+        exact: bool = True,
+        bounds: Optional[Tuple[float, float]] = None,
+        bins: int = SKETCH_BINS,
+        replicates: bool = False
+    ):
+        self.exact = exact
+        self.bins = bins
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+        self.min = np.inf
+        self.max = -np.inf
+        self.losses = 0
+        self.replicates = replicates
+        # (paths, mean, loss share, 5th percentile) per added block
+        self._replicates = []
+
+        self._blocks = []
+        self._edges: Optional[np.ndarray] = None
+        self._counts: Optional[np.ndarray] = None
+        if not exact and bounds is not None:
+            self._init_sketch(*bounds)
+
+    def _init_sketch(self, low: float, high: float):
+        self._edges = np.linspace(low, high, self.bins + 1)
+        self._counts = np.zeros(self.bins, dtype=np.int64)
+
+    def _merge_moments(self, n: int, mean: float, m2: float):
+        delta = mean - self.mean
+        combined = self.count + n
+        self.mean += delta * n / combined
+        self._m2 += m2 + delta ** 2 * self.count * n / combined
+        self.count = combined
+
+    def add(self, total_returns: np.ndarray):
+        """Fold one block of simulated total returns into the summary."""
+        n = len(total_returns)
+        if n == 0:
+            return
+        block_mean = float(total_returns.mean())
+        self._merge_moments(n, block_mean, float(((total_returns - block_mean) ** 2).sum()))
+
+        self.min = min(self.min, float(total_returns.min()))
+        self.max = max(self.max, float(total_returns.max()))
+        losses = int(np.count_nonzero(total_returns < 0))
+        self.losses += losses
+        if self.replicates:
+            self._replicates.append((n, block_mean, losses / n, float(np.percentile(total_returns, 5))))
+
+        if self.exact:
+            self._blocks.append(total_returns)
+            return
+        if self._edges is None:
+            # No bounds given: size the sketch from the first block, widened on both sides
+            low, high = float(total_returns.min()), float(total_returns.max())
+            span = max(high - low, 1e-9)
+            self._init_sketch(low - span, high + span)
+        positions = np.searchsorted(self._edges, total_returns, side="right") - 1
+        np.clip(positions, 0, self.bins - 1, out=positions)
+        self._counts += np.bincount(positions, minlength=self.bins)
+
+    def merge(self, other: "ReturnStatistics"):
+        """Fold another summary (same mode and bounds) into this one."""
+        if other.count == 0:
+            return
+        self._merge_moments(other.count, other.mean, other._m2)
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self.losses += other.losses
+        self._replicates.extend(other._replicates)
+        if self.exact:
+            self._blocks.extend(other._blocks)
+        elif self._edges is None:
+            self._edges, self._counts = other._edges, other._counts.copy()
+        else:
+            if not np.array_equal(self._edges, other._edges):
+                raise ValueError("Cannot merge sketches with different bounds")
+            self._counts += other._counts
+
+    @property
+    def std(self) -> float:
+        """Sample standard deviation (ddof=1)."""
+        return float(np.sqrt(self._m2 / (self.count - 1))) if self.count > 1 else 0.0
+
+    def standard_errors(self, z: float = 1.96) -> Dict[str, float]:
+        """
+        Standard errors (percentage points) of the headline estimates.
+
+        With at least MIN_REPLICATES replicates these are batch-means errors, which
+        reflect the variance reduction of antithetic/stratified sampling and the
+        dependence of block sampling. Otherwise they assume independent paths:
+        std/sqrt(N), the binomial error, and for the 5th percentile the
+        order-statistic confidence band (the spread between percentiles
+        q -/+ z*sqrt(q(1-q)/N), divided by 2z).
+        """
+        if len(self._replicates) >= MIN_REPLICATES:
+            return self._replicate_errors()
+
+        n = self.count
+        p = self.losses / n
+        q = 0.05
+        band = z * np.sqrt(q * (1 - q) / n)
+        low, high = max(q - band, 0.0) * 100, min(q + band, 1.0) * 100
+        pct = self.percentiles([low, high])
+        return {
+            "Mean Return": self.std / np.sqrt(n),
+            "Probability of Loss": 100 * float(np.sqrt(p * (1 - p) / n)),
+            "5th Percentile": (pct[high] - pct[low]) / (2 * z),
+        }
+
+    def _replicate_errors(self) -> Dict[str, float]:
+        """
+        Batch-means errors: the path-weighted spread of the per-block estimates,
+        scaled to the combined estimate over all blocks.
+        """
+        sizes, means, loss_shares, p5s = (np.array(column, dtype=np.float64) for column in zip(*self._replicates))
+        weights = sizes / sizes.sum()
+        effective = 1 / float(np.sum(weights ** 2))   # number of equal-sized blocks with the same spread
+
+        def error(estimates: np.ndarray) -> float:
+            centre = weights @ estimates
+            variance = (weights @ (estimates - centre) ** 2) * effective / (effective - 1)
+            return float(np.sqrt(variance / effective))
+
+        return {
+            "Mean Return": error(means),
+            "Probability of Loss": 100 * error(loss_shares),
+            "5th Percentile": error(p5s),
+        }
+
+    def percentiles(self, qs) -> Dict[float, float]:
+        """Percentiles (0-100) of everything added so far."""
+        if self.exact:
+            values = np.concatenate(self._blocks)
+            return dict(zip(qs, (float(v) for v in np.percentile(values, qs))))
+
+        cumulative = np.cumsum(self._counts)
+        result = {}
+        for q in qs:
+            rank = q / 100 * (self.count - 1) + 1
+            b = int(np.searchsorted(cumulative, rank))
+            before = cumulative[b - 1] if b > 0 else 0
+            within = (rank - before) / max(self._counts[b], 1)
+            value = self._edges[b] + within * (self._edges[b + 1] - self._edges[b])
+            result[q] = float(min(max(value, self.min), self.max))
+        return result
+
+    def tail_mean(self, q: float) -> float:
+        """Mean of the returns at or below the q-th percentile (for CVaR / expected shortfall)."""
+        threshold = self.percentiles([q])[q]
+        if self.exact:
+            values = np.concatenate(self._blocks)
+            return float(values[values <= threshold].mean())
+
+        # Whole bins below the threshold at their midpoints, plus the covered part of the threshold bin
+        midpoints = (self._edges[:-1] + self._edges[1:]) / 2
+        b = int(np.clip(np.searchsorted(self._edges, threshold, side="right") - 1, 0, self.bins - 1))
+        fraction = (threshold - self._edges[b]) / (self._edges[b + 1] - self._edges[b] or 1.0)
+        weights = self._counts[:b].astype(np.float64)
+        total = weights.sum() + self._counts[b] * fraction
+        if total == 0:
+            return threshold
+        partial_mid = (self._edges[b] + threshold) / 2
+        return float((weights @ midpoints[:b] + self._counts[b] * fraction * partial_mid) / total)
+
+
+def prepare_returns(log_returns: np.ndarray, sampling: str) -> np.ndarray:
+    """
+    Returns in the layout simulate_block() samples from: sorted for antithetic and
+    stratified draws, prefix sums (leading 0) for block draws, as-is otherwise.
+    """
+    log_returns = np.ascontiguousarray(log_returns, dtype=np.float64)
+    if sampling in ("antithetic", "stratified"):
+        return np.sort(log_returns)
+    if sampling == "block":
+        return np.concatenate(([0.0], np.cumsum(log_returns)))
+    return log_returns
+
+
+def simulate_block(
+    rng: np.random.Generator,
+    returns: np.ndarray,
+    simulation_days: int,
+    size: int,
+    sampling: str = "iid",
+    block_length: int = DEFAULT_BLOCK_LENGTH,
+    vol_model: Optional[VolatilityModel] = None
+) -> np.ndarray:
+    """
+    Total returns (%) of `size` bootstrap paths, drawn from prepare_returns() output
+    (or from `vol_model` when given).
+
+    Only the final price matters, so each path keeps just its running sum of
+    log returns: final / initial - 1 = expm1(sum), independent of the initial price.
+    """
+    if vol_model is not None:
+        return vol_model.simulate_block(rng, simulation_days, size, sampling)
+    summed = np.zeros(size)
+    if sampling == "block":
+        num_returns = len(returns) - 1
+        remaining = simulation_days
+        while remaining > 0:
+            take = min(block_length, remaining, num_returns)
+            starts = rng.integers(0, num_returns - take + 1, size)
+            summed += returns[starts + take] - returns[starts]
+            remaining -= take
+    elif sampling == "antithetic":
+        n = len(returns)
+        half = (size + 1) // 2
+        for _ in range(simulation_days):
+            idx = rng.integers(0, n, half)
+            summed[:half] += returns[idx]
+            summed[half:] += returns[n - 1 - idx[:size - half]]
+    elif sampling == "stratified":
+        n = len(returns)
+        for _ in range(simulation_days):
+            u = (rng.permutation(size) + rng.random(size)) / size
+            summed += returns[(u * n).astype(np.int64)]
+    else:
+        for _ in range(simulation_days):
+            summed += returns[rng.integers(0, len(returns), size)]
+    np.expm1(summed, out=summed)
+    summed *= 100
+    return summed
+
+
+def run_worker(
+    seed_seq: np.random.SeedSequence,
+    returns: np.ndarray,
+    simulation_days: int,
+    num_paths: int,
+    chunk_size: int,
+    exact: bool,
+    bounds: Tuple[float, float],
+    sampling: str = "iid",
+    block_length: int = DEFAULT_BLOCK_LENGTH,
+    vol_model: Optional[VolatilityModel] = None,
+    replicates: bool = False
+) -> ReturnStatistics:
+    """One worker's share of the paths, simulated block by block (module-level so process pools can pickle it)."""
+    rng = np.random.default_rng(seed_seq)
+    stats = ReturnStatistics(exact=exact, bounds=bounds, replicates=replicates)
+    for start in range(0, num_paths, chunk_size):
+        size = min(chunk_size, num_paths - start)
+        stats.add(simulate_block(rng, returns, simulation_days, size, sampling, block_length, vol_model))
+    return stats
+
 
 class MonteCarloSimulator:
     """
     Monte Carlo simulation engine for stock price prediction.
     
-    Uses bootstrap sampling of historical log returns to simulate
-    future price paths and calculate risk/return metrics.
+    Uses bootstrap sampling of historical log returns (or an EWMA/GARCH(1,1)
+    volatility model) to simulate future price paths and calculate
+    risk/return metrics.
     """
     
     def __init__(
         self,
         num_simulations: int = 1_000_000,
-        simulation_days: int = 15
+        simulation_days: int = 15,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        exact_percentiles: Optional[bool] = None,
+        seed: Optional[int] = None,
+        workers: int = 1,
+        backend: str = "thread",
+        sampling: str = "iid",
+        block_length: int = DEFAULT_BLOCK_LENGTH,
+        tolerance: Optional[float] = None,
+        model: str = "bootstrap"
     ):
         """
         Initialize the simulator.
@@ -34,9 +346,41 @@ class MonteCarloSimulator:
         Args:
             num_simulations: Number of Monte Carlo paths to simulate
             simulation_days: Number of days to simulate forward
+            chunk_size: Paths simulated per block (bounds peak memory)
+            exact_percentiles: Exact percentiles (True) or histogram sketch (False);
+                None picks exact up to EXACT_PERCENTILE_LIMIT paths
+            seed: Seed for the random generators (None = fresh entropy). Results are
+                bit-reproducible for a given seed and worker count.
+            workers: Parallel workers; each gets its own generator from SeedSequence.spawn
+            backend: "thread" or "process"
+            sampling: One of SAMPLING_MODES
+            block_length: Consecutive returns per draw in "block" sampling
+            tolerance: Stop early once the standard errors of the mean return, probability
+                of loss and 5th percentile are all below this (percentage points);
+                num_simulations is then the cap. None always runs num_simulations paths.
+            model: One of SIMULATION_MODELS; "ewma"/"garch" support iid and antithetic sampling
         """
         self.num_simulations = num_simulations
         self.simulation_days = simulation_days
+        self.chunk_size = max(1, int(chunk_size))
+        if exact_percentiles is None:
+            exact_percentiles = num_simulations <= EXACT_PERCENTILE_LIMIT
+        self.exact_percentiles = exact_percentiles
+        self.seed = seed
+        if backend not in PARALLEL_BACKENDS:
+            raise ValueError(f"backend must be one of {PARALLEL_BACKENDS}, got {backend!r}")
+        self.workers = max(1, int(workers))
+        self.backend = backend
+        if sampling not in SAMPLING_MODES:
+            raise ValueError(f"sampling must be one of {SAMPLING_MODES}, got {sampling!r}")
+        if model not in SIMULATION_MODELS:
+            raise ValueError(f"model must be one of {SIMULATION_MODELS}, got {model!r}")
+        if model != "bootstrap" and sampling not in VOLATILITY_SAMPLING_MODES:
+            raise ValueError(f"{model} model supports sampling {VOLATILITY_SAMPLING_MODES}, got {sampling!r}")
+        self.model = model
+        self.sampling = sampling
+        self.block_length = max(1, int(block_length))
+        self.tolerance = tolerance
     
     @staticmethod
     def parse_close_price(close_value) -> float:
@@ -78,10 +422,10 @@ class MonteCarloSimulator:
     
     def get_initial_price_from_csv(self, csv_path: str) -> float:
         """
-        Extract initial (latest) close price from CSV file.
+        Extract initial (latest) close price from a bar file (Parquet or CSV).
         
         Args:
-            csv_path: Path to CSV file with 'close' column
+            csv_path: Path to bar file with 'close' column
             
         Returns:
             float: Latest close price from the dataset
@@ -93,10 +437,21 @@ class MonteCarloSimulator:
         if not Path(csv_path).exists():
             raise FileNotFoundError(f"CSV file not found: {csv_path}")
         
-        df = pd.read_csv(csv_path)
+        return self.get_initial_price_from_frame(read_bars(csv_path), source=csv_path)
+    
+    def get_initial_price_from_frame(self, df: pd.DataFrame, source: str = "bars") -> float:
+        """
+        Extract initial (latest) close price from already loaded bars.
         
+        Args:
+            df: DataFrame with a 'close' column
+            source: Label used in error messages
+            
+        Returns:
+            float: Latest close price from the dataset
+        """
         if df.empty:
-            raise ValueError(f"CSV file is empty: {csv_path}")
+            raise ValueError(f"CSV file is empty: {source}")
         
         if 'close' not in df.columns:
             raise ValueError(f"CSV missing 'close' column. Available: {df.columns.tolist()}")
@@ -118,6 +473,50 @@ class MonteCarloSimulator:
         logger.info(f"Extracted initial price: {initial_price}")
         return initial_price
     
+    def _validate(self, log_returns: np.ndarray, initial_price: float):
+        if len(log_returns) == 0:
+            raise ValueError("log_returns array is empty")
+        
+        if initial_price <= 0:
+            raise ValueError(f"initial_price must be positive, got {initial_price}")
+    
+    def _shares(self, num_paths: int):
+        """Paths per worker (the first workers take the remainder)."""
+        base, extra = divmod(num_paths, self.workers)
+        return [base + (1 if i < extra else 0) for i in range(self.workers)]
+    
+    def _bounds(self, log_returns: np.ndarray) -> Tuple[float, float]:
+        """Exact range of simulated total returns: every day draws the worst/best return."""
+        return (
+            float(np.expm1(self.simulation_days * log_returns.min()) * 100),
+            float(np.expm1(self.simulation_days * log_returns.max()) * 100),
+        )
+    
+    def volatility_model(self, log_returns: np.ndarray, ticker: Optional[str] = None) -> Optional[VolatilityModel]:
+        """
+        Fitted EWMA/GARCH model for this simulator's `model` (None for bootstrap).
+        With a ticker the fit comes from the per-ticker cache and is only redone
+        when the returns changed.
+        """
+        if self.model == "bootstrap":
+            return None
+        if ticker:
+            return get_volatility_cache().get(ticker, log_returns, self.model)
+        return fit_volatility_model(log_returns, self.model)
+    
+    def _pilot_bounds(self, seed_seq: np.random.SeedSequence, vol_model: VolatilityModel) -> Tuple[float, float]:
+        """
+        Sketch range for volatility-model paths (which have no useful exact bound):
+        one pilot block's range, widened by its span on both sides. Shared by all
+        workers so their sketches merge; values outside land in the edge bins.
+        """
+        pilot = vol_model.simulate_block(
+            np.random.default_rng(seed_seq), self.simulation_days, min(self.chunk_size, self.num_simulations), self.sampling
+        )
+        low, high = float(pilot.min()), float(pilot.max())
+        span = max(high - low, 1e-9)
+        return low - span, high + span
+    
     def bootstrap_simulation(
         self,
         log_returns: np.ndarray,
@@ -126,6 +525,9 @@ class MonteCarloSimulator:
         """
         Perform Monte Carlo bootstrap simulation on log returns.
         
+        Materializes one total return per path; use simulate() for statistics
+        in constant memory.
+        
         Args:
             log_returns: Array of historical log returns
             initial_price: Starting price for simulation
@@ -136,34 +538,136 @@ class MonteCarloSimulator:
         Raises:
             ValueError: If inputs are invalid
         """
-        if len(log_returns) == 0:
-            raise ValueError("log_returns array is empty")
+        self._validate(log_returns, initial_price)
+        vol_model = self.volatility_model(log_returns)
+        returns = prepare_returns(log_returns, self.sampling)
+        seed_seqs = np.random.SeedSequence(self.seed).spawn(self.workers)
+        blocks = []
+        for seed_seq, num_paths in zip(seed_seqs, self._shares(self.num_simulations)):
+            rng = np.random.default_rng(seed_seq)
+            for start in range(0, num_paths, self.chunk_size):
+                size = min(self.chunk_size, num_paths - start)
+                blocks.append(simulate_block(
+                    rng, returns, self.simulation_days, size, self.sampling, self.block_length, vol_model
+                ))
+        return np.concatenate(blocks)
+    
+    def simulate(
+        self,
+        log_returns: np.ndarray,
+        initial_price: float,
+        vol_model: Optional[VolatilityModel] = None
+    ) -> ReturnStatistics:
+        """
+        Run the bootstrap block by block, folding each block into streaming statistics.
+        With workers > 1 the paths are split across a thread or process pool and the
+        per-worker statistics are merged in worker order. With a tolerance, paths are
+        simulated in rounds until the standard errors are small enough.
         
-        if initial_price <= 0:
-            raise ValueError(f"initial_price must be positive, got {initial_price}")
+        Args:
+            log_returns: Array of historical log returns (chronological)
+            initial_price: Starting price for simulation
+            vol_model: Fitted volatility model for "ewma"/"garch" (fitted here if None)
+            
+        Returns:
+            ReturnStatistics over all simulated total returns
+        """
+        self._validate(log_returns, initial_price)
+        log_returns = np.ascontiguousarray(log_returns, dtype=np.float64)
+        if vol_model is None:
+            vol_model = self.volatility_model(log_returns)
         
         logger.info(
-            f"Running Monte Carlo: {self.num_simulations} simulations "
-            f"over {self.simulation_days} days"
+            f"Running Monte Carlo: up to {self.num_simulations} simulations "
+            f"over {self.simulation_days} days ({self.model} model, {self.sampling} sampling, "
+            f"blocks of {self.chunk_size}, {self.workers} {self.backend} worker(s))"
         )
         
-        # Bootstrap sample returns with replacement
-        sampled_returns = np.random.choice(
-            log_returns,
-            size=(self.simulation_days, self.num_simulations),
-            replace=True
-        )
-        
-        # Calculate cumulative price paths using log returns
-        price_paths = initial_price * np.exp(np.cumsum(sampled_returns, axis=0))
+        returns = prepare_returns(log_returns, self.sampling)
+        root_seq = np.random.SeedSequence(self.seed)
+        if vol_model is None:
+            bounds = self._bounds(log_returns)
+        elif self.exact_percentiles:
+            bounds = None
+        else:
+            bounds = self._pilot_bounds(root_seq.spawn(1)[0], vol_model)
+        # Variance-reduced paths get batch-means standard errors (one replicate per block)
+        replicates = self.sampling != "iid"
+        chunk_size = self.chunk_size
+        if self.tolerance is None:
+            round_paths = self.num_simulations
+        else:
+            round_paths = min(self.num_simulations, ADAPTIVE_ROUND_PATHS * self.workers)
+            if replicates:
+                chunk_size = min(chunk_size, max(1, ADAPTIVE_ROUND_PATHS // REPLICATES_PER_ROUND))
+        
+        stats = ReturnStatistics(exact=self.exact_percentiles, bounds=bounds, replicates=replicates)
+        pool = None
+        if self.workers > 1:
+            pool_class = ThreadPoolExecutor if self.backend == "thread" else ProcessPoolExecutor
+            pool = pool_class(max_workers=self.workers)
+        try:
+            while stats.count < self.num_simulations:
+                paths = min(round_paths, self.num_simulations - stats.count)
+                jobs = [
+                    (seed_seq, returns, self.simulation_days, num_paths, chunk_size,
+                     self.exact_percentiles, bounds, self.sampling, self.block_length, vol_model, replicates)
+                    for seed_seq, num_paths in zip(root_seq.spawn(self.workers), self._shares(paths))
+                ]
+                parts = list(pool.map(run_worker, *zip(*jobs))) if pool else [run_worker(*jobs[0])]
+                for part in parts:
+                    stats.merge(part)
+                
+                if self.tolerance is not None:
+                    worst = max(stats.standard_errors().values())
+                    if worst <= self.tolerance:
+                        logger.info(f"Converged after {stats.count} paths (max standard error {worst:.4f})")
+                        break
+        finally:
+            if pool:
+                pool.shutdown()
+        return stats
+    
+    def _summarize(
+        self,
+        log_returns: np.ndarray,
+        initial_price: float,
+        ticker: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Simulate and build the results dict shared by evaluate() and evaluate_from_prices()."""
+        mean_log_return = float(np.mean(log_returns))
+        std_log_return = float(np.std(log_returns, ddof=1))
         
-        # Extract final prices (last row)
-        final_prices = price_paths[-1, :]
+        logger.info(f"Log returns - Mean: {mean_log_return:.6f}, Std: {std_log_return:.6f}")
         
-        # Calculate total returns as percentages
-        total_returns = ((final_prices - initial_price) / initial_price) * 100
+        vol_model = self.volatility_model(np.ascontiguousarray(log_returns, dtype=np.float64), ticker)
+        stats = self.simulate(log_returns, initial_price, vol_model)
+        pct = stats.percentiles([5, 10, 50, 90, 95])
         
-        return total_returns
+        results = {
+            "Min Return": stats.min,
+            "Max Return": stats.max,
+            "Mean Return": stats.mean,
+            "Median Return": pct[50],
+            "Std Deviation": stats.std,
+            "Probability of Loss": stats.losses / stats.count,
+            "5th Percentile": pct[5],
+            "95th Percentile": pct[95],
+            "10th Percentile": pct[10],
+            "90th Percentile": pct[90],
+            "Mean Log Return": mean_log_return,
+            "Std Log Return": std_log_return,
+            "Initial Price": initial_price,
+            "Num Simulations": stats.count,
+            "Num Days": self.simulation_days,
+            "Percentiles": "exact" if self.exact_percentiles else "sketch",
+            "Sampling": self.sampling,
+            "Standard Errors": stats.standard_errors(),
+            "Model": self.model,
+        }
+        if vol_model is not None:
+            results["Volatility Model"] = vol_model.summary()
+        return results
     
     def evaluate(
         self,
@@ -171,10 +675,10 @@ class MonteCarloSimulator:
         initial_price: Optional[float] = None
     ) -> Dict[str, Any]:
         """
-        Run full Monte Carlo evaluation from a CSV with log returns.
+        Run full Monte Carlo evaluation from a bar file (Parquet or CSV) with log returns.
         
         Args:
-            csv_path: Path to CSV file with 'log_ret' column
+            csv_path: Path to bar file with 'log_ret' column
             initial_price: Starting price (if None, extracted from CSV 'close' column)
             
         Returns:
@@ -186,7 +690,7 @@ class MonteCarloSimulator:
             raise FileNotFoundError(f"CSV file not found: {csv_path}")
         
         # Load data
-        df = pd.read_csv(csv_path)
+        df = read_bars(csv_path)
         
         if df.empty:
             raise ValueError(f"CSV file is empty: {csv_path}")
@@ -204,48 +708,21 @@ class MonteCarloSimulator:
         
         # Get initial price
         if initial_price is None:
-            initial_price = self.get_initial_price_from_csv(csv_path)
+            initial_price = self.get_initial_price_from_frame(df, source=csv_path)
         
         if initial_price <= 0:
             raise ValueError(f"Invalid initial price: {initial_price}")
         
-        # Calculate input statistics
-        mean_log_return = float(np.mean(log_returns))
-        std_log_return = float(np.std(log_returns, ddof=1))
-        
-        logger.info(f"Log returns - Mean: {mean_log_return:.6f}, Std: {std_log_return:.6f}")
-        
-        # Run simulation
-        simulation_results = self.bootstrap_simulation(log_returns, initial_price)
+        results = self._summarize(log_returns, initial_price)
         
-        # Calculate output statistics
-        prob_loss = float(np.mean(simulation_results < 0))
-        
-        results = {
-            "Min Return": float(np.min(simulation_results)),
-            "Max Return": float(np.max(simulation_results)),
-            "Mean Return": float(np.mean(simulation_results)),
-            "Median Return": float(np.median(simulation_results)),
-            "Std Deviation": float(np.std(simulation_results, ddof=1)),
-            "Probability of Loss": prob_loss,
-            "5th Percentile": float(np.percentile(simulation_results, 5)),
-            "95th Percentile": float(np.percentile(simulation_results, 95)),
-            "10th Percentile": float(np.percentile(simulation_results, 10)),
-            "90th Percentile": float(np.percentile(simulation_results, 90)),
-            "Mean Log Return": mean_log_return,
-            "Std Log Return": std_log_return,
-            "Initial Price": initial_price,
-            "Num Simulations": self.num_simulations,
-            "Num Days": self.simulation_days,
-        }
-        
-        logger.info(f"Monte Carlo evaluation complete. Prob Loss: {prob_loss:.2%}")
+        logger.info(f"Monte Carlo evaluation complete. Prob Loss: {results['Probability of Loss']:.2%}")
         return results
     
     def evaluate_from_prices(
         self,
         prices: np.ndarray,
-        initial_price: Optional[float] = None
+        initial_price: Optional[float] = None,
+        ticker: Optional[str] = None
     ) -> Dict[str, Any]:
         """
         Run Monte Carlo evaluation directly from price array.
@@ -253,6 +730,7 @@ class MonteCarloSimulator:
         Args:
             prices: Array of historical prices
             initial_price: Starting price (if None, uses last price in array)
+            ticker: Caches the fitted volatility model per ticker ("ewma"/"garch")
             
         Returns:
             dict: Dictionary containing simulation results
@@ -267,31 +745,31 @@ class MonteCarloSimulator:
         if initial_price is None:
             initial_price = float(prices[-1])
         
-        # Calculate statistics
-        mean_log_return = float(np.mean(log_returns))
-        std_log_return = float(np.std(log_returns, ddof=1))
-        
-        # Run simulation
-        simulation_results = self.bootstrap_simulation(log_returns, initial_price)
-        
-        # Calculate statistics
-        prob_loss = float(np.mean(simulation_results < 0))
+        return self._summarize(log_returns, initial_price, ticker)
+    
+    def evaluate_from_returns(
+        self,
+        log_returns: np.ndarray,
+        initial_price: float,
+        ticker: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Run Monte Carlo evaluation from precomputed log returns
+        (e.g. a window published by the live return service).
         
-        results = {
-            "Min Return": float(np.min(simulation_results)),
-            "Max Return": float(np.max(simulation_results)),
-            "Mean Return": float(np.mean(simulation_results)),
-            "Median Return": float(np.median(simulation_results)),
-            "Std Deviation": float(np.std(simulation_results, ddof=1)),
-            "Probability of Loss": prob_loss,
-            "5th Percentile": float(np.percentile(simulation_results, 5)),
-            "95th Percentile": float(np.percentile(simulation_results, 95)),
-            "Mean Log Return": mean_log_return,
-            "Std Log Return": std_log_return,
-            "Initial Price": initial_price,
-            "Num Simulations": self.num_simulations,
-            "Num Days": self.simulation_days,
-        }
+        Args:
+            log_returns: Array of historical log returns
+            initial_price: Starting price
+            ticker: Caches the fitted volatility model per ticker ("ewma"/"garch")
+            
+        Returns:
+            dict: Dictionary containing simulation results
+        """
+        log_returns = np.asarray(log_returns, dtype=np.float64)
+        log_returns = log_returns[np.isfinite(log_returns)]
+        if len(log_returns) < 2:
+            raise ValueError(f"Insufficient log returns data: {len(log_returns)} rows")
+        if initial_price <= 0:
+            raise ValueError(f"Invalid initial price: {initial_price}")
         
-        return results
-
+        return self._summarize(log_returns, initial_price, ticker)
@@ -0,0 +1,358 @@
+"""
+Portfolio-level Monte Carlo risk.
+
+Simulates all holdings of a portfolio jointly, so correlation between them is
+kept. Two methods are supported:
+- bootstrap: resample whole rows of the aligned return matrix, i.e. every asset's
+  return at the same historical timestamp
+- cholesky: multivariate normal with the sample mean and covariance of log returns
+  (the D-step sum is drawn directly as N(D*mu, D*Sigma))
+
+Portfolio VaR/CVaR are computed from the weighted total returns in one vectorized
+pass per block. Return matrices are cached per (tickers, interval, range) so
+repeated requests for the same portfolio skip the data loading.
+"""
+
+import os
+import sys
+import time
+import logging
+import datetime
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from agents.accessories.montecarlo import ReturnStatistics, DEFAULT_CHUNK_SIZE, EXACT_PERCENTILE_LIMIT
+
+logger = logging.getLogger(__name__)
+
+PORTFOLIO_METHODS = ("bootstrap", "cholesky")
+CONFIDENCE_LEVELS = (95, 99)
+
+RETURN_MATRIX_TTL_SECONDS = 15 * 60
+RETURN_MATRIX_MAX_ENTRIES = 32
+
+
+class ReturnMatrix:
+    """Log returns of several tickers on their common timestamps (rows = time, columns = tickers)."""
+
+    def __init__(self, tickers: List[str], dates: pd.DatetimeIndex, returns: np.ndarray, last_prices: np.ndarray):
+        self.tickers = tickers
+        self.dates = dates
+        self.returns = returns
+        self.last_prices = last_prices
+
+    @classmethod
+    def from_bars(cls, bars: Dict[str, pd.DataFrame]) -> "ReturnMatrix":
+        """
+        Align close prices on the timestamps every ticker has, then take log returns.
+
+        Args:
+            bars: {ticker: DataFrame with 'date' and 'close'}
+        """
+        closes = pd.concat(
+            {ticker: df.set_index("date")["close"] for ticker, df in bars.items() if not df.empty},
+            axis=1,
+            join="inner",
+        ).sort_index()
+        missing = [ticker for ticker in bars if ticker not in closes.columns]
+        if missing:
+            raise ValueError(f"No price history for: {', '.join(missing)}")
+        if len(closes) < 3:
+            raise ValueError(f"Only {len(closes)} common timestamps across {list(bars)}")
+
+        prices = closes.to_numpy(dtype=np.float64)
+        return cls(
+            tickers=list(closes.columns),
+            dates=closes.index[1:],
+            returns=np.diff(np.log(prices), axis=0),
+            last_prices=prices[-1],
+        )
+
+    def correlation(self) -> Dict[str, Dict[str, float]]:
+        corr = np.corrcoef(self.returns, rowvar=False) if len(self.tickers) > 1 else np.ones((1, 1))
+        return {
+            a: {b: round(float(corr[i, j]), 4) for j, b in enumerate(self.tickers)}
+            for i, a in enumerate(self.tickers)
+        }
+
+
+class ReturnMatrixCache:
+    """In-memory TTL/LRU cache of ReturnMatrix objects."""
+
+    def __init__(self, ttl_seconds: int = RETURN_MATRIX_TTL_SECONDS, max_entries: int = RETURN_MATRIX_MAX_ENTRIES):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple, Tuple[float, ReturnMatrix]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(tickers: List[str], interval: str, start: Any, end: Any) -> Tuple:
+        return (tuple(sorted(t.upper() for t in tickers)), interval, str(start), str(end))
+
+    def get(self, key: Tuple) -> Optional[ReturnMatrix]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] > time.time():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self._entries.pop(key, None)
+            self.misses += 1
+            return None
+
+    def set(self, key: Tuple, matrix: ReturnMatrix):
+        with self._lock:
+            self._entries[key] = (time.time() + self.ttl_seconds, matrix)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+_matrix_cache = ReturnMatrixCache()
+
+
+def get_return_matrix_cache() -> ReturnMatrixCache:
+    """Process-wide return matrix cache."""
+    return _matrix_cache
+
+
+def portfolio_weights(holdings: List[Dict[str, Any]], cash: float = 0.0) -> Dict[str, float]:
+    """
+    Weight of each holding in the portfolio (cash counts towards the total with zero return).
+
+    Uses market_value, or quantity * current_price when it is missing.
+    """
+    values: Dict[str, float] = {}
+    for holding in holdings:
+        value = holding.get("market_value")
+        if value is None:
+            value = float(holding.get("quantity", 0)) * float(holding.get("current_price", 0))
+        if value > 0:
+            ticker = str(holding["ticker"])
+            values[ticker] = values.get(ticker, 0.0) + float(value)
+    total = sum(values.values()) + max(float(cash), 0.0)
+    if total <= 0:
+        raise ValueError("Portfolio has no positive holdings")
+    return {ticker: value / total for ticker, value in values.items()}
+
+
+class PortfolioMonteCarlo:
+    """
+    Joint Monte Carlo simulation of a weighted portfolio.
+
+    Like MonteCarloSimulator, paths are simulated in blocks and only the
+    portfolio total return of each path is kept (in ReturnStatistics).
+    """
+
+    def __init__(
+        self,
+        num_simulations: int = 1_000_000,
+        simulation_days: int = 15,
+        method: str = "bootstrap",
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        exact_percentiles: Optional[bool] = None,
+        seed: Optional[int] = None
+    ):
+        """
+        Initialize the simulator.
+
+        Args:
+            num_simulations: Number of Monte Carlo paths to simulate
+            simulation_days: Number of return steps per path
+            method: "bootstrap" (synchronized rows) or "cholesky" (correlated normal)
+            chunk_size: Paths simulated per block (memory is ~chunk_size x assets)
+            exact_percentiles: Exact percentiles (True) or histogram sketch (False);
+                None picks exact up to EXACT_PERCENTILE_LIMIT paths
+            seed: Seed for the random generator (None = fresh entropy)
+        """
+        if method not in PORTFOLIO_METHODS:
+            raise ValueError(f"method must be one of {PORTFOLIO_METHODS}, got {method!r}")
+        self.num_simulations = num_simulations
+        self.simulation_days = simulation_days
+        self.method = method
+        self.chunk_size = max(1, int(chunk_size))
+        if exact_percentiles is None:
+            exact_percentiles = num_simulations <= EXACT_PERCENTILE_LIMIT
+        self.exact_percentiles = exact_percentiles
+        self.seed = seed
+
+    def _bootstrap_block(self, rng: np.random.Generator, returns: np.ndarray, size: int) -> np.ndarray:
+        """Summed log returns (size x assets) from whole historical rows."""
+        summed = np.zeros((size, returns.shape[1]))
+        for _ in range(self.simulation_days):
+            summed += returns[rng.integers(0, len(returns), size)]
+        return summed
+
+    def _cholesky_block(self, rng: np.random.Generator, drift: np.ndarray, factor: np.ndarray, size: int) -> np.ndarray:
+        """Summed log returns (size x assets) drawn from N(D*mu, D*Sigma)."""
+        z = rng.standard_normal((size, len(drift)))
+        return drift + z @ factor.T
+
+    def simulate(self, matrix: ReturnMatrix, weights: Dict[str, float]) -> ReturnStatistics:
+        """
+        Simulate portfolio total returns (%).
+
+        Args:
+            matrix: Aligned log returns of the holdings
+            weights: {ticker: portfolio weight}; tickers missing from the matrix are rejected
+
+        Returns:
+            ReturnStatistics of the weighted portfolio return
+        """
+        missing = [t for t in weights if t not in matrix.tickers]
+        if missing:
+            raise ValueError(f"No returns for holdings: {', '.join(missing)}")
+        w = np.array([weights.get(t, 0.0) for t in matrix.tickers])
+        returns = matrix.returns
+        days = self.simulation_days
+
+        if self.method == "cholesky":
+            drift = days * returns.mean(axis=0)
+            cov = np.atleast_2d(np.cov(returns, rowvar=False))
+            # Tiny ridge keeps near-singular covariances (e.g. duplicate listings) factorizable
+            factor = np.linalg.cholesky(days * cov + 1e-12 * np.eye(len(w)))
+            bounds = None
+        else:
+            bounds = (
+                float(w @ np.expm1(days * returns.min(axis=0)) * 100),
+                float(w @ np.expm1(days * returns.max(axis=0)) * 100),
+            )
+
+        logger.info(
+            f"Running portfolio Monte Carlo ({self.method}): {self.num_simulations} paths, "
+            f"{len(w)} assets, {len(returns)} aligned observations"
+        )
+
+        rng = np.random.default_rng(np.random.SeedSequence(self.seed))
+        stats = ReturnStatistics(exact=self.exact_percentiles, bounds=bounds)
+        for start in range(0, self.num_simulations, self.chunk_size):
+            size = min(self.chunk_size, self.num_simulations - start)
+            if self.method == "cholesky":
+                summed = self._cholesky_block(rng, drift, factor, size)
+            else:
+                summed = self._bootstrap_block(rng, returns, size)
+            np.expm1(summed, out=summed)
+            stats.add((summed @ w) * 100)
+        return stats
+
+    def evaluate(self, matrix: ReturnMatrix, weights: Dict[str, float], portfolio_value: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Portfolio risk summary: return distribution, VaR and CVaR at CONFIDENCE_LEVELS.
+
+        VaR/CVaR are reported as positive loss percentages (and in currency if
+        portfolio_value is given).
+        """
+        stats = self.simulate(matrix, weights)
+        tails = [100 - level for level in CONFIDENCE_LEVELS]
+        pct = stats.percentiles(sorted(set(tails + [50, 95])))
+
+        results: Dict[str, Any] = {
+            "Mean Return": stats.mean,
+            "Median Return": pct[50],
+            "Std Deviation": stats.std,
+            "Min Return": stats.min,
+            "Max Return": stats.max,
+            "Probability of Loss": stats.losses / stats.count,
+            "5th Percentile": pct[5],
+            "95th Percentile": pct[95],
+        }
+        for level, tail in zip(CONFIDENCE_LEVELS, tails):
+            var = -pct[tail]
+            cvar = -stats.tail_mean(tail)
+            results[f"VaR {level}%"] = var
+            results[f"CVaR {level}%"] = cvar
+            if portfolio_value:
+                results[f"VaR {level}% Value"] = var / 100 * portfolio_value
+                results[f"CVaR {level}% Value"] = cvar / 100 * portfolio_value
+
+        results.update({
+            "Weights": {t: round(weights.get(t, 0.0), 6) for t in matrix.tickers},
+            "Correlation": matrix.correlation(),
+            "Method": self.method,
+            "Observations": len(matrix.returns),
+            "Num Simulations": stats.count,
+            "Num Days": self.simulation_days,
+        })
+        return results
+
+
+def load_return_matrix(
+    tickers: List[str],
+    start_date: datetime.date,
+    end_date: datetime.date,
+    interval: str = "5minute",
+    data_manager: Any = None
+) -> ReturnMatrix:
+    """
+    Return matrix for `tickers`, from the cache or built from the bar store.
+
+    Args:
+        data_manager: ZerodhaDataManager (created on demand if None)
+    """
+    cache = get_return_matrix_cache()
+    key = cache.make_key(tickers, interval, start_date, end_date)
+    matrix = cache.get(key)
+    if matrix is not None:
+        return matrix
+
+    if data_manager is None:
+        from services.zerodha_service import ZerodhaDataManager
+        data_manager = ZerodhaDataManager()
+
+    bars = {ticker: data_manager.get_bars(ticker, start_date, end_date, interval) for ticker in tickers}
+    matrix = ReturnMatrix.from_bars(bars)
+    cache.set(key, matrix)
+    return matrix
+
+
+def assess_portfolio(
+    portfolio: Dict[str, Any],
+    days_history: int = 100,
+    interval: str = "5minute",
+    simulator: Optional[PortfolioMonteCarlo] = None,
+    data_manager: Any = None
+) -> Dict[str, Any]:
+    """
+    Joint VaR/CVaR for a portfolio document as stored by create_update_portfolio.py.
+
+    Args:
+        portfolio: Document with `holdings` (and optionally `cash`, `total_value`)
+        days_history: Days of history for the return matrix
+        interval: Candle interval of the return matrix
+        simulator: Configured PortfolioMonteCarlo (defaults if None)
+        data_manager: ZerodhaDataManager to load bars with
+
+    Returns:
+        Results dict from PortfolioMonteCarlo.evaluate() plus portfolio metadata
+    """
+    holdings = portfolio.get("holdings") or []
+    weights = portfolio_weights(holdings, cash=portfolio.get("cash", 0.0))
+
+    end_date = datetime.date.today()
+    start_date = end_date - datetime.timedelta(days=days_history)
+    matrix = load_return_matrix(list(weights), start_date, end_date, interval, data_manager)
+
+    simulator = simulator or PortfolioMonteCarlo()
+    results = simulator.evaluate(matrix, weights, portfolio_value=portfolio.get("total_value"))
+    results["portfolio_id"] = portfolio.get("portfolio_id")
+    results["Cash Weight"] = round(1.0 - sum(weights.values()), 6)
+    results["History Days"] = days_history
+    return results
+
+
+def assess_stored_portfolio(portfolio_id: str, **kwargs) -> Dict[str, Any]:
+    """assess_portfolio() for a portfolio loaded from MongoDB by id."""
+    from agents.accessories.create_update_portfolio import get_database
+
+    portfolio = get_database().portfolios.find_one({"portfolio_id": portfolio_id})
+    if not portfolio:
+        raise ValueError(f"Portfolio {portfolio_id} not found")
+    return assess_portfolio(portfolio, **kwargs)
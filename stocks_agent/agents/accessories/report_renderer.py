@@ -0,0 +1,182 @@
+"""
+Template-based report renderer.
+
+Builds the explainability report's `signals`, `portfolio_context` and `summary`
+directly from the structured agent outputs, without an LLM. Each agent's output
+casts a bullish/bearish/neutral vote, and the suggested action follows the net vote.
+"""
+
+import logging
+from typing import Dict, Any, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+#   Vote thresholds
+TWITTER_BULLISH_SCORE = 0.6
+TWITTER_BEARISH_SCORE = 0.4
+MC_BULLISH_PROB_LOSS = 0.4
+MC_BEARISH_PROB_LOSS = 0.6
+# Net votes needed for BUY / SELL (otherwise HOLD)
+ACTION_VOTE_THRESHOLD = 2
+
+BULLISH, BEARISH, NEUTRAL = 1, -1, 0
+VOTE_LABELS = {BULLISH: "bullish", BEARISH: "bearish", NEUTRAL: "neutral"}
+
+
+def _is_usable(output: Dict[str, Any]) -> bool:
+    """False for missing, errored or timed-out agent outputs."""
+    return bool(output) and output.get("status") not in ("timed_out", "error")
+
+
+def technical_signal(output: Dict[str, Any]) -> Optional[Tuple[int, str]]:
+    if not _is_usable(output) or "signal" not in output:
+        return None
+    signal = str(output.get("signal", "HOLD")).upper()
+    vote = {"BUY": BULLISH, "SELL": BEARISH}.get(signal, NEUTRAL)
+    text = f"Technical: {signal} (strength {float(output.get('strength', 0)):.2f})"
+    if output.get("reason"):
+        text += f" - {output['reason']}"
+    return vote, text
+
+
+def news_signal(output: Dict[str, Any]) -> Optional[Tuple[int, str]]:
+    if not _is_usable(output) or not output.get("overall_sentiment"):
+        return None
+    sentiment = str(output["overall_sentiment"]).lower()
+    vote = BULLISH if "bull" in sentiment or "positive" in sentiment else \
+        BEARISH if "bear" in sentiment or "negative" in sentiment else NEUTRAL
+    articles = len(output.get("news_output") or [])
+    return vote, f"News: {sentiment} across {articles} article(s)"
+
+
+def twitter_signal(output: Dict[str, Any]) -> Optional[Tuple[int, str]]:
+    if not _is_usable(output) or output.get("sentiment_score") is None:
+        return None
+    score = float(output["sentiment_score"])
+    vote = BULLISH if score >= TWITTER_BULLISH_SCORE else BEARISH if score <= TWITTER_BEARISH_SCORE else NEUTRAL
+    return vote, f"Twitter: sentiment score {score:.2f} ({VOTE_LABELS[vote]})"
+
+
+def montecarlo_signal(output: Dict[str, Any]) -> Optional[Tuple[int, str]]:
+    results = (output or {}).get("results") or {}
+    if not _is_usable(output) or results.get("error") or "Probability of Loss" not in results:
+        return None
+    prob_loss = float(results["Probability of Loss"])
+    vote = BULLISH if prob_loss <= MC_BULLISH_PROB_LOSS else BEARISH if prob_loss >= MC_BEARISH_PROB_LOSS else NEUTRAL
+    text = (
+        f"Monte Carlo: {prob_loss:.1%} probability of loss, "
+        f"mean return {float(results.get('Mean Return', 0)):.2f}%, "
+        f"5th percentile {float(results.get('5th Percentile', 0)):.2f}%"
+    )
+    return vote, text
+
+
+# Keys of a deadline/error marker, not tickers
+MARKER_KEYS = ("status", "late", "deadline_seconds", "error")
+
+
+def fundamental_signal(output: Dict[str, Any]) -> Optional[Tuple[int, str]]:
+    # state["fundamental_output"] is the ticker -> analysis map itself
+    if not _is_usable(output):
+        return None
+    analyses = {t: a for t, a in output.items() if t not in MARKER_KEYS}
+    if not analyses:
+        return None
+    available = [t for t, a in analyses.items() if not (isinstance(a, str) and a.startswith("Error"))]
+    # DCF output is free-form; it is reported but does not vote
+    return NEUTRAL, f"Fundamental: DCF analysis available for {len(available)}/{len(analyses)} ticker(s)"
+
+
+SIGNAL_EXTRACTORS = [
+    ("technical_output", technical_signal),
+    ("news_output", news_signal),
+    ("twitter_output", twitter_signal),
+    ("montecarlo_output", montecarlo_signal),
+    ("fundamental_output", fundamental_signal),
+]
+
+
+def find_holding(holdings: List[Dict[str, Any]], tickers: List[str]) -> Optional[Dict[str, Any]]:
+    """First holding whose ticker matches one of the report's tickers (exchange suffix ignored)."""
+    wanted = {str(t).upper().split(".")[0] for t in tickers}
+    for holding in holdings or []:
+        if str(holding.get("ticker", "")).upper().split(".")[0] in wanted:
+            return holding
+    return None
+
+
+def render_report(
+    deterministic_data: Dict[str, Any],
+    holdings: Optional[List[Dict[str, Any]]] = None
+) -> Dict[str, Any]:
+    """
+    Render the LLM-free report fields.
+
+    Args:
+        deterministic_data: Output of ExplainabilityAgent._get_deterministic_data
+        holdings: User's portfolio holdings, or None if unavailable
+
+    Returns:
+        dict with `signals`, `portfolio_context` and `summary`
+    """
+    signals = []
+    net_vote = 0
+    for key, extractor in SIGNAL_EXTRACTORS:
+        try:
+            extracted = extractor(deterministic_data.get(key) or {})
+        except (TypeError, ValueError) as e:
+            logger.warning(f"Could not read {key} for report: {e}")
+            extracted = None
+        if extracted is None:
+            continue
+        vote, text = extracted
+        net_vote += vote
+        signals.append({"source": key.replace("_output", ""), "view": VOTE_LABELS[vote], "detail": text})
+
+    if net_vote >= ACTION_VOTE_THRESHOLD:
+        action = "BUY"
+    elif net_vote <= -ACTION_VOTE_THRESHOLD:
+        action = "SELL"
+    else:
+        action = "HOLD"
+
+    tickers = deterministic_data.get("tickers") or []
+    holding = find_holding(holdings, tickers) if holdings is not None else None
+    if holdings is None:
+        portfolio_context = {
+            "is_holding": False,
+            "current_position": "Unknown (portfolio unavailable)",
+            "suggested_action": action,
+        }
+    elif holding:
+        portfolio_context = {
+            "is_holding": True,
+            "current_position": f"{float(holding.get('quantity', 0)):g} shares @ {float(holding.get('avg_cost', 0)):.2f}",
+            "suggested_action": action,
+        }
+    else:
+        portfolio_context = {
+            "is_holding": False,
+            "current_position": "No position",
+            "suggested_action": action,
+        }
+
+    ticker_str = ", ".join(tickers) if tickers else "Market"
+    if signals:
+        summary = (
+            f"{ticker_str}: net view {VOTE_LABELS[(net_vote > 0) - (net_vote < 0)]} "
+            f"({net_vote:+d} from {len(signals)} signal(s)), suggested action {action}. "
+            + " ".join(f"{s['detail']}." for s in signals)
+        )
+    else:
+        summary = f"{ticker_str}: no agent produced usable signals. Suggested action {action}."
+
+    late_agents = (deterministic_data.get("meta") or {}).get("late_agents") or []
+    if late_agents:
+        summary += f" Partial result: {', '.join(late_agents)} timed out."
+
+    return {
+        "signals": signals,
+        "portfolio_context": portfolio_context,
+        "summary": summary,
+    }
@@ -5,13 +5,34 @@ Contains LLM-based sentiment analysis logic for social media data.
 Extracted from twitter_agent.py for reusability.
 """
 
+import os
+import sys
 import json
 import logging
 from typing import Dict, List, Optional
 
+# stocks_agent/ on the path for the shared `services.*` modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from services.llm_gateway import get_llm_gateway, langchain_payload
+
 logger = logging.getLogger(__name__)
 
 
+def _parse_sentiment_json(content: str) -> Dict:
+    """Parse an LLM sentiment reply, tolerating ```json fences."""
+    return json.loads(content.replace("```json", "").replace("```", "").strip())
+
+
+def _is_sentiment_response(content) -> bool:
+    """Cache only replies that parse to a dict with 'score' and 'summary'."""
+    try:
+        result = _parse_sentiment_json(content)
+    except (TypeError, ValueError, AttributeError):
+        return False
+    return isinstance(result, dict) and "score" in result and "summary" in result
+
+
 class SentimentAnalyzer:
     """
     Core class for analyzing sentiment from social media data using LLMs.
@@ -43,6 +64,23 @@ class SentimentAnalyzer:
                 )
         return self._llm
     
+    def _complete(self, system_prompt: str, user_prompt: str, caller: str) -> str:
+        """Run one system+user prompt through the shared LLM gateway and return the text."""
+        from langchain_core.messages import HumanMessage, SystemMessage
+        
+        messages = [
+            SystemMessage(content=system_prompt),
+            HumanMessage(content=user_prompt)
+        ]
+        return get_llm_gateway().call(
+            model=self.model,
+            payload=langchain_payload(messages, temperature=self.temperature),
+            fn=lambda: self.llm.invoke(messages),
+            caller=caller,
+            encode=lambda response: response.content,
+            validate=_is_sentiment_response,
+        )
+    
     @staticmethod
     def format_tweets_for_llm(tweets_data: List[Dict]) -> str:
         """
@@ -87,10 +125,8 @@ class SentimentAnalyzer:
             hours_delta: Time window in hours
             
         Returns:
-            Dict with 'score' (0-1) and 'summary' keys
+            Dict with 'score' (0-1) and 'summary' keys ('error' set if the analysis failed)
         """
-        from langchain_core.messages import HumanMessage, SystemMessage
-        
         logger.info(f"Running sentiment analysis on {len(tweets_list)} tweets for {ticker}...")
         
         try:
@@ -116,18 +152,13 @@ class SentimentAnalyzer:
             {tweets_text}
             """
             
-            response = self.llm.invoke([
-                SystemMessage(content=system_prompt),
-                HumanMessage(content=user_prompt)
-            ])
+            content = self._complete(system_prompt, user_prompt, caller="sentiment.tweets")
             
-            content = response.content.replace("```json", "").replace("```", "").strip()
-            result_json = json.loads(content)
-            return result_json
+            return _parse_sentiment_json(content)
         
         except Exception as e:
             logger.error(f"LLM/Parsing Error: {e}")
-            return {"score": 0.5, "summary": f"Error analyzing sentiment: {str(e)}"}
+            return {"score": 0.5, "summary": f"Error analyzing sentiment: {str(e)}", "error": str(e)}
     
     def analyze_news(
         self,
@@ -142,10 +173,8 @@ class SentimentAnalyzer:
             news_items: List of news article dictionaries
             
         Returns:
-            Dict with 'score' (0-1) and 'summary' keys
+            Dict with 'score' (0-1) and 'summary' keys ('error' set if the analysis failed)
         """
-        from langchain_core.messages import HumanMessage, SystemMessage
-        
         logger.info(f"Running sentiment analysis on {len(news_items)} news items for {ticker}...")
         
         try:
@@ -172,14 +201,10 @@ class SentimentAnalyzer:
             {news_text}
             """
             
-            response = self.llm.invoke([
-                SystemMessage(content=system_prompt),
-                HumanMessage(content=user_prompt)
-            ])
+            content = self._complete(system_prompt, user_prompt, caller="sentiment.news")
             
-            content = response.content.replace("```json", "").replace("```", "").strip()
-            return json.loads(content)
+            return _parse_sentiment_json(content)
         
         except Exception as e:
             logger.error(f"News sentiment analysis error: {e}")
-            return {"score": 0.5, "summary": f"Error analyzing news: {str(e)}"}
\ No newline at end of file
+            return {"score": 0.5, "summary": f"Error analyzing news: {str(e)}", "error": str(e)}
\ No newline at end of file
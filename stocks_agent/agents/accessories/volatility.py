@@ -0,0 +1,387 @@
+"""
+Conditional Volatility Models for Monte Carlo.
+
+EWMA and GARCH(1,1) fitted to bar log returns by Gaussian maximum likelihood,
+used by MonteCarloSimulator(model="ewma"|"garch") instead of i.i.d. resampling
+of the whole history. Paths start from the current conditional variance and
+evolve it step by step; shocks are the fitted standardized residuals,
+resampled (filtered historical simulation), so fat tails are kept.
+
+Fitting needs only numpy: the likelihood is evaluated for a whole grid of
+candidate parameters in one pass over the returns, then the grid is refined
+around the best candidate. Fits are cached per ticker. When new bars only slide
+the window forward, the cached fit is advanced instead of refit: its parameters
+are kept and the variance recursion runs over just the appended returns. A full
+(warm-started) refit happens once VOLATILITY_REFIT_RETURNS new returns have
+been advanced over, or when the returns change in any other way.
+"""
+
+import time
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Tuple
+
+import numpy as np
+
+
+logger = logging.getLogger(__name__)
+
+VOLATILITY_MODELS = ("ewma", "garch")
+
+# Coarse search grids: GARCH persistence (alpha + beta) x alpha's share of it, EWMA decay
+GARCH_PERSISTENCE_GRID = (0.5, 0.7, 0.8, 0.9, 0.95, 0.97, 0.98, 0.99, 0.995, 0.999)
+GARCH_ALPHA_SHARE_GRID = tuple(np.linspace(0.02, 0.5, 13))
+EWMA_LAMBDA_GRID = tuple(np.linspace(0.80, 0.995, 40))
+# Grid refinements after the coarse pass (cold fit) or around the cached parameters (warm refit)
+COLD_REFINEMENTS = 3
+WARM_REFINEMENTS = 2
+MAX_PERSISTENCE = 0.9999
+
+VOLATILITY_CACHE_MAX_ENTRIES = 64
+# New returns a cached fit is advanced over before it is refit (one trading day of 5-minute bars)
+VOLATILITY_REFIT_RETURNS = 75
+
+
+def _log_likelihoods(
+    resid: np.ndarray,
+    omega: np.ndarray,
+    alpha: np.ndarray,
+    beta: np.ndarray,
+    initial: float
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Gaussian log-likelihood (up to a constant) of every (omega, alpha, beta)
+    candidate, and each candidate's next-step variance. One pass over the
+    returns, vectorized across candidates.
+    """
+    variance = np.full(len(alpha), initial)
+    total = np.zeros(len(alpha))
+    for r2 in resid * resid:
+        total -= np.log(variance) + r2 / variance
+        variance = omega + alpha * r2 + beta * variance
+    return 0.5 * total, variance
+
+
+def _conditional_variances(resid: np.ndarray, omega: float, alpha: float, beta: float, initial: float) -> Tuple[np.ndarray, float]:
+    """In-sample conditional variances of one parameter set, and the next-step forecast."""
+    variances = np.empty(len(resid))
+    variance = initial
+    for t, r in enumerate(resid.tolist()):
+        variances[t] = variance
+        variance = omega + alpha * r * r + beta * variance
+    return variances, variance
+
+
+class VolatilityModel:
+    """
+    A fitted EWMA or GARCH(1,1) model of bar log returns:
+
+        r_t = mu + sigma_t * z_t
+        sigma_{t+1}^2 = omega + alpha * (r_t - mu)^2 + beta * sigma_t^2
+
+    EWMA is the special case omega = 0, alpha = 1 - lambda, beta = lambda.
+    GARCH uses variance targeting (omega = (1 - alpha - beta) * sample variance).
+    """
+
+    def __init__(
+        self,
+        kind: str,
+        mu: float,
+        omega: float,
+        alpha: float,
+        beta: float,
+        variance: float,
+        residuals: np.ndarray,
+        log_likelihood: float,
+        resid_history: Optional[np.ndarray] = None,
+        variance_history: Optional[np.ndarray] = None
+    ):
+        self.kind = kind
+        self.mu = mu
+        self.omega = omega
+        self.alpha = alpha
+        self.beta = beta
+        # Conditional variance of the next (first simulated) return
+        self.variance = variance
+        # Standardized residuals, sorted (for antithetic draws), mean 0 and variance 1
+        self.residuals = residuals
+        self.log_likelihood = log_likelihood
+        # Demeaned returns and their conditional variances, chronological (for advance())
+        self.resid_history = resid_history
+        self.variance_history = variance_history
+
+    @property
+    def persistence(self) -> float:
+        return self.alpha + self.beta
+
+    def summary(self) -> Dict[str, Any]:
+        """Parameters for the results dict."""
+        summary = {
+            "Model": self.kind,
+            "Mu": self.mu,
+            "Alpha": self.alpha,
+            "Beta": self.beta,
+            "Current Volatility": float(np.sqrt(self.variance)),
+            "Log Likelihood": self.log_likelihood,
+        }
+        if self.kind == "garch":
+            summary["Omega"] = self.omega
+            summary["Long-Run Volatility"] = float(np.sqrt(self.omega / max(1 - self.persistence, 1e-12)))
+        return summary
+
+    def advance(self, keep_from: int, keep_to: int, new_returns: np.ndarray) -> "VolatilityModel":
+        """
+        Same parameters over a slid window: history[keep_from:keep_to] followed by
+        `new_returns`. Only the new returns go through the variance recursion;
+        the standardized residual pool and log-likelihood are rebuilt from the
+        kept history (vectorized, no parameter search).
+        """
+        resid = self.resid_history[keep_from:keep_to]
+        variances = self.variance_history[keep_from:keep_to]
+        new_resid = np.asarray(new_returns, dtype=np.float64) - self.mu
+        variance = self.omega + self.alpha * resid[-1] ** 2 + self.beta * variances[-1]
+        new_variances, forecast = _conditional_variances(new_resid, self.omega, self.alpha, self.beta, variance)
+
+        resid = np.concatenate((resid, new_resid))
+        variances = np.concatenate((variances, new_variances))
+        log_likelihood = float(-0.5 * np.sum(np.log(variances) + resid * resid / variances))
+        return VolatilityModel(
+            self.kind, self.mu, self.omega, self.alpha, self.beta, float(forecast),
+            _standardized(resid, variances), log_likelihood, resid, variances
+        )
+
+    def simulate_block(
+        self,
+        rng: np.random.Generator,
+        simulation_days: int,
+        size: int,
+        sampling: str = "iid"
+    ) -> np.ndarray:
+        """
+        Total returns (%) of `size` paths, each step's shock scaled by that path's
+        conditional volatility, which is then updated from the shock.
+        """
+        z = self.residuals
+        n = len(z)
+        half = (size + 1) // 2
+        variance = np.full(size, self.variance)
+        summed = np.zeros(size)
+        # Preallocated step buffers: the recursion runs in place
+        shock = np.empty(size)
+        scratch = np.empty(size)
+        for _ in range(simulation_days):
+            if sampling == "antithetic":
+                idx = rng.integers(0, n, half)
+                idx = np.concatenate((idx, n - 1 - idx[:size - half]))
+            else:
+                idx = rng.integers(0, n, size)
+            np.sqrt(variance, out=shock)
+            np.take(z, idx, out=scratch)
+            shock *= scratch
+            summed += shock
+            # variance = omega + alpha * shock^2 + beta * variance
+            np.multiply(shock, shock, out=scratch)
+            scratch *= self.alpha
+            scratch += self.omega
+            variance *= self.beta
+            variance += scratch
+        summed += simulation_days * self.mu
+        np.expm1(summed, out=summed)
+        summed *= 100
+        return summed
+
+
+def _standardized(resid: np.ndarray, variances: np.ndarray) -> np.ndarray:
+    """Sorted standardized residuals, rescaled to mean 0 and variance 1."""
+    z = resid / np.sqrt(variances)
+    return np.sort((z - z.mean()) / z.std())
+
+
+def _refine(center: np.ndarray, step: np.ndarray) -> np.ndarray:
+    """5 x 5 grid of (alpha, beta) around `center`, kept inside the stationary region."""
+    offsets = np.linspace(-2, 2, 5)
+    alpha = (center[0] + offsets[:, None] * step[0]).repeat(5, axis=1).ravel()
+    beta = (center[1] + offsets[None, :] * step[1]).repeat(5, axis=0).ravel()
+    keep = (alpha > 0) & (beta >= 0) & (alpha + beta < MAX_PERSISTENCE)
+    return np.column_stack((alpha[keep], beta[keep]))
+
+
+def fit_volatility_model(
+    log_returns: np.ndarray,
+    kind: str = "garch",
+    previous: Optional[VolatilityModel] = None
+) -> VolatilityModel:
+    """
+    Fit an EWMA or GARCH(1,1) model to log returns (chronological).
+
+    Args:
+        log_returns: Historical log returns
+        kind: One of VOLATILITY_MODELS
+        previous: Earlier fit for the same series; the search starts from its
+            parameters instead of the coarse grid (incremental refit)
+
+    Returns:
+        VolatilityModel
+    """
+    if kind not in VOLATILITY_MODELS:
+        raise ValueError(f"kind must be one of {VOLATILITY_MODELS}, got {kind!r}")
+    log_returns = np.ascontiguousarray(log_returns, dtype=np.float64)
+    if len(log_returns) < 10:
+        raise ValueError(f"Need at least 10 log returns to fit {kind}, got {len(log_returns)}")
+
+    mu = float(log_returns.mean())
+    resid = log_returns - mu
+    sample_variance = float(resid.var())
+    if sample_variance <= 0:
+        raise ValueError("log returns have zero variance")
+
+    def omega_for(candidates: np.ndarray) -> np.ndarray:
+        if kind == "ewma":
+            return np.zeros(len(candidates))
+        return sample_variance * (1 - candidates[:, 0] - candidates[:, 1])
+
+    def best_of(candidates: np.ndarray) -> Tuple[np.ndarray, float]:
+        ll, _ = _log_likelihoods(resid, omega_for(candidates), candidates[:, 0], candidates[:, 1], sample_variance)
+        i = int(np.nanargmax(ll))
+        return candidates[i], float(ll[i])
+
+    if previous is not None and previous.kind == kind:
+        step = np.array([0.01, 0.01]) if kind == "garch" else np.array([0.0025, 0.0025])
+        refinements = WARM_REFINEMENTS
+        best, best_ll = best_of(np.array([[previous.alpha, previous.beta]]))
+    else:
+        if kind == "ewma":
+            lam = np.array(EWMA_LAMBDA_GRID)
+            candidates = np.column_stack((1 - lam, lam))
+            step = np.array([0.0025, 0.0025])
+        else:
+            persistence, share = np.meshgrid(GARCH_PERSISTENCE_GRID, GARCH_ALPHA_SHARE_GRID)
+            alpha = (persistence * share).ravel()
+            candidates = np.column_stack((alpha, persistence.ravel() - alpha))
+            step = np.array([0.01, 0.01])
+        refinements = COLD_REFINEMENTS
+        best, best_ll = best_of(candidates)
+
+    for _ in range(refinements):
+        if kind == "ewma":
+            # One free parameter: alpha = 1 - lambda, beta = lambda
+            lam = np.clip(best[1] + np.linspace(-2, 2, 9) * step[1], 0.5, MAX_PERSISTENCE)
+            candidates = np.column_stack((1 - lam, lam))
+        else:
+            candidates = _refine(best, step)
+        candidate, candidate_ll = best_of(np.vstack(([best], candidates)))
+        if candidate_ll >= best_ll:
+            best, best_ll = candidate, candidate_ll
+        step = step / 2
+
+    alpha, beta = float(best[0]), float(best[1])
+    omega = float(omega_for(best[None, :])[0])
+    variances, forecast = _conditional_variances(resid, omega, alpha, beta, sample_variance)
+
+    logger.info(
+        f"Fitted {kind}: alpha={alpha:.4f}, beta={beta:.4f}, omega={omega:.3e}, "
+        f"current vol={np.sqrt(forecast):.6f} ({len(log_returns)} returns)"
+    )
+    return VolatilityModel(
+        kind, mu, omega, alpha, beta, float(forecast), _standardized(resid, variances), best_ll, resid, variances
+    )
+
+
+def _slide(old: np.ndarray, new: np.ndarray, max_new: int) -> Optional[Tuple[int, int, int]]:
+    """
+    How `new` continues `old` as a sliding window: (keep_from, keep_to, appended)
+    with new == old[keep_from:keep_to] + new[-appended:]. The last old return may
+    have been revised (a candle that was still forming). None if `new` is not
+    such a continuation with 1..max_new appended returns.
+    """
+    for revised in (0, 1):
+        keep_to = len(old) - revised
+        if keep_to < 1:
+            return None
+        last = old[keep_to - 1]
+        # Positions where the kept history could end inside `new`
+        lo = max(0, len(new) - 1 - max_new)
+        for end in np.flatnonzero(new[lo:len(new) - 1] == last)[::-1] + lo + 1:
+            overlap = int(end)
+            if overlap <= keep_to and np.array_equal(new[:overlap], old[keep_to - overlap:keep_to]):
+                return keep_to - overlap, keep_to, len(new) - overlap
+    return None
+
+
+class VolatilityModelCache:
+    """
+    Fitted models per (ticker, kind). A model is reused while the returns it was
+    fitted on are unchanged; new bars trigger a warm-started refit.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = VOLATILITY_CACHE_MAX_ENTRIES,
+        refit_returns: int = VOLATILITY_REFIT_RETURNS
+    ):
+        self.max_entries = max_entries
+        self.refit_returns = refit_returns
+        # key -> (fingerprint, model, returns it covers, returns advanced over since the last full fit)
+        self._entries: "OrderedDict[Tuple, Tuple[Tuple, VolatilityModel, np.ndarray, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.advances = 0
+
+    @staticmethod
+    def fingerprint(log_returns: np.ndarray) -> Tuple:
+        return (len(log_returns), float(log_returns[-1]), float(log_returns.sum()))
+
+    def get(self, ticker: str, log_returns: np.ndarray, kind: str) -> VolatilityModel:
+        """
+        Cached model for `ticker`. If `log_returns` slid forward by a few bars the
+        cached fit is advanced over them; otherwise (or every refit_returns new
+        returns) it is refit, warm-started from the cached parameters.
+        """
+        key = (ticker.upper(), kind)
+        log_returns = np.ascontiguousarray(log_returns, dtype=np.float64)
+        fingerprint = self.fingerprint(log_returns)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] == fingerprint:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        started = time.perf_counter()
+        model, advanced = None, 0
+        if entry:
+            _, previous, previous_returns, advanced = entry
+            slide = _slide(previous_returns, log_returns, self.refit_returns - advanced)
+            if slide is not None and previous.resid_history is not None:
+                keep_from, keep_to, appended = slide
+                model = previous.advance(keep_from, keep_to, log_returns[len(log_returns) - appended:])
+                advanced += appended
+                with self._lock:
+                    self.advances += 1
+                logger.info(
+                    f"Advanced {kind} for {ticker} over {appended} new return(s) "
+                    f"in {time.perf_counter() - started:.4f}s"
+                )
+        if model is None:
+            model = fit_volatility_model(log_returns, kind, previous=entry[1] if entry else None)
+            advanced = 0
+            logger.info(
+                f"{'Refit' if entry else 'Fit'} {kind} for {ticker} in {time.perf_counter() - started:.3f}s"
+            )
+        with self._lock:
+            self._entries[key] = (fingerprint, model, log_returns.copy(), advanced)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return model
+
+
+_volatility_cache = VolatilityModelCache()
+
+
+def get_volatility_cache() -> VolatilityModelCache:
+    """Process-wide volatility model cache."""
+    return _volatility_cache
@@ -13,6 +13,8 @@ from typing import Dict, Any, Type, Union
 from pydantic import BaseModel
 
 from state import StockAgentState
+from services.result_cache import get_result_cache, get_agent_ttl, is_cacheable
+from services.cancellation import raise_if_cancelled
 
 
 class BaseAgent(ABC):
@@ -81,14 +83,42 @@ class BaseAgent(ABC):
             raise NotImplementedError(f"{self.name} must define output_schema")
         return self.output_schema(**output_data)
     
+    @property
+    def cache_ttl(self) -> int:
+        """Freshness window (seconds) for this agent's results. 0 disables caching."""
+        return get_agent_ttl(self.name)
+    
+    def _cache_ticker(self, input_dict: Dict[str, Any]) -> str:
+        """Extract the ticker part of the cache key from the validated input."""
+        if input_dict.get("ticker"):
+            return str(input_dict["ticker"])
+        tickers = input_dict.get("tickers") or []
+        return ",".join(str(t) for t in tickers) or "UNKNOWN"
+    
     def __call__(self, input_data: Union[Dict[str, Any], BaseModel], state: StockAgentState) -> Dict[str, Any]:
         """
-        Make the agent callable. Validates input, runs, and validates output.
+        Make the agent callable. Validates input, checks the result cache, runs, and caches output.
         """
         # Validate input (Returns the Pydantic Object)
         validated_input = self.validate_input(input_data)
+        input_dict = validated_input.model_dump()
+        
+        cache = get_result_cache() if self.cache_ttl > 0 else None
+        cache_key = None
+        if cache is not None:
+            cache_key = cache.make_key(self.name, self._cache_ticker(input_dict), input_dict)
+            cached = cache.get(cache_key)
+            if cached is not None:
+                return cached
+        
+        # Don't start work for a job that was cancelled while this node was queued
+        raise_if_cancelled(self.name)
         
         # Run the agent with validated input as dict (allows ["key"] and .get() access)
-        result = self.run(validated_input.model_dump(), state)
+        result = self.run(input_dict, state)
+        
+        # Only cache clean results; failures and fallbacks should be retried on the next request
+        if cache is not None and is_cacheable(result):
+            cache.set(cache_key, result, self.cache_ttl)
         
         return result
\ No newline at end of file
@@ -2,6 +2,10 @@
 Explainability Agent - Aggregates all agent outputs into a final response 
 using an LLM for synthesis and leveraging specific tools like portfolio access.
 Outputs strictly in a flat JSON format for Frontend/Consumer consumption.
+
+With `no_llm_flag` set, the report is rendered from the agent outputs by a
+template (accessories.report_renderer) and no LLM is called; `anarrate()` can
+add an LLM-written narrative to such a report afterwards.
 """
 import os
 import sys
@@ -13,6 +17,7 @@ from datetime import datetime, timezone
 from pathlib import Path
 from dotenv import load_dotenv
 import copy
+import asyncio
 
 #   Tunable Parameters  
 MODEL_NAME = "gpt-4o-mini"
@@ -44,8 +49,11 @@ try:
     from state import StockAgentState
     from langchain_core.messages import SystemMessage, HumanMessage, ToolMessage, BaseMessage
     from langchain_openai import ChatOpenAI
-    from agents.stocks_tools.portfolio_tool import get_portfolio_tool
+    from agents.stocks_tools.portfolio_tool import get_portfolio_tool, fetch_holdings
+    from agents.accessories.report_renderer import render_report
     from agents.stocks_tools.data_aggregator_tool import aggregate_stock_data
+    from services.cancellation import raise_if_cancelled
+    from services.llm_gateway import get_llm_gateway, langchain_payload, encode_ai_message, decode_ai_message
 except ImportError as e:
     logger.critical(f"Failed to import required modules: {e}")
     sys.exit(1)
@@ -86,21 +94,58 @@ class ExplainabilityAgent:
     description = "Aggregates agent outputs and generates final explainable JSON response"
     
     def __init__(self):
+        # We bind tools so the LLM can query portfolio data during synthesis
+        self.tools = [get_portfolio_tool]
+        # LLM clients are created on first LLM synthesis (never in no-LLM mode)
+        self._llm = None
+        self._llm_with_tools = None
+
+    @property
+    def llm(self):
+        if self._llm is None:
+            try:
+                # FIX: Removed `model_kwargs={"response_format": {"type": "json_object"}}` 
+                # to avoid "ValueError: tool is not strict" when binding standard tools.
+                # We will enforce JSON via prompt engineering and parsing instead.
+                self._llm = ChatOpenAI(
+                    model=MODEL_NAME, 
+                    temperature=TEMPERATURE
+                )
+            except Exception as e:
+                logger.critical(f"Failed to initialize ChatOpenAI: {e}")
+                raise e
+        return self._llm
+
+    @property
+    def llm_with_tools(self):
+        if self._llm_with_tools is None:
+            self._llm_with_tools = self.llm.bind_tools(self.tools)
+        return self._llm_with_tools
+
+    def _invoke_with_tools(self, messages: List[BaseMessage]):
+        """One tool-enabled synthesis turn through the shared LLM gateway."""
+        # Copy: the tool loop keeps appending to `messages`
+        messages = list(messages)
+        return get_llm_gateway().call(
+            model=MODEL_NAME,
+            payload=langchain_payload(messages, temperature=TEMPERATURE, tools=[t.name for t in self.tools]),
+            fn=lambda: self.llm_with_tools.invoke(messages),
+            caller=self.name,
+            encode=encode_ai_message,
+            decode=decode_ai_message,
+            validate=self._is_usable_turn,
+        )
+
+    def _is_usable_turn(self, value: Dict[str, Any]) -> bool:
+        """Cache tool-call turns and final answers that parse as JSON, not malformed answers."""
+        message = decode_ai_message(value)
+        if getattr(message, "tool_calls", None):
+            return True
         try:
-            # FIX: Removed `model_kwargs={"response_format": {"type": "json_object"}}` 
-            # to avoid "ValueError: tool is not strict" when binding standard tools.
-            # We will enforce JSON via prompt engineering and parsing instead.
-            self.llm = ChatOpenAI(
-                model=MODEL_NAME, 
-                temperature=TEMPERATURE
-            )
-            
-            # We bind tools so the LLM can query portfolio data during synthesis
-            self.tools = [get_portfolio_tool] 
-            self.llm_with_tools = self.llm.bind_tools(self.tools)
-        except Exception as e:
-            logger.critical(f"Failed to initialize ChatOpenAI: {e}")
-            raise e
+            json.loads(self._clean_json_string(message.content))
+            return True
+        except (json.JSONDecodeError, TypeError):
+            return False
 
     def _get_current_utc_time(self) -> str:
         """Helper to get timezone-aware UTC timestamp."""
@@ -146,11 +191,16 @@ class ExplainabilityAgent:
         montecarlo_output = state.get("montecarlo_output") or {}
         if montecarlo_output: agents_invoked.append("montecarlo_agent")
 
+        # 3. Agents that missed their deadline (outputs hold a "timed_out" marker)
+        late_agents = list(dict.fromkeys(state.get("late_agents") or []))
+
         return {
             "meta": {
                 "type": "stock_analysis_report",
                 "query": state.get("query", ""),
-                "timestamp": self._get_current_utc_time()
+                "timestamp": self._get_current_utc_time(),
+                "partial": bool(late_agents),
+                "late_agents": late_agents
             },
             "tickers": tickers,
             "agents_invoked": agents_invoked,
@@ -174,6 +224,13 @@ class ExplainabilityAgent:
             "  AVAILABLE DATA  "
         ]
         
+        late_agents = copy_deterministic_data["meta"].get("late_agents") or []
+        if late_agents:
+            sections.append(
+                f"NOTE: {', '.join(late_agents)} did not finish in time and returned no data. "
+                "Base the analysis on the remaining agents and mention the missing inputs."
+            )
+        
         # Add single-ticker deep dive data
         for key in ["news_output", "twitter_output", "technical_output", "fundamental_output", "montecarlo_output"]:
             if copy_deterministic_data.get(key):
@@ -187,27 +244,22 @@ class ExplainabilityAgent:
 
         return "\n".join(sections)
 
+    def _fetch_holdings(self) -> Optional[List[Dict[str, Any]]]:
+        """User's holdings straight from MongoDB (None if unavailable)."""
+        try:
+            return fetch_holdings(USER_ID)
+        except Exception as e:
+            logger.warning(f"[{self.name}] Portfolio lookup failed: {e}")
+            return None
+
     def _prepare_fallback_response(self, deterministic_data: Dict[str, Any]) -> Dict[str, Any]:
         """
-        Constructs the final JSON manually when LLM is disabled.
+        Constructs the final JSON from a template when the LLM is disabled (or fails).
         """
-        ticker_str = ", ".join(deterministic_data["tickers"]) if deterministic_data["tickers"] else "Market"
-        invoked_str = ", ".join(deterministic_data["agents_invoked"]) if deterministic_data["agents_invoked"] else "None"
-        
-        summary = (
-            f"Automated report for {ticker_str}. "
-            f"Agents executed: {invoked_str}. "
-            "Please review the detailed agent outputs provided in this JSON response."
-        )
-
         return {
             **deterministic_data,
-            "portfolio_context": {
-                "is_holding": False,
-                "note": "Portfolio check disabled (No-LLM mode).",
-                "suggested_action": "CHECK MANUALLY"
-            },
-            "summary": summary
+            **render_report(deterministic_data, holdings=self._fetch_holdings()),
+            "narration": "template"
         }
 
     def run(self, state: StockAgentState) -> Dict[str, Any]:
@@ -219,10 +271,18 @@ class ExplainabilityAgent:
         4. Merge and return.
         """
         logger.info(f"[{self.name}] Running synthesis step...")
+        raise_if_cancelled(self.name)
 
         #   1. Gather Deterministic Data  
         final_json = self._get_deterministic_data(state)
         
+        #   No-LLM fast path: template report, no synthesis round-trip  
+        if state.get("no_llm_flag"):
+            logger.info(f"[{self.name}] no_llm_flag set, rendering template report")
+            return {
+                "final_response": self._prepare_fallback_response(final_json)
+            }
+        
         #   2. Check Logic Path (Single vs Multi)  
         ticker_count = len(final_json["tickers"])
         is_single_ticker = (ticker_count == 1)
@@ -274,11 +334,12 @@ class ExplainabilityAgent:
                 HumanMessage(content=context_str + "\n\nProvide the required JSON output.")
             ]
             
-            response = self.llm_with_tools.invoke(messages)
+            response = self._invoke_with_tools(messages)
             
             #   Tool Execution Loop  
             iteration = 0
             while response.tool_calls and iteration < MAX_TOOL_ITERATIONS:
+                raise_if_cancelled(self.name)
                 logger.info(f"[{self.name}] Tool call(s) requested: {len(response.tool_calls)}")
                 messages.append(response)
                 tool_messages = []
@@ -302,7 +363,7 @@ class ExplainabilityAgent:
                         tool_messages.append(ToolMessage(content=f"Tool Error: {e}", tool_call_id=tool_call_id))
                 
                 messages.extend(tool_messages)
-                response = self.llm_with_tools.invoke(messages)
+                response = self._invoke_with_tools(messages)
                 iteration += 1
 
             #   Parse LLM JSON  
@@ -323,6 +384,7 @@ class ExplainabilityAgent:
             #   5. Merge & Return  
             # Update the deterministic dict with the LLM's synthesis
             final_json.update(llm_output)
+            final_json["narration"] = "llm"
             
             return {
                 "final_response": final_json
@@ -330,12 +392,46 @@ class ExplainabilityAgent:
 
         except Exception as e:
             logger.error(f"Error during LLM synthesis: {e}", exc_info=True)
-            # Return what we have, plus error info
-            final_json["summary"] = f"Critical Error during synthesis: {str(e)}"
+            # Fall back to the template report, plus error info
+            report = self._prepare_fallback_response(final_json)
+            report["synthesis_error"] = str(e)
             return {
-                "final_response": final_json
+                "final_response": report
             }
 
+    async def anarrate(self, report: Dict[str, Any]) -> str:
+        """
+        Optional enrichment for a template report: an LLM-written narrative summary.
+        Runs after the report has been returned, so it never delays the response.
+
+        Args:
+            report: final_response produced in no-LLM mode
+
+        Returns:
+            Narrative paragraph
+        """
+        context_str = self._prepare_context_for_llm(report)
+        messages = [
+            SystemMessage(content=(
+                "You are the **Senior Chief Investment Strategist**. Rewrite the automated "
+                "report below as one concise, professional paragraph that interprets the "
+                "signals and risks. Keep the suggested action unchanged. Return plain text only."
+            )),
+            HumanMessage(content=(
+                f"{context_str}\n\nAUTOMATED SUMMARY: {report.get('summary', '')}\n"
+                f"PORTFOLIO CONTEXT: {json.dumps(report.get('portfolio_context', {}), default=str)}"
+            ))
+        ]
+        content = await asyncio.to_thread(
+            get_llm_gateway().call,
+            model=MODEL_NAME,
+            payload=langchain_payload(messages, temperature=TEMPERATURE),
+            fn=lambda: self.llm.invoke(messages),
+            caller=f"{self.name}.narration",
+            encode=lambda response: response.content,
+        )
+        return content.strip()
+
 if __name__ == "__main__":
     # Mocking State for testing
     mock_state = {
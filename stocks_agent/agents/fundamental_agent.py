@@ -61,9 +61,11 @@ class FundamentalAgent(BaseAgent):
             for t in tickers:
                 analyses[t] = f"Error: DCF pipeline execution failed for {t}: {message}"
 
+        # Tickers without an analysis carry an error string; tag the result so it isn't cached
+        complete = status in ("success", "partial_success") and all(base_analyses.get(t) for t in tickers)
         raw = {
             "fundamental_output": analyses,
-            "agent_contributions": [self.name],
+            "agent_contributions": [self.name if complete else f"{self.name} (Failed)"],
         }
 
         validated = FundamentalOutput(**raw)
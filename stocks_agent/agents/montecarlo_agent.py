@@ -2,7 +2,9 @@
 Montecarlo Agent - Runs Monte Carlo simulations for stock price prediction.
 
 Supports one mode:
-- real: Uses Zerodha API + Pathway pipeline for actual simulations
+- real: Uses Zerodha bars (via the local bar store) for actual simulations.
+  Log returns are computed in memory, or taken from the rolling window published
+  by the live return service when it is fresh.
 """
 
 import sys
@@ -23,8 +25,10 @@ from schemas.outputs import MontecarloOutput
 from state import StockAgentState as AgentState
 from pathlib import Path
 from services.zerodha_service import ZerodhaDataManager
-from services.pw_logret_service_mc import PathwayLogReturnService
+from services.live_returns import get_live_return_table
 from agents.accessories.montecarlo import MonteCarloSimulator
+from services.cancellation import raise_if_cancelled
+import config
 
 
 logger = logging.getLogger(__name__)
@@ -63,13 +67,13 @@ class MontecarloAgent(BaseAgent):
     
     def _run_real_simulation(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
         """
-        Run actual Monte Carlo simulation using Zerodha data and Pathway pipeline.
+        Run actual Monte Carlo simulation using Zerodha data.
         
         Flow:
-        1. Download historical data from Zerodha
-        2. Compute log returns using Pathway (or fallback)
-        3. Run Monte Carlo bootstrap simulation
-        4. Return statistical results
+        1. Use the rolling returns published by the live return service if fresh,
+           otherwise load 5-minute bars from the bar store (only missing ranges hit Kite)
+        2. Run Monte Carlo bootstrap on their log returns, in memory
+        3. Return statistical results
         """
         ticker = input_data["ticker"]
         days_history = input_data.get("days_history", 100)
@@ -82,48 +86,62 @@ class MontecarloAgent(BaseAgent):
         
         try:
             
-            # Get data directory path
-            data_dir = Path(__file__).parent.parent.parent / "data"
-            universe_path = str(data_dir / "UNIVERSE.json")
-            instruments_path = str(data_dir / "Zerodha_Intrument_Tokens.csv")
-            
-            # Step 1: Download historical data
-            logger.info("Step 1: Downloading historical data from Zerodha...")
-            zerodha = ZerodhaDataManager(
-                universe_path=universe_path,
-                instruments_path=instruments_path
-            )
-            
             today = datetime.date.today()
             start_date = today - datetime.timedelta(days=days_history)
             
-            historical_csv = zerodha.download_historical_csv(
-                ticker=ticker,
-                start_date=start_date,
-                end_date=today,
-                interval="5minute"
-            )
-            
-            if not historical_csv:
-                raise ValueError(f"Failed to download data for ticker: {ticker}")
-            
-            logger.info(f"Historical data saved to: {historical_csv}")
-            
-            # Step 2: Compute log returns
-            logger.info("Step 2: Computing log returns...")
-            pathway_service = PathwayLogReturnService()
-            log_returns_csv = pathway_service.compute_log_returns(historical_csv)
-            
-            logger.info(f"Log returns saved to: {log_returns_csv}")
-            
-            # Step 3: Run Monte Carlo simulation
-            logger.info("Step 3: Running Monte Carlo simulation...")
+            mc_config = config.get_config().montecarlo
             simulator = MonteCarloSimulator(
                 num_simulations=num_simulations,
-                simulation_days=simulation_days
+                simulation_days=simulation_days,
+                seed=mc_config.seed,
+                workers=mc_config.workers,
+                backend=mc_config.backend,
+                sampling=mc_config.sampling,
+                tolerance=mc_config.tolerance,
+                model=mc_config.model
             )
             
-            results = simulator.evaluate(log_returns_csv)
+            # Step 1: Load historical returns
+            logger.info("Step 1: Loading historical data...")
+            live_table = get_live_return_table()
+            published = live_table.read(
+                ticker,
+                start=start_date,
+                max_age_seconds=config.get_config().live_returns.max_age_seconds
+            ) if live_table else None
+            
+            if published is not None:
+                log_returns, window = published
+                logger.info(f"Using {len(log_returns)} live returns for {ticker} (as of {window['last_date']})")
+                
+                raise_if_cancelled(self.name)
+                
+                logger.info("Step 2: Running Monte Carlo simulation...")
+                results = simulator.evaluate_from_returns(log_returns, window["last_close"], ticker=ticker)
+            else:
+                # Get data directory path
+                data_dir = Path(__file__).parent.parent.parent / "data"
+                universe_path = str(data_dir / "UNIVERSE.json")
+                instruments_path = str(data_dir / "Zerodha_Intrument_Tokens.csv")
+                
+                zerodha = ZerodhaDataManager(
+                    universe_path=universe_path,
+                    instruments_path=instruments_path
+                )
+                
+                bars = zerodha.get_bars(ticker, start_date, today, interval="5minute")
+                prices = bars["close"].dropna().to_numpy(dtype="float64") if not bars.empty else []
+                
+                if len(prices) < 3:
+                    raise ValueError(f"Failed to download data for ticker: {ticker}")
+                
+                logger.info(f"Loaded {len(prices)} bars for {ticker}")
+                
+                raise_if_cancelled(self.name)
+                
+                # Step 2: Run Monte Carlo simulation
+                logger.info("Step 2: Running Monte Carlo simulation...")
+                results = simulator.evaluate_from_prices(prices, ticker=ticker)
             
             # Add metadata
             results["ticker"] = ticker
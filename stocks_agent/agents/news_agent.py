@@ -16,6 +16,7 @@ from agents.base import BaseAgent
 from schemas.inputs import NewsInput
 from schemas.outputs import NewsOutput
 from state import StockAgentState
+from services.llm_gateway import get_llm_gateway
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 
@@ -282,22 +283,29 @@ class NewsAgent(BaseAgent):
             f"News Articles:\n{articles_text}"
         )
 
+        messages = [
+            {
+                "role": "system",
+                "content": "You are a financial news sentiment analyst. Respond with only one word."
+            },
+            {
+                "role": "user",
+                "content": prompt
+            }
+        ]
         try:
-            response = self.client.chat.completions.create(
+            content = get_llm_gateway().call(
                 model="gpt-4o-mini",
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "You are a financial news sentiment analyst. Respond with only one word."
-                    },
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ],
-                temperature=0
+                payload={"messages": messages, "temperature": 0},
+                fn=lambda: self.client.chat.completions.create(
+                    model="gpt-4o-mini",
+                    messages=messages,
+                    temperature=0
+                ),
+                caller=self.name,
+                encode=lambda response: response.choices[0].message.content,
             )
-            sentiment_raw = response.choices[0].message.content.strip().lower()
+            sentiment_raw = content.strip().lower()
             
             if "bullish" in sentiment_raw:
                 return "bullish"
@@ -349,7 +357,9 @@ class NewsAgent(BaseAgent):
                 continue
         
         # If still no articles, create mock data
+        contribution = self.name
         if not news_items:
+            contribution = f"{self.name} (Fallback)"
             logger.warning(f"No news found for {ticker}, using mock data")
             news_items = [
                 {
@@ -378,7 +388,7 @@ class NewsAgent(BaseAgent):
         
         return {
             "news_output": output.model_dump(),
-            "agent_contributions": [self.name]
+            "agent_contributions": [contribution]
         }
 
     def __del__(self):
@@ -1,19 +1,32 @@
 import os
 import requests
+import threading
 from typing import List, Dict, Optional
-import spacy
 import logging
 from dotenv import load_dotenv
 load_dotenv()
 
-# Load the model ONCE at the top level
-try:
-    nlp = spacy.load("en_core_web_sm")
-except OSError:
-    logging.warning("Spacy model 'en_core_web_sm' not found. Downloading it now...")
-    from spacy.cli import download
-    download("en_core_web_sm")
-    nlp = spacy.load("en_core_web_sm")
+# spaCy and its model are loaded ONCE, on first keyword extraction (not at import)
+_nlp = None
+_nlp_lock = threading.Lock()
+
+
+def get_nlp():
+    """Load the spaCy pipeline on first use (downloads the model if missing)."""
+    global _nlp
+    if _nlp is None:
+        with _nlp_lock:
+            if _nlp is None:
+                import spacy
+                try:
+                    _nlp = spacy.load("en_core_web_sm")
+                except OSError:
+                    logging.warning("Spacy model 'en_core_web_sm' not found. Downloading it now...")
+                    from spacy.cli import download
+                    download("en_core_web_sm")
+                    _nlp = spacy.load("en_core_web_sm")
+    return _nlp
+
 
 def extract_keywords(text: str) -> str:
     """
@@ -25,7 +38,7 @@ def extract_keywords(text: str) -> str:
     3. Filter out Pronouns (e.g., "me", "I") as they rarely help search.
     4. Keep Nouns, Proper Nouns, Adjectives, and Verbs.
     """
-    doc = nlp(text)
+    doc = get_nlp()(text)
     
     keywords = []
     
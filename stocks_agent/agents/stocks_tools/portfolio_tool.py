@@ -136,6 +136,19 @@ def fetch_portfolio_data(user_id: Optional[str] = None) -> str:
 
     return "\n".join(output)
 
+def fetch_holdings(user_id: str) -> List[dict]:
+    """
+    Return the raw holdings across all of a user's portfolios (for LLM-free reports).
+
+    Raises:
+        Exception: If the database is unreachable
+    """
+    db = get_database()
+    holdings: List[dict] = []
+    for pf in db.portfolios.find({"user_id": user_id}, {"holdings": 1}):
+        holdings.extend(pf.get("holdings", []))
+    return holdings
+
 @tool
 def get_portfolio_tool(user_id: Optional[str] = None) -> str:
     """
@@ -30,6 +30,7 @@ from schemas.outputs import TechnicalOutput
 from state import StockAgentState
 from agents.accessories.technical import TechnicalIndicators
 from services.zerodha_service import ZerodhaDataManager
+from services.bar_store import read_bars
 
 
 logger = logging.getLogger(__name__)
@@ -70,7 +71,7 @@ class TechnicalAgent(BaseAgent):
             
             logger.info(f"Downloading data for {ticker} | Interval: {interval} | {start_date} to {end_date}")
             
-            csv_path = dm.download_historical_csv(
+            bars_path = dm.download_historical(
                 ticker=ticker,
                 start_date=start_date,
                 end_date=end_date,
@@ -78,22 +79,22 @@ class TechnicalAgent(BaseAgent):
                 output_dir=str(self.historical_dir)
             )
             
-            if not csv_path:
+            if not bars_path:
                 raise ValueError(f"Failed to download data for {ticker}")
             
-            logger.info(f"Data downloaded: {csv_path}")
-            return csv_path
+            logger.info(f"Data downloaded: {bars_path}")
+            return bars_path
         
         except Exception as e:
             logger.error(f"Error collecting stock data: {e}")
             raise
     
-    def _calculate_and_save_indicators(self, csv_path: str, ticker: str) -> pd.DataFrame:
+    def _calculate_and_save_indicators(self, bars_path: str, ticker: str) -> pd.DataFrame:
         """Calculate indicators and save to CSV."""
-        df = pd.read_csv(csv_path)
+        df = read_bars(bars_path)
         
         if df.empty:
-            raise ValueError(f"Downloaded CSV for {ticker} is empty.")
+            raise ValueError(f"Downloaded bars for {ticker} are empty.")
 
 
         # Calculate all indicators using core module
@@ -208,10 +209,10 @@ class TechnicalAgent(BaseAgent):
         
         try:
             # STEP 1: Collect Data
-            csv_path = self._collect_stock_data(ticker, start_date, end_date, interval)
+            bars_path = self._collect_stock_data(ticker, start_date, end_date, interval)
             
             # STEP 2: Calculate Indicators
-            df = self._calculate_and_save_indicators(csv_path, ticker)
+            df = self._calculate_and_save_indicators(bars_path, ticker)
             data_source = "calculated_live"
             
             # STEP 3: Determine Signal
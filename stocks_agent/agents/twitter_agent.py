@@ -85,8 +85,11 @@ class TwitterAgent(BaseAgent):
                 "source": "live_api"
             }
             
-            # Cache in database
-            self.db.save_analysis(analysis_doc)
+            # Failed analyses are returned (tagged) but not saved as the latest sentiment
+            if sentiment_result.get("error"):
+                analysis_doc["error"] = sentiment_result["error"]
+            else:
+                self.db.save_analysis(analysis_doc)
             
             return analysis_doc
         
@@ -121,11 +124,14 @@ class TwitterAgent(BaseAgent):
         logger.info(f"TwitterAgent: Processing {ticker} (Last {hours_delta}h)")
         
         result_doc = None
+        contribution = self.name
         
         # 1. Try Fresh Data
         if self.api_service.is_configured:
             company_name = state.get("parsed_intent", {}).get("company_names", [None])[0]
             result_doc = self._fetch_and_analyze(ticker, hours_delta, company_name=company_name)
+            if result_doc and result_doc.get("error"):
+                contribution = f"{self.name} (Failed)"
         else:
             logger.info("Twitter API not configured, skipping live fetch")
         
@@ -143,6 +149,7 @@ class TwitterAgent(BaseAgent):
         # 3. Total Failure Fallback - Mock response
         if not result_doc:
             logger.info("Using mock Twitter sentiment data")
+            contribution = f"{self.name} (Fallback)"
             result_doc = {
                 "sentiment_score": 0.5,  # Slightly positive default
                 "summary": (
@@ -160,7 +167,7 @@ class TwitterAgent(BaseAgent):
         
         return {
             "twitter_output": output.model_dump(),
-            "agent_contributions": [self.name]
+            "agent_contributions": [contribution]
         }
 
 
@@ -0,0 +1,538 @@
+"""
+ASGI (FastAPI) server for the StocksAgent system.
+
+Async counterpart of server.py: queries go through a bounded job queue served by
+a fixed pool of async workers running `graph.astream`, identical concurrent
+queries share one graph run, and /status reports queue depth and per-agent latency.
+
+Long analyses can run as background jobs: `POST /query` with `"wait": false`
+returns a job id immediately, `GET /jobs/{id}` returns per-agent outputs as they
+complete, and `DELETE /jobs/{id}` cancels the run (including in-flight agents) once no
+other identical request is attached to it.
+
+Run:
+    uvicorn stocks_agent.asgi_server:app --host 0.0.0.0 --port 3000
+"""
+
+import os
+import sys
+import json
+import time
+import threading
+import uuid
+import asyncio
+import logging
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, Any, List, Optional
+
+from dotenv import load_dotenv
+load_dotenv()
+# Add parent directory to path for module imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+import config
+from stocks_agent.graph import get_compiled_graph, get_agent
+from stocks_agent.state import build_initial_state, extract_ticker
+# Same module path the agents import, so they see the cancel event bound here
+from services.cancellation import bind_cancel_event, reset_cancel_event, JobCancelled
+from services.llm_gateway import get_llm_gateway
+
+try:
+    import redis
+    REDIS_AVAILABLE = True
+except ImportError:
+    redis = None
+    REDIS_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# ============================================================
+# CONCURRENCY CONFIGURATION
+# ============================================================
+# Async workers pulling from the job queue (max graph runs in flight)
+WORKER_COUNT = int(os.getenv("STOCKSAGENT_WORKERS", "8"))
+# Pending jobs beyond this are rejected with 429
+QUEUE_MAXSIZE = int(os.getenv("STOCKSAGENT_QUEUE_MAXSIZE", "100"))
+# Threads for synchronous agent nodes (each graph run fans out to up to 5 agents)
+THREAD_POOL_SIZE = int(os.getenv("STOCKSAGENT_THREADS", str(WORKER_COUNT * 5)))
+# Samples kept per node for latency stats
+LATENCY_WINDOW = 200
+# Finished jobs stay queryable via /jobs/{id} for this long
+JOB_RETENTION_SECONDS = int(os.getenv("STOCKSAGENT_JOB_RETENTION", "3600"))
+JOB_KEY_PREFIX = "stocksagent:job"
+# Add an LLM-written narrative to template reports after the job completes
+LLM_NARRATION = os.getenv("STOCKSAGENT_LLM_NARRATION", "false").lower() == "true"
+# ============================================================
+
+AVAILABLE_AGENTS = [
+    "news_agent",
+    "twitter_agent",
+    "montecarlo_agent",
+    "technical_agent",
+    "fundamental_agent",
+]
+
+
+class QueryRequest(BaseModel):
+    query: str
+    # False: return a job id immediately and poll GET /jobs/{id}
+    wait: bool = True
+
+
+@dataclass
+class QueryJob:
+    """One graph run, possibly shared by several identical concurrent requests."""
+    job_id: str
+    query: str
+    future: asyncio.Future
+    status: str = "queued"  # queued | running | completed | failed | cancelled
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    outputs: Dict[str, Any] = field(default_factory=dict)
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    cancel_event: threading.Event = field(default_factory=threading.Event)
+    task: Optional[asyncio.Task] = None
+    # Requests attached to this run (dedup); cancel() only stops it when the last one detaches
+    submitters: int = 1
+
+    @property
+    def is_finished(self) -> bool:
+        return self.status in ("completed", "failed", "cancelled")
+
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON-safe snapshot for GET /jobs/{id} and persistence."""
+        doc = {
+            "job_id": self.job_id,
+            "query": self.query,
+            "status": self.status,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "outputs": self.outputs,
+            "result": self.result,
+            "error": self.error,
+            "submitters": self.submitters,
+        }
+        return json.loads(json.dumps(doc, default=_json_default))
+
+
+def _json_default(obj):
+    """JSON fallback for Pydantic models and datetimes in graph state."""
+    if isinstance(obj, BaseModel):
+        return obj.model_dump()
+    return str(obj)
+
+
+class QueryService:
+    """
+    Bounded queue + worker pool around the compiled graph.
+
+    - submit() deduplicates identical in-flight queries onto a single job
+    - workers run graph.astream() and record per-node latency
+    - jobs (and their per-agent outputs) are kept for JOB_RETENTION_SECONDS and
+      mirrored to Redis when configured, so any replica can answer GET /jobs/{id}
+    """
+
+    def __init__(self, graph, worker_count: int = WORKER_COUNT, queue_maxsize: int = QUEUE_MAXSIZE):
+        self.graph = graph
+        self.worker_count = worker_count
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_maxsize)
+        self._inflight: Dict[str, QueryJob] = {}
+        self.jobs: Dict[str, QueryJob] = {}
+        self._background: set = set()
+        self._redis = None
+        self._workers: List[asyncio.Task] = []
+        self._latencies: Dict[str, deque] = defaultdict(lambda: deque(maxlen=LATENCY_WINDOW))
+        self.running_jobs = 0
+        self.queries_processed = 0
+        self.queries_deduplicated = 0
+        self.queries_failed = 0
+        self.queries_cancelled = 0
+
+        redis_url = config.get_config().cache.redis_url
+        if redis_url and REDIS_AVAILABLE:
+            try:
+                client = redis.Redis.from_url(redis_url, socket_timeout=1, socket_connect_timeout=1)
+                client.ping()
+                self._redis = client
+            except Exception as e:
+                logger.warning(f"Redis unavailable for job persistence: {e}")
+
+    @staticmethod
+    def dedup_key(query: str) -> str:
+        return " ".join(query.lower().split())
+
+    async def start(self):
+        for i in range(self.worker_count):
+            self._workers.append(asyncio.create_task(self._worker(), name=f"query_worker_{i}"))
+        logger.info(f"QueryService started: {self.worker_count} workers, queue size {self.queue.maxsize}")
+
+    async def stop(self):
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers.clear()
+
+    def submit(self, query: str) -> QueryJob:
+        """
+        Enqueue a query, or attach to an identical one already in flight.
+
+        Raises:
+            asyncio.QueueFull: If the queue is at capacity
+        """
+        key = self.dedup_key(query)
+        existing = self._inflight.get(key)
+        if existing is not None and not existing.future.done():
+            self.queries_deduplicated += 1
+            existing.submitters += 1
+            logger.info(f"[{existing.job_id}] Deduplicated identical query ({existing.submitters} submitters)")
+            return existing
+
+        job = QueryJob(
+            job_id=str(uuid.uuid4())[:8],
+            query=query,
+            future=asyncio.get_running_loop().create_future()
+        )
+        self.queue.put_nowait(job)
+        self._inflight[key] = job
+        self.jobs[job.job_id] = job
+        self._persist(job)
+        self._prune()
+        return job
+
+    def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Snapshot of a local job, else of one persisted by another replica."""
+        job = self.jobs.get(job_id)
+        if job is not None:
+            return job.to_dict()
+        if self._redis is not None:
+            try:
+                raw = self._redis.get(f"{JOB_KEY_PREFIX}:{job_id}")
+                if raw is not None:
+                    return json.loads(raw)
+            except Exception as e:
+                logger.warning(f"Redis job lookup failed: {e}")
+        return None
+
+    def cancel(self, job_id: str) -> Optional[QueryJob]:
+        """
+        Cancel a local job. A run shared by several identical requests only drops
+        one submitter per call and keeps running for the others. Once the last one
+        detaches, queued jobs are skipped by the workers; running jobs have their
+        graph task cancelled and their cancel event set, which agents check between
+        steps (services.cancellation).
+        """
+        job = self.jobs.get(job_id)
+        if job is None or job.is_finished:
+            return job
+
+        if job.submitters > 1:
+            job.submitters -= 1
+            logger.info(f"[{job.job_id}] Submitter detached, {job.submitters} still attached")
+            self._persist(job)
+            return job
+
+        job.cancel_event.set()
+        if job.task is not None:
+            job.task.cancel()
+        else:
+            self._finish_cancelled(job)
+        return job
+
+    def _finish_cancelled(self, job: QueryJob):
+        job.status = "cancelled"
+        job.error = "Cancelled by client"
+        job.finished_at = time.time()
+        self.queries_cancelled += 1
+        if not job.future.done():
+            job.future.set_exception(JobCancelled(job.error))
+            # Retrieved here so an unobserved cancellation doesn't log a warning
+            job.future.exception()
+        self._persist(job)
+
+    def _persist(self, job: QueryJob):
+        if self._redis is None:
+            return
+        try:
+            self._redis.setex(
+                f"{JOB_KEY_PREFIX}:{job.job_id}",
+                JOB_RETENTION_SECONDS,
+                json.dumps(job.to_dict())
+            )
+        except Exception as e:
+            logger.warning(f"[{job.job_id}] Failed to persist job: {e}")
+
+    def _prune(self):
+        cutoff = time.time() - JOB_RETENTION_SECONDS
+        expired = [
+            job_id for job_id, job in self.jobs.items()
+            if job.is_finished and job.finished_at and job.finished_at < cutoff
+        ]
+        for job_id in expired:
+            del self.jobs[job_id]
+
+    async def _worker(self):
+        while True:
+            job = await self.queue.get()
+            try:
+                if job.status == "queued":
+                    job.task = asyncio.create_task(self._run_job(job), name=f"job_{job.job_id}")
+                    # wait() rather than await: a cancelled job must not cancel the worker
+                    await asyncio.wait({job.task})
+            finally:
+                self.queue.task_done()
+                key = self.dedup_key(job.query)
+                if self._inflight.get(key) is job:
+                    del self._inflight[key]
+
+    async def _run_job(self, job: QueryJob):
+        job.status = "running"
+        job.started_at = time.time()
+        self.running_jobs += 1
+        self._persist(job)
+
+        # Copied into the executor threads that run the sync agent nodes
+        cancel_token = bind_cancel_event(job.cancel_event)
+        final_state: Dict[str, Any] = {}
+        stage_start = time.perf_counter()
+        try:
+            async for mode, chunk in self.graph.astream(
+                build_initial_state(job.query), stream_mode=["updates", "values"]
+            ):
+                if mode == "values":
+                    final_state = chunk
+                    continue
+                now = time.perf_counter()
+                for node, update in (chunk or {}).items():
+                    # Agents are timed from fan-out (end of the previous stage)
+                    self._latencies[node].append(now - stage_start)
+                    if node == "orchestrator":
+                        parsed_intent = (update or {}).get("parsed_intent", {})
+                        job.outputs[node] = {
+                            "decision": parsed_intent.get("decision", {}),
+                            "tickers": parsed_intent.get("tickers", []),
+                        }
+                        stage_start = now
+                    else:
+                        job.outputs[node] = update
+                # Intermediate outputs are visible to pollers as each agent finishes
+                self._persist(job)
+
+            result = {
+                "response": final_state.get("final_response", "No response generated."),
+                "ticker": extract_ticker(final_state.get("parsed_intent", {})),
+                "agents_used": final_state.get("agent_contributions", []),
+            }
+            job.result = result
+            job.status = "completed"
+            self.queries_processed += 1
+            if not job.future.done():
+                job.future.set_result(result)
+            response = result["response"]
+            if LLM_NARRATION and isinstance(response, dict) and response.get("narration") == "template":
+                task = asyncio.create_task(self._narrate(job), name=f"narrate_{job.job_id}")
+                self._background.add(task)
+                task.add_done_callback(self._background.discard)
+        except (asyncio.CancelledError, JobCancelled):
+            logger.info(f"[{job.job_id}] Job cancelled")
+            self._finish_cancelled(job)
+        except Exception as e:
+            logger.error(f"[{job.job_id}] Graph run failed: {e}", exc_info=True)
+            job.status = "failed"
+            job.error = str(e)
+            self.queries_failed += 1
+            if not job.future.done():
+                job.future.set_exception(e)
+                job.future.exception()
+        finally:
+            reset_cancel_event(cancel_token)
+            job.finished_at = job.finished_at or time.time()
+            self.running_jobs -= 1
+            self._persist(job)
+
+    async def _narrate(self, job: QueryJob):
+        """Background enrichment: LLM narrative for a template report, visible via GET /jobs/{id}."""
+        job.result["narrative_status"] = "pending"
+        try:
+            job.result["narrative"] = await get_agent("explainability").anarrate(job.result["response"])
+            job.result["narrative_status"] = "completed"
+        except Exception as e:
+            logger.warning(f"[{job.job_id}] Narration failed: {e}")
+            job.result["narrative_status"] = "failed"
+        self._persist(job)
+
+    def latency_stats(self) -> Dict[str, Dict[str, float]]:
+        stats = {}
+        for node, samples in self._latencies.items():
+            if not samples:
+                continue
+            ordered = sorted(samples)
+            stats[node] = {
+                "count": len(ordered),
+                "avg_seconds": round(sum(ordered) / len(ordered), 3),
+                "p95_seconds": round(ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))], 3),
+            }
+        return stats
+
+
+# Initialize FastAPI app
+app = FastAPI(title="StocksAgent")
+
+service: Optional[QueryService] = None
+start_time: Optional[datetime] = None
+
+
+@app.on_event("startup")
+async def startup_event():
+    global service, start_time
+    logger.info("Initializing agent graph...")
+    loop = asyncio.get_running_loop()
+    # Sync agent nodes run in the default executor; size it for the fan-out
+    loop.set_default_executor(ThreadPoolExecutor(max_workers=THREAD_POOL_SIZE))
+    service = QueryService(get_compiled_graph())
+    await service.start()
+    start_time = datetime.utcnow()
+    logger.info("Agent graph ready!")
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    if service is not None:
+        await service.stop()
+
+
+@app.post("/query")
+async def query_endpoint(body: QueryRequest):
+    """
+    POST /query
+
+    Request body:
+        {"query": "Analyze RELIANCE technical indicators", "wait": true}
+
+    Response (wait=true):
+        {"success": true, "response": "...", "ticker": "RELIANCE", "agents_used": [...]}
+
+    Response (wait=false, HTTP 202):
+        {"success": true, "job_id": "...", "status": "queued", "status_url": "/jobs/..."}
+    """
+    if service is None:
+        raise HTTPException(status_code=503, detail="Agent graph not initialized")
+
+    query = body.query.strip()
+    if not query:
+        raise HTTPException(status_code=400, detail="Query cannot be empty")
+
+    try:
+        job = service.submit(query)
+    except asyncio.QueueFull:
+        raise HTTPException(status_code=429, detail="Query queue is full, retry later")
+
+    if not body.wait:
+        return JSONResponse(status_code=202, content={
+            "success": True,
+            "job_id": job.job_id,
+            "status": job.status,
+            "status_url": f"/jobs/{job.job_id}",
+        })
+
+    try:
+        # shield: a disconnecting client must not cancel a run other requests share
+        result = await asyncio.shield(job.future)
+        return {"success": True, **result}
+    except (Exception, JobCancelled) as e:
+        return {"success": False, "error": str(e)}
+
+
+@app.get("/jobs/{job_id}")
+async def get_job_endpoint(job_id: str):
+    """
+    GET /jobs/{job_id}
+
+    Job status, per-agent outputs completed so far, and the final result when done.
+    """
+    if service is None:
+        raise HTTPException(status_code=503, detail="Agent graph not initialized")
+
+    job = service.get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job not found: {job_id}")
+    return job
+
+
+@app.delete("/jobs/{job_id}")
+async def cancel_job_endpoint(job_id: str):
+    """
+    DELETE /jobs/{job_id}
+
+    Cancel a queued or running job. Finished jobs are returned unchanged.
+    """
+    if service is None:
+        raise HTTPException(status_code=503, detail="Agent graph not initialized")
+
+    job = service.cancel(job_id)
+    if job is None:
+        if service.get_job(job_id) is not None:
+            raise HTTPException(status_code=409, detail="Job is owned by another server instance")
+        raise HTTPException(status_code=404, detail=f"Job not found: {job_id}")
+    return job.to_dict()
+
+
+@app.get("/health")
+async def health_endpoint():
+    return {
+        "status": "healthy" if service is not None else "unhealthy",
+        "graph_ready": service is not None
+    }
+
+
+@app.get("/status")
+async def status_endpoint():
+    """
+    GET /status
+
+    System status with queue depth and per-agent latency.
+    """
+    uptime_seconds = None
+    uptime_str = "N/A"
+
+    if start_time:
+        uptime_seconds = (datetime.utcnow() - start_time).total_seconds()
+        hours, remainder = divmod(int(uptime_seconds), 3600)
+        minutes, seconds = divmod(remainder, 60)
+        uptime_str = f"{hours}h {minutes}m {seconds}s"
+
+    return {
+        "agents": AVAILABLE_AGENTS,
+        "uptime": uptime_str,
+        "uptime_seconds": uptime_seconds,
+        "graph_ready": service is not None,
+        "start_time": start_time.isoformat() if start_time else None,
+        "queue_depth": service.queue.qsize() if service else 0,
+        "queue_capacity": service.queue.maxsize if service else 0,
+        "running_jobs": service.running_jobs if service else 0,
+        "workers": service.worker_count if service else 0,
+        "queries_processed": service.queries_processed if service else 0,
+        "queries_deduplicated": service.queries_deduplicated if service else 0,
+        "queries_failed": service.queries_failed if service else 0,
+        "queries_cancelled": service.queries_cancelled if service else 0,
+        "agent_latency": service.latency_stats() if service else {},
+        "llm": get_llm_gateway().stats(),
+    }
+
+
+if __name__ == "__main__":
+    import uvicorn
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    uvicorn.run(app, host="0.0.0.0", port=3000)
@@ -0,0 +1,98 @@
+"""
+Bar file load-time benchmark.
+
+Writes the same synthetic multi-year 5-minute history as CSV (the old
+download_historical_csv output) and as Parquet (write_bars), then times how
+long consumers take to get a typed DataFrame back.
+
+Run:
+    python stocks_agent/bar_io_benchmark.py [--years 1 3 5] [--repeat 5]
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+from pathlib import Path
+from typing import Callable
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from services.bar_store import MARKET_TZ, read_bars, write_bars
+
+BARS_PER_DAY = 75          # 09:15-15:30 in 5-minute candles
+TRADING_DAYS_PER_YEAR = 250
+
+
+def make_bars(years: int, seed: int = 7) -> pd.DataFrame:
+    """Random-walk 5-minute candles over `years` of trading days."""
+    rng = np.random.default_rng(seed)
+    days = pd.bdate_range(end=pd.Timestamp.today().normalize(), periods=years * TRADING_DAYS_PER_YEAR)
+    offsets = pd.to_timedelta(np.arange(BARS_PER_DAY) * 5 + 9 * 60 + 15, unit="min")
+    dates = (days.values[:, None] + offsets.values[None, :]).ravel()
+
+    close = 1000 * np.exp(np.cumsum(rng.normal(0, 0.001, len(dates))))
+    spread = np.abs(rng.normal(0, 0.5, len(dates)))
+    return pd.DataFrame({
+        "date": pd.DatetimeIndex(dates).tz_localize(MARKET_TZ),
+        "open": close + rng.normal(0, 0.2, len(dates)),
+        "high": close + spread,
+        "low": close - spread,
+        "close": close,
+        "volume": rng.integers(1_000, 100_000, len(dates)),
+    })
+
+
+def legacy_read(path: Path) -> pd.DataFrame:
+    """What consumers did before: read_csv, then re-parse the timestamps."""
+    df = pd.read_csv(path)
+    df["date"] = pd.to_datetime(df["date"], utc=True).dt.tz_convert(MARKET_TZ)
+    return df
+
+
+def best_of(fn: Callable[[], pd.DataFrame], repeat: int) -> float:
+    """Fastest of `repeat` runs, in milliseconds."""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - started) * 1000)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare CSV and Parquet bar load times")
+    parser.add_argument("--years", type=int, nargs="+", default=[1, 3, 5])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'years':>5} | {'rows':>9} | {'csv MB':>7} | {'pq MB':>6} | {'csv ms':>8} | "
+          f"{'pq ms':>7} | {'pq close ms':>11} | {'pq 100d ms':>10} | {'speedup':>7}")
+    print("-" * 100)
+    with tempfile.TemporaryDirectory() as tmp:
+        for years in args.years:
+            bars = make_bars(years)
+            csv_path = Path(tmp) / f"bars_{years}y.csv"
+            parquet_path = Path(tmp) / f"bars_{years}y.parquet"
+            bars.to_csv(csv_path, index=False)
+            write_bars(bars, parquet_path)
+
+            recent = bars["date"].iloc[-1] - pd.Timedelta(days=100)
+            csv_ms = best_of(lambda: legacy_read(csv_path), args.repeat)
+            parquet_ms = best_of(lambda: read_bars(parquet_path), args.repeat)
+            close_ms = best_of(lambda: read_bars(parquet_path, columns=["date", "close"]), args.repeat)
+            recent_ms = best_of(lambda: read_bars(parquet_path, start=recent), args.repeat)
+
+            print(
+                f"{years:>5} | {len(bars):>9,} | {csv_path.stat().st_size / 1e6:>7.1f} | "
+                f"{parquet_path.stat().st_size / 1e6:>6.1f} | {csv_ms:>8.1f} | {parquet_ms:>7.1f} | "
+                f"{close_ms:>11.1f} | {recent_ms:>10.1f} | {csv_ms / parquet_ms:>6.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
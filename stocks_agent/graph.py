@@ -5,23 +5,17 @@ Uses Send() mechanism for parallel agent execution.
 
 import sys
 import os
-from typing import Dict, Any, List
+import importlib
+import threading
+from typing import Dict, Any, List, Union
 from langgraph.graph import StateGraph, END, START
 from langgraph.types import Send
 import logging
 
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from state import StockAgentState
-from orchestrator import Orchestrator
-from agents.news_agent import NewsAgent
-from agents.twitter_agent import TwitterAgent
-from agents.montecarlo_agent import MontecarloAgent
-from agents.technical_agent2 import TechnicalAgent
-from agents.fundamental_agent import FundamentalAgent
-from agents.explainability_agent import ExplainabilityAgent
-from langchain_openai import ChatOpenAI
-from langchain_core.messages import SystemMessage, HumanMessage
+from state import StockAgentState, build_agent_payload
+from services.deadlines import call_with_deadline
 
 logging.basicConfig(
     level=logging.INFO,
@@ -29,32 +23,63 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-# Initialize agents
-orchestrator = Orchestrator()
-news_agent = NewsAgent()
-twitter_agent = TwitterAgent()
-montecarlo_agent = MontecarloAgent()
-technical_agent = TechnicalAgent()
-fundamental_agent = FundamentalAgent()
-explainability_agent = ExplainabilityAgent()
-
-AGENT_REGISTRY = {
-    "news_agent": news_agent,
-    "twitter_agent": twitter_agent,
-    "montecarlo_agent": montecarlo_agent,
-    "technical_agent": technical_agent,
-    "fundamental_agent": fundamental_agent,
+# Node name -> (module, class). Agents (and their LLM/Mongo/pandas/pathway/spaCy
+# dependencies) are imported and constructed on first use, not at graph import.
+AGENT_CLASSES = {
+    "orchestrator": ("orchestrator", "Orchestrator"),
+    "news_agent": ("agents.news_agent", "NewsAgent"),
+    "twitter_agent": ("agents.twitter_agent", "TwitterAgent"),
+    "montecarlo_agent": ("agents.montecarlo_agent", "MontecarloAgent"),
+    "technical_agent": ("agents.technical_agent2", "TechnicalAgent"),
+    "fundamental_agent": ("agents.fundamental_agent", "FundamentalAgent"),
+    "explainability": ("agents.explainability_agent", "ExplainabilityAgent"),
 }
 
+_agents: Dict[str, Any] = {}
+_agents_lock = threading.Lock()
+
+
+def get_agent(name: str):
+    """Return the shared instance for a node, constructing it on first use."""
+    agent = _agents.get(name)
+    if agent is not None:
+        return agent
+
+    with _agents_lock:
+        if name not in _agents:
+            module_name, class_name = AGENT_CLASSES[name]
+            agent_class = getattr(importlib.import_module(module_name), class_name)
+            _agents[name] = agent_class()
+            logger.info(f"Initialized {class_name}")
+        return _agents[name]
+
+
+def has_prebuilt_intent(state: StockAgentState) -> bool:
+    """True if the caller already supplied a routable parsed_intent (e.g. Kafka-triggered runs)."""
+    parsed_intent = state.get("parsed_intent") or {}
+    return bool(parsed_intent.get("decision")) and bool(parsed_intent.get("agent_inputs"))
+
+
+def route_from_start(state: StockAgentState) -> Union[str, List[Send]]:
+    """
+    Entry router. Structured runs with a pre-built parsed_intent skip the orchestrator
+    (no routing LLM call, no instrument-file ticker matching) and fan out directly.
+    """
+    if has_prebuilt_intent(state):
+        logger.info("Pre-built parsed_intent supplied, skipping orchestrator")
+        return route_to_agents(state)
+    return "orchestrator"
+
 
 def orchestrator_node(state: StockAgentState) -> Dict[str, Any]:
     """Parse the query and determine which agents to invoke."""
-    return orchestrator.run(state)
+    return get_agent("orchestrator").run(state)
 
 
 def route_to_agents(state: StockAgentState) -> List[Send]:
     """
     Convert orchestrator's boolean decision flags into Send() calls for parallel execution.
+    Each agent gets a minimal payload (see state.AgentPayload), not a copy of the full state.
     """
     parsed_intent = state.get("parsed_intent", {})
     
@@ -64,19 +89,19 @@ def route_to_agents(state: StockAgentState) -> List[Send]:
     sends = []
     
     if decision.get("run_news", False):
-        sends.append(Send("news_agent", {**state, "_agent_input": agent_inputs["news_agent"]}))
+        sends.append(Send("news_agent", build_agent_payload(state, agent_inputs["news_agent"])))
     
     if decision.get("run_twitter", False):
-        sends.append(Send("twitter_agent", {**state, "_agent_input": agent_inputs["twitter_agent"]}))
+        sends.append(Send("twitter_agent", build_agent_payload(state, agent_inputs["twitter_agent"])))
     
     if decision.get("run_technical", False):
-        sends.append(Send("technical_agent", {**state, "_agent_input": agent_inputs["technical_agent"]}))
+        sends.append(Send("technical_agent", build_agent_payload(state, agent_inputs["technical_agent"])))
     
     if decision.get("run_fundamental", False):
-        sends.append(Send("fundamental_agent", {**state, "_agent_input": agent_inputs["fundamental_agent"]}))
+        sends.append(Send("fundamental_agent", build_agent_payload(state, agent_inputs["fundamental_agent"])))
     
     if decision.get("run_montecarlo", False):
-        sends.append(Send("montecarlo_agent", {**state, "_agent_input": agent_inputs["montecarlo_agent"]}))
+        sends.append(Send("montecarlo_agent", build_agent_payload(state, agent_inputs["montecarlo_agent"])))
     
     if not sends:
         logger.warning("No agents invoked, going directly to explainability")
@@ -88,36 +113,36 @@ def route_to_agents(state: StockAgentState) -> List[Send]:
 def news_agent_node(state: StockAgentState) -> Dict[str, Any]:
     """Execute news agent."""
     agent_input = state.get("_agent_input", {})
-    return news_agent(agent_input, state)
+    return call_with_deadline("news_agent", state, get_agent("news_agent"), agent_input, state)
 
 
 def twitter_agent_node(state: StockAgentState) -> Dict[str, Any]:
     """Execute twitter agent."""
     agent_input = state.get("_agent_input", {})
-    return twitter_agent(agent_input, state)
+    return call_with_deadline("twitter_agent", state, get_agent("twitter_agent"), agent_input, state)
 
 
 def montecarlo_agent_node(state: StockAgentState) -> Dict[str, Any]:
     """Execute montecarlo agent."""
     agent_input = state.get("_agent_input", {})
-    return montecarlo_agent(agent_input, state)
+    return call_with_deadline("montecarlo_agent", state, get_agent("montecarlo_agent"), agent_input, state)
 
 
 def technical_agent_node(state: StockAgentState) -> Dict[str, Any]:
     """Execute technical agent."""
     agent_input = state.get("_agent_input", {})
-    return technical_agent(agent_input, state)
+    return call_with_deadline("technical_agent", state, get_agent("technical_agent"), agent_input, state)
 
 
 def fundamental_agent_node(state: StockAgentState) -> Dict[str, Any]:
     """Execute fundamental agent."""
     agent_input = state.get("_agent_input", {})
-    return fundamental_agent(agent_input, state)
+    return call_with_deadline("fundamental_agent", state, get_agent("fundamental_agent"), agent_input, state)
 
 
 def explainability_node(state: StockAgentState) -> Dict[str, Any]:
     """Aggregate all outputs and generate final response."""
-    return explainability_agent.run(state)
+    return get_agent("explainability").run(state)
 
 
 def build_graph() -> StateGraph:
@@ -125,9 +150,10 @@ def build_graph() -> StateGraph:
     Build and compile the LangGraph for the StocksAgent system.
     
     Flow:
-    1. START -> orchestrator (parse query)
+    1. START -> orchestrator (parse query), or straight to step 2 if parsed_intent is pre-built
     2. orchestrator -> Send() to multiple agents in parallel (based on decision flags)
-    3. All parallel agents auto-join -> explainability (aggregate)
+    3. All parallel agents auto-join -> explainability (aggregate); agents that miss
+       their deadline (services.deadlines) join early with a "timed_out" marker
     4. explainability -> END
     """
     graph = StateGraph(StockAgentState)
@@ -140,7 +166,12 @@ def build_graph() -> StateGraph:
     graph.add_node("fundamental_agent", fundamental_agent_node)
     graph.add_node("explainability", explainability_node)
     
-    graph.add_edge(START, "orchestrator")
+    graph.add_conditional_edges(
+        START,
+        route_from_start,
+        ["orchestrator", "news_agent", "twitter_agent", "montecarlo_agent",
+         "technical_agent", "fundamental_agent", "explainability"]
+    )
     
     graph.add_conditional_edges(
         "orchestrator",
@@ -164,9 +195,19 @@ def get_compiled_graph():
     return graph.compile()
 
 
-app = get_compiled_graph()
-logger.info("Graph compiled successfully")
+_app = None
+
+
+def __getattr__(name):
+    # `graph.app` is compiled on first access rather than at import
+    global _app
+    if name == "app":
+        if _app is None:
+            _app = get_compiled_graph()
+            logger.info("Graph compiled successfully")
+        return _app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 if __name__ == "__main__":
-    logger.info(app.get_graph().draw_mermaid())
+    logger.info(get_compiled_graph().get_graph().draw_mermaid())
@@ -0,0 +1,94 @@
+"""
+Import-time benchmark for the agent graph.
+
+Runs `python -X importtime -c "import stocks_agent.graph"` in a fresh interpreter,
+reports the total and the slowest top-level packages, and fails if a heavy
+dependency is pulled in at import time (agents load those on first use).
+
+Run:
+    python stocks_agent/import_benchmark.py [--budget-ms 1500] [--top 15]
+"""
+
+import os
+import re
+import sys
+import argparse
+import subprocess
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_TARGET = "stocks_agent.graph"
+DEFAULT_BUDGET_MS = 1500
+
+# Must not be imported just by importing the graph
+HEAVY_MODULES = ["pandas", "pathway", "transformers", "torch", "spacy", "langchain_openai", "pymongo", "kiteconnect"]
+
+# "import time:   self [us] | cumulative | imported package"
+IMPORTTIME_RE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def measure_imports(target: str = DEFAULT_TARGET) -> List[Tuple[str, int, int]]:
+    """
+    Import `target` in a fresh interpreter with -X importtime.
+
+    Returns:
+        list of (module, self_us, cumulative_us) in import order
+    """
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {target}"],
+        cwd=REPO_ROOT,
+        capture_output=True,
+        text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"Importing {target} failed:\n{proc.stderr[-2000:]}")
+
+    rows = []
+    for line in proc.stderr.splitlines():
+        match = IMPORTTIME_RE.match(line)
+        if match:
+            rows.append((match.group(4), int(match.group(1)), int(match.group(2))))
+    return rows
+
+
+def summarize(rows: List[Tuple[str, int, int]]) -> Dict[str, int]:
+    """Self time (us) grouped by top-level package."""
+    totals: Dict[str, int] = defaultdict(int)
+    for module, self_us, _ in rows:
+        totals[module.split(".")[0]] += self_us
+    return dict(totals)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure import time of the agent graph")
+    parser.add_argument("--target", default=DEFAULT_TARGET)
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS)
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    rows = measure_imports(args.target)
+    total_ms = sum(self_us for _, self_us, _ in rows) / 1000
+    imported = {module for module, _, _ in rows}
+
+    print(f"Import of {args.target}: {total_ms:.0f}ms across {len(rows)} modules\n")
+    print(f"{'package':30} {'self ms':>10}")
+    for package, self_us in sorted(summarize(rows).items(), key=lambda item: item[1], reverse=True)[:args.top]:
+        print(f"{package:30} {self_us / 1000:>10.1f}")
+
+    failures = []
+    eager = [name for name in HEAVY_MODULES if name in imported]
+    if eager:
+        failures.append(f"heavy modules imported eagerly: {', '.join(eager)}")
+    if total_ms > args.budget_ms:
+        failures.append(f"{total_ms:.0f}ms exceeds budget of {args.budget_ms:.0f}ms")
+
+    if failures:
+        print("\nFAIL: " + "; ".join(failures))
+        sys.exit(1)
+    print(f"\nOK: within {args.budget_ms:.0f}ms budget, no heavy modules imported")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Regression check for the live rolling-return windows.
+
+Seeds a RollingReturns window from bar-store style history (microsecond and
+nanosecond datetime units), re-polls bars that overlap the seeded history,
+then publishes the window and reads it back with a `start` date. Fails if
+overlapping bars are appended twice, if seeded dates are off (e.g. 1970), or
+if the published window loses the seeded history.
+
+Run:
+    python stocks_agent/live_returns_check.py
+"""
+
+import os
+import sys
+import tempfile
+from typing import List
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from services.bar_store import MARKET_TZ
+from services.live_returns import LiveReturnTable, RollingReturns
+
+
+def make_bars(count: int, unit: str) -> pd.DataFrame:
+    """`count` consecutive 5-minute candles ending at the last market close, dates in `unit`."""
+    end = pd.Timestamp.today(tz=MARKET_TZ).normalize() - pd.Timedelta(days=1) + pd.Timedelta(hours=15, minutes=25)
+    dates = pd.date_range(end=end, periods=count, freq="5min").as_unit(unit)
+    close = 1000 * np.exp(np.cumsum(np.random.default_rng(7).normal(0, 0.001, count)))
+    return pd.DataFrame({"date": dates, "close": close})
+
+
+def check_unit(unit: str) -> List[str]:
+    failures = []
+    bars = make_bars(6, unit)
+    seeded, polled = bars.iloc[:4], bars.iloc[2:]
+
+    window = RollingReturns(capacity=100)
+    window.extend(seeded["date"], seeded["close"].to_numpy())
+    if window.count != 3:
+        failures.append(f"[{unit}] seeded count {window.count}, expected 3")
+
+    # Overlapping re-poll: only the two new bars may be appended
+    for date, close in zip(polled["date"], polled["close"]):
+        window.update(date, close)
+    if window.count != 5:
+        failures.append(f"[{unit}] count after overlapping poll {window.count}, expected 5")
+
+    expected = np.diff(np.log(bars["close"].to_numpy()))
+    values = window.values()
+    if values.shape != expected.shape or not np.allclose(values, expected):
+        failures.append(f"[{unit}] returns differ from bar-to-bar log returns")
+    if not window.dates().equals(pd.DatetimeIndex(bars["date"].iloc[1:]).as_unit("ns").tz_convert(MARKET_TZ)):
+        failures.append(f"[{unit}] window dates {window.dates()[0]} .. do not match the bars")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        table = LiveReturnTable(tmp)
+        table.write("TEST", window, window_days=5)
+        published = table.read("TEST", start=bars["date"].iloc[0].date())
+        if published is None or len(published[0]) != window.count:
+            got = None if published is None else len(published[0])
+            failures.append(f"[{unit}] published window read back {got} returns, expected {window.count}")
+    return failures
+
+
+def main():
+    failures = [failure for unit in ("us", "ns") for failure in check_unit(unit)]
+    if failures:
+        print("FAIL:\n  " + "\n  ".join(failures))
+        sys.exit(1)
+    print(f"OK: live return windows consistent (pandas {pd.__version__})")
+
+
+if __name__ == "__main__":
+    main()
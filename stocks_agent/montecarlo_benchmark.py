@@ -0,0 +1,193 @@
+"""
+Monte Carlo throughput benchmark.
+
+Times MonteCarloSimulator.simulate() at 1, 2, 4 and 8 workers on synthetic
+5-minute log returns, reports paths/sec and speedup, and checks that two runs
+with the same seed and worker count give bit-identical statistics.
+
+With --variance, compares the sampling modes instead: the spread of the
+5th-percentile / probability-of-loss estimates across seeds at a fixed path
+count, and how many paths adaptive stopping needs for a given tolerance.
+
+With --models, compares the bootstrap with the EWMA and GARCH(1,1) models:
+the cold fit, a cached (unchanged returns) run, one new bar (the cached fit is
+advanced) and a week of new bars (warm refit).
+
+With --pipeline, times the Monte Carlo agent's data path end to end on
+synthetic bars: the old bar file -> PathwayLogReturnService -> evaluate()
+round-trip against the in-memory close prices -> evaluate_from_prices().
+
+Run:
+    python stocks_agent/montecarlo_benchmark.py [--paths 4000000] [--backend thread process]
+    python stocks_agent/montecarlo_benchmark.py --variance [--tolerance 0.02]
+    python stocks_agent/montecarlo_benchmark.py --models [--paths 1000000]
+    python stocks_agent/montecarlo_benchmark.py --pipeline [--paths 200000]
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from agents.accessories.montecarlo import MonteCarloSimulator, SAMPLING_MODES, SIMULATION_MODELS
+from agents.accessories.volatility import get_volatility_cache
+from bar_io_benchmark import make_bars
+from services.bar_store import write_bars
+
+SEED = 12345
+HISTORY_BARS = 100 * 75     # 100 days of 5-minute candles
+
+
+def synthetic_log_returns(n: int = HISTORY_BARS) -> np.ndarray:
+    return np.random.default_rng(SEED).standard_t(df=4, size=n) * 0.002
+
+
+def fingerprint(stats) -> tuple:
+    """Values that must match exactly between reproducible runs."""
+    pct = stats.percentiles([5, 50, 95])
+    return (stats.count, stats.mean, stats.std, stats.min, stats.max, stats.losses, pct[5], pct[50], pct[95])
+
+
+def variance_report(log_returns: np.ndarray, days: int, paths: int, replicates: int, tolerance: float):
+    """Estimator spread across seeds, and paths used by adaptive stopping, per sampling mode."""
+    print(f"{replicates} seeds x {paths:,} paths; adaptive tolerance {tolerance} pp\n")
+    print(f"{'sampling':10} | {'sd(P5)':>8} | {'sd(P(loss))':>11} | {'adaptive paths':>14} | {'seconds':>8}")
+    print("-" * 64)
+    for sampling in SAMPLING_MODES:
+        p5, p_loss = [], []
+        for replicate in range(replicates):
+            stats = MonteCarloSimulator(
+                num_simulations=paths, simulation_days=days, seed=SEED + replicate, sampling=sampling
+            ).simulate(log_returns, initial_price=100.0)
+            p5.append(stats.percentiles([5])[5])
+            p_loss.append(100 * stats.losses / stats.count)
+
+        started = time.perf_counter()
+        adaptive = MonteCarloSimulator(
+            num_simulations=20_000_000, simulation_days=days, seed=SEED, sampling=sampling, tolerance=tolerance
+        ).simulate(log_returns, initial_price=100.0)
+        elapsed = time.perf_counter() - started
+        print(
+            f"{sampling:10} | {np.std(p5, ddof=1):>8.4f} | {np.std(p_loss, ddof=1):>11.4f} | "
+            f"{adaptive.count:>14,} | {elapsed:>8.2f}"
+        )
+
+
+def model_report(log_returns: np.ndarray, days: int, paths: int):
+    """
+    Seconds per evaluation for each model: first (fit), cached, after one new bar
+    (advance) and after a week of new bars (warm refit).
+    """
+    new_bars = synthetic_log_returns(len(log_returns) + 375)[-375:]
+    one_bar = np.concatenate((log_returns[1:], new_bars[:1]))
+    one_week = np.concatenate((log_returns[375:], new_bars))
+    print(f"{paths:,} paths x {days} days on {len(log_returns):,} returns\n")
+    print(
+        f"{'model':10} | {'fit s':>7} | {'cached s':>8} | {'+1 bar s':>8} | {'+1 week s':>9} | "
+        f"{'P5':>8} | {'P(loss)':>7}"
+    )
+    print("-" * 77)
+    for model in SIMULATION_MODELS:
+        simulator = MonteCarloSimulator(num_simulations=paths, simulation_days=days, seed=SEED, model=model)
+        timings = []
+        for returns in (log_returns, log_returns, one_bar, one_week):
+            started = time.perf_counter()
+            results = simulator.evaluate_from_returns(returns, 100.0, ticker="BENCH")
+            timings.append(time.perf_counter() - started)
+        first, cached, bar, week = timings
+        print(
+            f"{model:10} | {first:>7.3f} | {cached:>8.3f} | {bar:>8.3f} | {week:>9.3f} | "
+            f"{results['5th Percentile']:>8.3f} | {results['Probability of Loss']:>7.3f}"
+        )
+    cache = get_volatility_cache()
+    print(f"\nvolatility cache: {cache.hits} hits, {cache.advances} advances, {cache.misses} misses")
+
+
+def pipeline_report(days: int, paths: int, repeat: int):
+    """Agent latency before (file + Pathway round-trip) and after (in-memory log returns)."""
+    from services.pw_logret_service_mc import PathwayLogReturnService
+
+    bars = make_bars(1)
+    bars = bars.iloc[-HISTORY_BARS:].reset_index(drop=True)
+    simulator = MonteCarloSimulator(num_simulations=paths, simulation_days=days, seed=SEED)
+
+    def round_trip(tmp: str) -> dict:
+        bars_path = Path(tmp) / "BENCH_5minute.parquet"
+        write_bars(bars, bars_path)
+        return simulator.evaluate(PathwayLogReturnService().compute_log_returns(str(bars_path)))
+
+    def in_memory(tmp: str) -> dict:
+        return simulator.evaluate_from_prices(bars["close"].to_numpy(dtype="float64"))
+
+    print(f"{len(bars):,} bars, {paths:,} paths x {days} days, best of {repeat}\n")
+    print(f"{'pipeline':10} | {'seconds':>8} | {'mean return %':>13}")
+    print("-" * 38)
+    timings = {}
+    for name, run in (("round-trip", round_trip), ("in-memory", in_memory)):
+        best, results = float("inf"), None
+        for _ in range(repeat):
+            with tempfile.TemporaryDirectory() as tmp:
+                started = time.perf_counter()
+                results = run(tmp)
+                best = min(best, time.perf_counter() - started)
+        timings[name] = best
+        print(f"{name:10} | {best:>8.3f} | {results['Mean Return']:>13.4f}")
+    print(f"\nspeedup: {timings['round-trip'] / timings['in-memory']:.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Monte Carlo paths/sec by worker count")
+    parser.add_argument("--paths", type=int, default=4_000_000)
+    parser.add_argument("--days", type=int, default=15)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--backend", nargs="+", default=["thread", "process"])
+    parser.add_argument("--variance", action="store_true", help="Compare sampling modes instead of worker counts")
+    parser.add_argument("--replicates", type=int, default=20)
+    parser.add_argument("--tolerance", type=float, default=0.02)
+    parser.add_argument("--pipeline", action="store_true", help="Time the agent's data path before/after")
+    parser.add_argument("--models", action="store_true", help="Compare bootstrap, EWMA and GARCH cost")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    if args.models:
+        model_report(synthetic_log_returns(), args.days, min(args.paths, 1_000_000))
+        return
+    if args.pipeline:
+        pipeline_report(args.days, min(args.paths, 200_000), args.repeat)
+        return
+
+    log_returns = synthetic_log_returns()
+    if args.variance:
+        variance_report(log_returns, args.days, min(args.paths, 200_000), args.replicates, args.tolerance)
+        return
+    print(f"{args.paths:,} paths x {args.days} days, {os.cpu_count()} CPUs\n")
+    print(f"{'backend':8} | {'workers':>7} | {'seconds':>8} | {'paths/sec':>12} | {'speedup':>7} | reproducible")
+    print("-" * 70)
+
+    for backend in args.backend:
+        baseline = None
+        for workers in args.workers:
+            simulator = MonteCarloSimulator(
+                num_simulations=args.paths, simulation_days=args.days,
+                seed=SEED, workers=workers, backend=backend
+            )
+            started = time.perf_counter()
+            first = simulator.simulate(log_returns, initial_price=100.0)
+            elapsed = time.perf_counter() - started
+            repeat = simulator.simulate(log_returns, initial_price=100.0)
+
+            baseline = baseline or elapsed
+            print(
+                f"{backend:8} | {workers:>7} | {elapsed:>8.2f} | {args.paths / elapsed:>12,.0f} | "
+                f"{baseline / elapsed:>6.2f}x | {fingerprint(first) == fingerprint(repeat)}"
+            )
+
+
+if __name__ == "__main__":
+    main()
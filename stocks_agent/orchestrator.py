@@ -3,20 +3,23 @@ Orchestrator - Parses user queries and determines which agents to invoke using L
 Optimized for Pathway Stock Agent Framework with Full Timestamp Precision.
 """
 
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Tuple
 import re
 import sys
 import os
 
 # Add parent directory to path for imports
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# stocks_agent/ itself, for the `services.*` path the agents share
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from langchain_openai import ChatOpenAI
 from pydantic import BaseModel, Field
 from datetime import datetime, timedelta
 from stocks_agent.state import StockAgentState
 from stocks_agent.schemas.inputs import TechnicalInput, FundamentalInput, MontecarloInput
 from stocks_agent.supporting_functions.ticker_extraction import get_bse_tickers
+from stocks_agent.supporting_functions.query_router import QueryRouter
+from services.llm_gateway import get_llm_gateway
 
 class AgentRoutingDecision(BaseModel):
     """
@@ -92,57 +95,148 @@ class AgentRoutingDecision(BaseModel):
         )
     )
 
+def kafka_routing_decision(state: StockAgentState) -> Optional[AgentRoutingDecision]:
+    """Fixed routing for Kafka-triggered runs (None for terminal/HTTP queries)."""
+    message_type = state.get("message_type", "terminal")
+
+    if message_type == "technical_kafka":
+        trigger_signal = state.get("trigger_signal", {})
+        return AgentRoutingDecision(tickers=[trigger_signal.get("ticker")], timeframe=24, run_news=True, run_twitter=True, run_technical=False, run_fundamental=False, run_montecarlo=True)
+
+    if message_type == "news_kafka":
+        news_input = state.get("news_kafka_input", {})
+        return AgentRoutingDecision(tickers=[news_input.get("ticker")], timeframe=24, run_news=False, run_twitter=False, run_technical=True, run_fundamental=False, run_montecarlo=True)
+
+    return None
+
+
+def resolve_date_range(decision: AgentRoutingDecision) -> Tuple[datetime, datetime]:
+    """Turn the decision's optional ISO dates into a concrete (start, end) range."""
+    # 1. Handle End Date (Default to Now if None)
+    if decision.end_date:
+        try:
+            # Attempt to parse full ISO format with time
+            final_end_date = datetime.fromisoformat(decision.end_date)
+            print(f"[DEBUG] Parsed end_date with time: {final_end_date}")
+        except ValueError:
+            final_end_date = datetime.now()
+    else:
+        final_end_date = datetime.now()
+
+    # 2. Handle Start Date
+    if decision.start_date:
+        try:
+            final_start_date = datetime.fromisoformat(decision.start_date)
+            print(f"[DEBUG] Parsed start_date with time: {final_start_date}")
+        except ValueError:
+            # Fallback logic
+            final_start_date = final_end_date - timedelta(days=100)
+    else:
+        # Smart defaults based on interval
+        if decision.interval == 'day':
+            final_start_date = final_end_date - timedelta(days=365)
+        elif decision.interval in ['60minute', '30minute']:
+            final_start_date = final_end_date - timedelta(days=60)
+        else:
+            # For intraday (1min - 15min), default to 5 days ago
+            final_start_date = final_end_date - timedelta(days=5)
+
+    # Safety: Ensure start is before end
+    if final_start_date >= final_end_date:
+        # If equal/inverted, fallback to 1 day gap
+        final_start_date = final_end_date - timedelta(days=1)
+
+    return final_start_date, final_end_date
+
+
+def build_parsed_intent(
+    decision: AgentRoutingDecision,
+    tickers: List[str],
+    company_names: List[str]
+) -> Dict[str, Any]:
+    """
+    Build the parsed_intent consumed by route_to_agents from a routing decision
+    and already-resolved tickers.
+    """
+    final_start_date, final_end_date = resolve_date_range(decision)
+
+    #   Ticker Count Check  
+    if len(decision.tickers) != 1:
+        print(f"[INFO] Ticker count is {len(decision.tickers)}. Disabling specialized agents.")
+        decision.run_news = False
+        decision.run_twitter = False
+        decision.run_technical = False
+        decision.run_fundamental = False
+        decision.run_montecarlo = False
+
+    target_ticker = tickers[0] if tickers else "UNKNOWN"
+
+    # Plain dicts (validated here, re-validated by each agent) keep state serialization cheap
+    agent_inputs = {
+        "news_agent": {"ticker": target_ticker},
+        "twitter_agent": {"ticker": target_ticker, "hours_delta": decision.timeframe},
+        "technical_agent": TechnicalInput(
+            ticker=target_ticker, 
+            interval=decision.interval, 
+            start_date=final_start_date.isoformat(),  
+            end_date=final_end_date.isoformat()
+        ).model_dump(),
+        "fundamental_agent": FundamentalInput(tickers=tickers).model_dump(),
+        "montecarlo_agent": MontecarloInput(ticker=target_ticker).model_dump()
+    }
+
+    return {
+        "decision": decision.dict(), 
+        "agent_inputs": agent_inputs,
+        "tickers": tickers,
+        "company_names": company_names
+    }
+
+
+def kafka_company_name(ticker: str) -> str:
+    """Company name for a trading symbol from the shared instrument index (the ticker if unknown)."""
+    try:
+        from stocks_agent.supporting_functions.instrument_index import get_instrument_index
+        row = get_instrument_index().lookup_alias(ticker)
+    except (ImportError, OSError) as e:
+        print(f"[WARN] Instrument index unavailable for {ticker}: {e}")
+        return ticker
+    return str(row["name"]) if row and row.get("name") else ticker
+
+
+def build_kafka_intent(state: StockAgentState) -> Optional[Dict[str, Any]]:
+    """
+    Pre-build parsed_intent for Kafka-triggered runs where ticker and agents are
+    already known. Skips the routing LLM and the fuzzy/Yahoo ticker matching; the
+    company name (e.g. the Twitter search term) comes from an exact instrument-index lookup.
+    """
+    decision = kafka_routing_decision(state)
+    if decision is None or not decision.tickers or not decision.tickers[0]:
+        return None
+
+    ticker = str(decision.tickers[0]).strip().upper()
+    return build_parsed_intent(decision, [ticker], [kafka_company_name(ticker)])
+
+
 class Orchestrator:
-    def __init__(self, model_name: str = "gpt-4o"):
-        self.llm = ChatOpenAI(model=model_name, temperature=0)
-        self.router_chain = self.llm.with_structured_output(AgentRoutingDecision)
+    def __init__(self, model_name: str = "gpt-4o", use_rule_router: bool = True):
+        self.model_name = model_name
+        self._router_chain = None
+        # Local regex/keyword router tried before the LLM; None disables it
+        self.rule_router = QueryRouter() if use_rule_router else None
+
+    @property
+    def router_chain(self):
+        """Structured-output routing LLM, created on first fallback from the rule router."""
+        if self._router_chain is None:
+            from langchain_openai import ChatOpenAI
+            llm = ChatOpenAI(model=self.model_name, temperature=0)
+            self._router_chain = llm.with_structured_output(AgentRoutingDecision)
+        return self._router_chain
 
     def parse_query(self, query: str, state: StockAgentState) -> Dict[str, Any]:
         """Analyzes query and builds the execution plan."""
         decision = self._get_llm_decision(query, state)
-               
-        # 1. Handle End Date (Default to Now if None)
-        if decision.end_date:
-            try:
-                # Attempt to parse full ISO format with time
-                final_end_date = datetime.fromisoformat(decision.end_date)
-                print(f"[DEBUG] Parsed end_date with time: {final_end_date}")
-            except ValueError:
-                final_end_date = datetime.now()
-        else:
-            final_end_date = datetime.now()
-
-        # 2. Handle Start Date
-        if decision.start_date:
-            try:
-                final_start_date = datetime.fromisoformat(decision.start_date)
-                print(f"[DEBUG] Parsed start_date with time: {final_start_date}")
-            except ValueError:
-                # Fallback logic
-                final_start_date = final_end_date - timedelta(days=100)
-        else:
-            # Smart defaults based on interval
-            if decision.interval == 'day':
-                final_start_date = final_end_date - timedelta(days=365)
-            elif decision.interval in ['60minute', '30minute']:
-                final_start_date = final_end_date - timedelta(days=60)
-            else:
-                # For intraday (1min - 15min), default to 5 days ago
-                final_start_date = final_end_date - timedelta(days=5)
-
-        # Safety: Ensure start is before end
-        if final_start_date >= final_end_date:
-            # If equal/inverted, fallback to 1 day gap
-            final_start_date = final_end_date - timedelta(days=1)
-
-        #   Ticker Count Check  
-        if len(decision.tickers) != 1:
-            print(f"[INFO] Ticker count is {len(decision.tickers)}. Disabling specialized agents.")
-            decision.run_news = False
-            decision.run_twitter = False
-            decision.run_technical = False
-            decision.run_fundamental = False
-            decision.run_montecarlo = False
 
         #Process tickers and company names
         extracted_entities = get_bse_tickers(decision.tickers)
@@ -152,44 +246,21 @@ class Orchestrator:
             extracted_company_names.append(result["company_name"])
             extracted_tickers.append(result["ticker"])
 
-        target_ticker = extracted_tickers[0] if extracted_tickers else "UNKNOWN"
-
-        # Pass parsed datetime objects to inputs
-        agent_inputs = {
-            "news_agent": {"ticker": target_ticker},
-            "twitter_agent": {"ticker": target_ticker, "hours_delta": decision.timeframe},
-            "technical_agent": TechnicalInput(
-                ticker=target_ticker, 
-                interval=decision.interval, 
-                start_date=final_start_date.isoformat(),  
-                end_date=final_end_date.isoformat()
-            ),
-            "fundamental_agent": FundamentalInput(tickers=extracted_tickers),
-            "montecarlo_agent": MontecarloInput(ticker=target_ticker)
-        }
-        
-        parsed_intent = {
-            "decision": decision.dict(), 
-            "agent_inputs": agent_inputs,
-            "tickers": extracted_tickers,
-            "company_names": extracted_company_names
-        }
-        
-        return parsed_intent
+        return build_parsed_intent(decision, extracted_tickers, extracted_company_names)
 
     def _get_llm_decision(self, query: str, state: StockAgentState) -> AgentRoutingDecision:
         """Invoke LLM for routing decision or handle Kafka signals."""
         
-        message_type = state.get("message_type", "terminal")
-        
         #   KAFKA SIGNAL HANDLING (Short-circuits LLM)  
-        if message_type == "technical_kafka":
-            trigger_signal = state.get("trigger_signal", {})
-            return AgentRoutingDecision(tickers=[trigger_signal.get("ticker")], timeframe=24, run_news=True, run_twitter=True, run_technical=False, run_fundamental=False, run_montecarlo=True)
+        kafka_decision = kafka_routing_decision(state)
+        if kafka_decision is not None:
+            return kafka_decision
         
-        if message_type == "news_kafka":
-            news_input = state.get("news_kafka_input", {})
-            return AgentRoutingDecision(tickers=[news_input.get("ticker")], timeframe=24, run_news=False, run_twitter=False, run_technical=True, run_fundamental=False, run_montecarlo=True)
+        #   RULE-BASED ROUTING (LLM only on low confidence)  
+        if self.rule_router is not None:
+            rule_decision = self.rule_router.route(query)
+            if rule_decision is not None:
+                return AgentRoutingDecision(**rule_decision)
         
         #   LLM ROUTING PROMPT  
         now = datetime.now()
@@ -250,11 +321,21 @@ Parse user intent into strict JSON for agent routing.
 
 Analyze the query and generate the routing JSON."""
         
+        messages = [
+            ("system", system_msg),
+            ("user", query)
+        ]
         try:
-            return self.router_chain.invoke([
-                ("system", system_msg),
-                ("user", query)
-            ])
+            # Not cached: the prompt embeds the current time
+            return get_llm_gateway().call(
+                model=self.model_name,
+                payload={"messages": messages, "schema": "AgentRoutingDecision"},
+                fn=lambda: self.router_chain.invoke(messages),
+                caller="orchestrator",
+                cache=False,
+                encode=lambda decision: decision.model_dump(),
+                decode=lambda fields: AgentRoutingDecision(**fields),
+            )
         except Exception as e:
             print(f"[ERROR] LLM Routing failed: {e}")
             # Fallback #####Fix this
@@ -293,12 +374,14 @@ if __name__ == "__main__":
     inputs = result["parsed_intent"]["agent_inputs"]["technical_agent"]
     
     print(f"Query: {state['query']}")
-    print(f"Start: {inputs.start_date} | End: {inputs.end_date}")
+    print(f"Start: {inputs['start_date']} | End: {inputs['end_date']}")
     
     # Validation
-    assert inputs.start_date.hour == 9
-    assert inputs.start_date.minute == 15
-    assert inputs.end_date.hour == 10
-    assert inputs.end_date.minute == 15
+    start_date = datetime.fromisoformat(inputs["start_date"])
+    end_date = datetime.fromisoformat(inputs["end_date"])
+    assert start_date.hour == 9
+    assert start_date.minute == 15
+    assert end_date.hour == 10
+    assert end_date.minute == 15
     
     print("Timestamp precision test passed.")
\ No newline at end of file
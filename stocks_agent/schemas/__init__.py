@@ -19,6 +19,7 @@ from .outputs import (
 from .kafka_schemas import (
     TradeSignal,
     StockAnalysis,
+    LiveReturnUpdate,
 )
 
 __all__ = [
@@ -34,5 +35,6 @@ __all__ = [
     "FundamentalOutput",
     "TradeSignal",
     "StockAnalysis",
+    "LiveReturnUpdate",
 ]
 
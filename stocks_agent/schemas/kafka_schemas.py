@@ -1,7 +1,7 @@
 """
 Kafka message schemas for StocksAgent.
 
-Pydantic models for trade signals and stock analysis messages.
+Pydantic models for trade signals, stock analysis and live return messages.
 """
 
 from typing import List, Dict, Any, Optional
@@ -79,3 +79,18 @@ class StockAnalysis(BaseModel):
     class Config:
         extra = "allow"
 
+
+
+class LiveReturnUpdate(BaseModel):
+    """
+    Schema for per-bar rolling return updates from services/live_returns.py.
+    Published to the STOCKSAGENT_LIVE_RETURNS_TOPIC Kafka topic, keyed by ticker.
+    """
+    ticker: str = Field(..., description="Stock ticker")
+    last_date: str = Field(..., description="Timestamp of the newest bar")
+    last_close: float = Field(..., description="Close of the newest bar")
+    log_ret: float = Field(..., description="Log return of the newest bar")
+    count: int = Field(..., description="Returns in the rolling window")
+    mean: float = Field(..., description="Mean bar log return over the window")
+    volatility: float = Field(..., description="Std of bar log returns over the window")
+    annualized_volatility: float = Field(..., description="Volatility scaled to one year")
@@ -6,16 +6,20 @@ Exposes REST endpoints for querying the multi-agent analysis system.
 import sys
 import os
 import time
+import json
 from datetime import datetime
 from dotenv import load_dotenv
 load_dotenv()
 # Add parent directory to path for module imports
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, Response, stream_with_context
+from pydantic import BaseModel
 
 from stocks_agent.graph import get_compiled_graph
-from stocks_agent.state import StockAgentState
+# Same module path the agents import, so the stats cover their LLM calls
+from services.llm_gateway import get_llm_gateway
+from stocks_agent.state import build_initial_state, extract_ticker
 
 # Initialize Flask app
 app = Flask(__name__)
@@ -49,6 +53,18 @@ def init_graph():
         return False
 
 
+def _json_default(obj):
+    """JSON fallback for Pydantic models and datetimes in graph state."""
+    if isinstance(obj, BaseModel):
+        return obj.model_dump()
+    return str(obj)
+
+
+def sse_event(event: str, data: dict) -> str:
+    """Format one Server-Sent Event."""
+    return f"event: {event}\ndata: {json.dumps(data, default=_json_default)}\n\n"
+
+
 def run_query(query: str) -> dict:
     """
     Run a query through the agent graph.
@@ -61,34 +77,11 @@ def run_query(query: str) -> dict:
     """
     global queries_processed
     
-    # Initialize state with the query
-    initial_state: StockAgentState = {
-        "query": query,
-        "ticker": [],
-        "parsed_intent": {},
-        "news_output": None,
-        "twitter_output": None,
-        "montecarlo_output": None,
-        "technical_output": None,
-        "fundamental_output": None,
-        "final_response": None,
-        "agent_contributions": [],
-        "no_llm_flag": True
-    }
-    
     # Run the graph
-    result = graph.invoke(initial_state)
+    result = graph.invoke(build_initial_state(query))
     queries_processed += 1
     
-    # Extract ticker from parsed intent if available
-    parsed_intent = result.get("parsed_intent", {})
-    decision = parsed_intent.get("decision", {})
-    ticker = decision.get("ticker") if decision else None
-    
-    # If not in decision, try tickers list
-    if not ticker:
-        tickers = parsed_intent.get("tickers", [])
-        ticker = tickers[0] if tickers else None
+    ticker = extract_ticker(result.get("parsed_intent", {}))
     
     return {
         "response": result.get("final_response", "No response generated."),
@@ -146,6 +139,87 @@ def query_endpoint():
         }), 500
 
 
+def stream_query(query: str):
+    """
+    Run a query through the agent graph, yielding SSE events as nodes complete.
+    
+    Events:
+        agent  - {"node": ..., "output": {...}} as soon as each node finishes
+        done   - {"response": ..., "ticker": ..., "agents_used": [...]}
+        error  - {"error": ...}
+    
+    HTTP queries run in no-LLM mode (the report is rendered from a template),
+    so there are no explanation tokens to stream.
+    """
+    global queries_processed
+    
+    ticker = None
+    agents_used = []
+    final_response = None
+    
+    try:
+        for chunk in graph.stream(build_initial_state(query), stream_mode="updates"):
+            for node, update in (chunk or {}).items():
+                update = update or {}
+                agents_used.extend(update.get("agent_contributions", []))
+                
+                if node == "orchestrator":
+                    parsed_intent = update.get("parsed_intent", {})
+                    ticker = extract_ticker(parsed_intent)
+                    yield sse_event("agent", {
+                        "node": node,
+                        "output": {
+                            "decision": parsed_intent.get("decision", {}),
+                            "tickers": parsed_intent.get("tickers", []),
+                        }
+                    })
+                elif node == "explainability":
+                    final_response = update.get("final_response")
+                else:
+                    yield sse_event("agent", {"node": node, "output": update})
+        
+        queries_processed += 1
+        yield sse_event("done", {
+            "success": True,
+            "response": final_response or "No response generated.",
+            "ticker": ticker,
+            "agents_used": agents_used,
+        })
+    except Exception as e:
+        yield sse_event("error", {"success": False, "error": str(e)})
+
+
+@app.route("/query/stream", methods=["POST"])
+def query_stream_endpoint():
+    """
+    POST /query/stream
+    
+    Same request body as /query, but streams Server-Sent Events: each agent's
+    output as its node completes, then a final "done" event with the report.
+    """
+    if graph is None:
+        return jsonify({
+            "success": False,
+            "error": "Agent graph not initialized"
+        }), 503
+    
+    data = request.get_json()
+    
+    if not data or "query" not in data or not str(data["query"]).strip():
+        return jsonify({
+            "success": False,
+            "error": "Missing or empty 'query' field in request body"
+        }), 400
+    
+    query = data["query"].strip()
+    
+    return Response(
+        stream_with_context(stream_query(query)),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 @app.route("/health", methods=["GET"])
 def health_endpoint():
     """
@@ -187,7 +261,8 @@ def status_endpoint():
         "uptime_seconds": uptime_seconds,
         "queries_processed": queries_processed,
         "graph_ready": graph is not None,
-        "start_time": start_time.isoformat() if start_time else None
+        "start_time": start_time.isoformat() if start_time else None,
+        "llm": get_llm_gateway().stats()
     })
 
 
@@ -202,6 +277,7 @@ def main():
     print(f"\nStarting Flask server on port 3000...")
     print("Endpoints:")
     print("  POST /query  - Submit a query")
+    print("  POST /query/stream - Submit a query (Server-Sent Events)")
     print("  GET  /health - Health check")
     print("  GET  /status - System status")
     print("-" * 50)
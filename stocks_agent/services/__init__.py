@@ -1,17 +1,33 @@
 """
 External service integrations for StocksAgent.
+
+Services are imported on first attribute access (pandas, pathway, kiteconnect and
+kafka are only loaded by the services that need them).
 """
 
-from .zerodha_service import ZerodhaDataManager
-from .pw_logret_service_mc import PathwayLogReturnService
-from .twitter_service import TwitterAPIService, TwitterDatabase
-from .kafka_service import KafkaProducerService, KafkaConsumerService
+import importlib
+
+_EXPORTS = {
+    "ZerodhaDataManager": ".zerodha_service",
+    "BarStore": ".bar_store",
+    "get_bar_store": ".bar_store",
+    "PathwayLogReturnService": ".pw_logret_service_mc",
+    "LiveReturnService": ".live_returns",
+    "get_live_return_table": ".live_returns",
+    "TwitterAPIService": ".twitter_service",
+    "TwitterDatabase": ".twitter_service",
+    "KafkaProducerService": ".kafka_service",
+    "KafkaConsumerService": ".kafka_service",
+    "AgentResultCache": ".result_cache",
+    "get_result_cache": ".result_cache",
+    "LLMGateway": ".llm_gateway",
+    "get_llm_gateway": ".llm_gateway",
+}
+
+__all__ = list(_EXPORTS)
+
 
-__all__ = [
-    "ZerodhaDataManager",
-    "PathwayLogReturnService",
-    "TwitterAPIService",
-    "TwitterDatabase",
-    "KafkaProducerService",
-    "KafkaConsumerService",
-]
+def __getattr__(name):
+    if name in _EXPORTS:
+        return getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
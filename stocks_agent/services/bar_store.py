@@ -0,0 +1,371 @@
+"""
+Local Bar Store.
+
+Persists historical candles per (instrument token, interval) as Parquet, together
+with the time ranges already fetched from Kite. A range query is served from disk,
+and only the gaps (usually just the tail since the last fetch) go to the API.
+
+Layout:
+    {root}/{interval}/{token}.parquet      candles, sorted by date, one row per bar
+    {root}/{interval}/{token}.json         covered [start, end] ranges (ISO timestamps)
+
+write_bars()/read_bars() are the shared bar file format: typed columns (float64
+prices, int64 volume) and `date` as a tz-aware int64 nanosecond timestamp, so
+readers skip the CSV text parsing. read_bars() also accepts legacy CSVs.
+"""
+
+import os
+import sys
+import json
+import logging
+import datetime
+import threading
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple, Callable
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# Import config first to ensure .env is loaded
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+import config
+
+logger = logging.getLogger(__name__)
+
+MARKET_TZ = "Asia/Kolkata"
+
+BAR_COLUMNS = ["date", "open", "high", "low", "close", "volume"]
+PRICE_COLUMNS = ["open", "high", "low", "close", "log_ret"]
+COUNT_COLUMNS = ["volume", "oi"]
+
+# ~1 year of 5-minute candles per row group, so range reads skip most of a long history
+ROW_GROUP_SIZE = 20_000
+
+# Candle length per Kite interval
+INTERVAL_SECONDS = {
+    "minute": 60,
+    "3minute": 3 * 60,
+    "5minute": 5 * 60,
+    "10minute": 10 * 60,
+    "15minute": 15 * 60,
+    "30minute": 30 * 60,
+    "60minute": 60 * 60,
+    "day": 24 * 60 * 60,
+}
+
+Range = Tuple[pd.Timestamp, pd.Timestamp]
+
+
+def to_market_timestamp(value: Any, end_of_day: bool = False) -> pd.Timestamp:
+    """
+    Normalize a date/datetime/str to a tz-aware market-time Timestamp.
+
+    A bare date means the start of that day, or its last second with end_of_day=True
+    (Kite treats `to_date` as inclusive).
+    """
+    if isinstance(value, datetime.date) and not isinstance(value, datetime.datetime):
+        ts = pd.Timestamp(value)
+        if end_of_day:
+            ts = ts + pd.Timedelta(days=1) - pd.Timedelta(seconds=1)
+    else:
+        ts = pd.Timestamp(value)
+    if ts.tzinfo is None:
+        return ts.tz_localize(MARKET_TZ)
+    return ts.tz_convert(MARKET_TZ)
+
+
+def normalize_bars(bars: Any) -> pd.DataFrame:
+    """
+    Kite candle records (or a DataFrame of them) -> DataFrame with a market-time
+    `date` and typed price/volume columns.
+    """
+    df = pd.DataFrame(bars)
+    if df.empty:
+        return pd.DataFrame(columns=BAR_COLUMNS)
+    if "date" in df.columns:
+        try:
+            dates = pd.to_datetime(df["date"])
+            df["date"] = dates.dt.tz_localize(MARKET_TZ) if dates.dt.tz is None else dates.dt.tz_convert(MARKET_TZ)
+        except (ValueError, TypeError) as e:
+            logger.debug(f"Leaving unparseable 'date' column as-is: {e}")
+    for column in PRICE_COLUMNS + COUNT_COLUMNS:
+        if column not in df.columns:
+            continue
+        try:
+            values = pd.to_numeric(df[column])
+        except (ValueError, TypeError):
+            # Not plain numbers (e.g. Pathway's (date, close) tuples); leave as-is
+            continue
+        if column in COUNT_COLUMNS and values.notna().all():
+            df[column] = values.astype("int64")
+        else:
+            df[column] = values.astype("float64")
+    return df
+
+
+def write_bars(df: pd.DataFrame, path: Any) -> str:
+    """
+    Write bars as Parquet (atomically replacing `path`).
+
+    Returns:
+        The written path
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    table = pa.Table.from_pandas(normalize_bars(df), preserve_index=False)
+    tmp_path = path.with_name(path.name + ".tmp")
+    pq.write_table(table, tmp_path, row_group_size=ROW_GROUP_SIZE, compression="zstd")
+    os.replace(tmp_path, path)
+    return str(path)
+
+
+def read_bars(
+    path: Any,
+    start: Any = None,
+    end: Any = None,
+    columns: Optional[List[str]] = None
+) -> pd.DataFrame:
+    """
+    Read bars written by write_bars() (or a legacy CSV), optionally limited to a
+    date range and a subset of columns.
+
+    Parquet reads are memory-mapped and skip row groups outside [start, end].
+
+    Args:
+        path: .parquet file (anything else is read as CSV)
+        start: Earliest date to include
+        end: Latest date to include (a bare date includes the whole day)
+        columns: Columns to load (all if None)
+
+    Returns:
+        DataFrame sorted as stored, with typed columns
+    """
+    path = Path(path)
+    if not path.exists():
+        raise FileNotFoundError(f"Bar file not found: {path}")
+
+    start_ts = to_market_timestamp(start) if start is not None else None
+    end_ts = to_market_timestamp(end, end_of_day=True) if end is not None else None
+
+    if path.suffix == ".parquet":
+        filters = []
+        if start_ts is not None:
+            filters.append(("date", ">=", start_ts))
+        if end_ts is not None:
+            filters.append(("date", "<=", end_ts))
+        table = pq.read_table(path, columns=columns, filters=filters or None, memory_map=True)
+        return normalize_bars(table.to_pandas())
+
+    df = normalize_bars(pd.read_csv(path, usecols=columns))
+    if (start_ts is not None or end_ts is not None) and pd.api.types.is_datetime64_any_dtype(df.get("date")):
+        mask = pd.Series(True, index=df.index)
+        if start_ts is not None:
+            mask &= df["date"] >= start_ts
+        if end_ts is not None:
+            mask &= df["date"] <= end_ts
+        df = df[mask].reset_index(drop=True)
+    return df
+
+
+def subtract_ranges(wanted: Range, covered: List[Range]) -> List[Range]:
+    """Parts of `wanted` not inside any of the (sorted, disjoint) `covered` ranges."""
+    start, end = wanted
+    missing = []
+    for covered_start, covered_end in covered:
+        if covered_end < start:
+            continue
+        if covered_start > end:
+            break
+        if covered_start > start:
+            missing.append((start, covered_start))
+        start = max(start, covered_end)
+    if start < end:
+        missing.append((start, end))
+    return missing
+
+
+def merge_ranges(ranges: List[Range]) -> List[Range]:
+    """Sort and coalesce overlapping or touching ranges."""
+    merged: List[Range] = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+class BarStore:
+    """
+    Parquet-backed candle store keyed by (instrument token, interval).
+
+    Writers for the same key are serialized in-process; files are replaced
+    atomically, so readers never see a partial write.
+    """
+
+    def __init__(self, root_dir: str):
+        """
+        Initialize the store.
+
+        Args:
+            root_dir: Directory holding one sub-directory per interval
+        """
+        self.root_dir = Path(root_dir)
+        self._locks: Dict[Tuple[int, str], threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+
+        self.served_from_disk = 0
+        self.api_fetches = 0
+
+    def _lock(self, token: int, interval: str) -> threading.Lock:
+        with self._locks_guard:
+            return self._locks.setdefault((int(token), interval), threading.Lock())
+
+    def _paths(self, token: int, interval: str) -> Tuple[Path, Path]:
+        directory = self.root_dir / interval
+        return directory / f"{int(token)}.parquet", directory / f"{int(token)}.json"
+
+    def coverage(self, token: int, interval: str) -> List[Range]:
+        """Ranges already fetched from Kite for this key (sorted, disjoint)."""
+        _, meta_path = self._paths(token, interval)
+        if not meta_path.exists():
+            return []
+        try:
+            with open(meta_path, "r") as f:
+                ranges = json.load(f).get("ranges", [])
+            return [(to_market_timestamp(start), to_market_timestamp(end)) for start, end in ranges]
+        except (json.JSONDecodeError, ValueError, TypeError) as e:
+            logger.warning(f"Unreadable bar store metadata {meta_path}: {e}. Treating as empty.")
+            return []
+
+    def load(self, token: int, interval: str) -> pd.DataFrame:
+        """All stored candles for this key."""
+        data_path, _ = self._paths(token, interval)
+        if not data_path.exists():
+            return pd.DataFrame(columns=BAR_COLUMNS)
+        return read_bars(data_path)
+
+    def read(self, token: int, interval: str, start: Any, end: Any) -> pd.DataFrame:
+        """Stored candles with start <= date <= end."""
+        data_path, _ = self._paths(token, interval)
+        if not data_path.exists():
+            return pd.DataFrame(columns=BAR_COLUMNS)
+        return read_bars(data_path, start, end)
+
+    def write(self, token: int, interval: str, bars: pd.DataFrame, fetched: List[Range]):
+        """
+        Merge candles into the store and record `fetched` as covered.
+
+        Rows for an existing date are replaced (the last stored bar may have been
+        an in-progress candle).
+        """
+        data_path, meta_path = self._paths(token, interval)
+        data_path.parent.mkdir(parents=True, exist_ok=True)
+
+        with self._lock(token, interval):
+            existing = self.load(token, interval)
+            new = normalize_bars(bars)
+            if existing.empty:
+                combined = new
+            elif new.empty:
+                combined = existing
+            else:
+                combined = pd.concat([existing, new], ignore_index=True)
+            combined = (
+                combined.drop_duplicates(subset="date", keep="last")
+                .sort_values("date")
+                .reset_index(drop=True)
+            )
+
+            ranges = merge_ranges(self.coverage(token, interval) + list(fetched))
+
+            write_bars(combined, data_path)
+
+            tmp_meta = meta_path.with_suffix(".json.tmp")
+            with open(tmp_meta, "w") as f:
+                json.dump({"ranges": [[s.isoformat(), e.isoformat()] for s, e in ranges]}, f)
+            os.replace(tmp_meta, meta_path)
+
+    def get(
+        self,
+        token: int,
+        interval: str,
+        start: Any,
+        end: Any,
+        fetch: Callable[[pd.Timestamp, pd.Timestamp], List[Dict[str, Any]]]
+    ) -> pd.DataFrame:
+        """
+        Candles for [start, end], fetching only the ranges not yet on disk.
+
+        Args:
+            token: Instrument token
+            interval: Kite interval ("5minute", "day", ...)
+            start: Range start (date, datetime or ISO string)
+            end: Range end (a bare date includes the whole day)
+            fetch: fetch(from_ts, to_ts) -> Kite candle records
+
+        Returns:
+            DataFrame of candles sorted by date
+        """
+        start_ts = to_market_timestamp(start)
+        # Nothing past "now" can exist yet
+        end_ts = min(to_market_timestamp(end, end_of_day=True), pd.Timestamp.now(tz=MARKET_TZ))
+        if start_ts >= end_ts:
+            return pd.DataFrame(columns=BAR_COLUMNS)
+
+        missing = subtract_ranges((start_ts, end_ts), self.coverage(token, interval))
+        if not missing:
+            self.served_from_disk += 1
+            return self.read(token, interval, start_ts, end_ts)
+
+        stored = self.load(token, interval)
+        bar_length = pd.Timedelta(seconds=INTERVAL_SECONDS.get(interval, 60))
+        fetched_ranges, frames = [], []
+        for gap_start, gap_end in missing:
+            # Re-fetch a candle that was still forming when it was stored
+            if not stored.empty:
+                before = stored.loc[stored["date"] <= gap_start, "date"]
+                if not before.empty and gap_start - before.iloc[-1] < bar_length:
+                    gap_start = before.iloc[-1]
+            logger.debug(f"Bar store gap for {token}/{interval}: {gap_start} -> {gap_end}")
+            fetched = normalize_bars(fetch(gap_start, gap_end))
+            if not fetched.empty:
+                frames.append(fetched)
+            fetched_ranges.append((gap_start, gap_end))
+            self.api_fetches += 1
+
+        new_bars = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=BAR_COLUMNS)
+        self.write(token, interval, new_bars, fetched_ranges)
+        return self.read(token, interval, start_ts, end_ts)
+
+    def stats(self) -> Dict[str, Any]:
+        """Disk-hit/API-fetch counters."""
+        return {
+            "root_dir": str(self.root_dir),
+            "served_from_disk": self.served_from_disk,
+            "api_fetches": self.api_fetches,
+        }
+
+
+_bar_store: Optional[BarStore] = None
+_bar_store_lock = threading.Lock()
+
+
+def get_bar_store() -> Optional[BarStore]:
+    """
+    Get the process-wide bar store, created from config on first use.
+
+    Returns:
+        BarStore, or None if disabled in config
+    """
+    global _bar_store
+    bar_config = config.get_config().bars
+    if not bar_config.enabled:
+        return None
+    if _bar_store is None:
+        with _bar_store_lock:
+            if _bar_store is None:
+                _bar_store = BarStore(bar_config.path)
+    return _bar_store
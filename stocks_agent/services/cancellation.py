@@ -0,0 +1,55 @@
+"""
+Cooperative cancellation for graph runs.
+
+A job binds a threading.Event to the current context before running the graph.
+LangGraph copies the context into the executor threads that run sync agent
+nodes, so agents can call `raise_if_cancelled()` at step boundaries and stop
+work for a job that was cancelled through the API.
+
+Bindings nest: an agent run under a deadline binds its own event on top of the
+job's, and either one being set cancels the agent.
+"""
+
+import threading
+import contextvars
+from typing import Tuple
+
+
+class JobCancelled(BaseException):
+    """
+    Raised inside an agent when its job has been cancelled.
+    BaseException (like asyncio.CancelledError) so agents' broad `except Exception`
+    fallbacks don't swallow it.
+    """
+    pass
+
+
+_cancel_events: contextvars.ContextVar[Tuple[threading.Event, ...]] = contextvars.ContextVar(
+    "stocksagent_cancel_events", default=()
+)
+
+
+def bind_cancel_event(event: threading.Event) -> contextvars.Token:
+    """Attach a cancel event to the current context. Returns a token for reset_cancel_event()."""
+    return _cancel_events.set(_cancel_events.get() + (event,))
+
+
+def reset_cancel_event(token: contextvars.Token):
+    """Detach the cancel event bound by bind_cancel_event()."""
+    _cancel_events.reset(token)
+
+
+def is_cancelled() -> bool:
+    """True if the current run's job (or the enclosing agent deadline) has been cancelled."""
+    return any(event.is_set() for event in _cancel_events.get())
+
+
+def raise_if_cancelled(where: str = ""):
+    """
+    Raise JobCancelled if the current job was cancelled.
+
+    Args:
+        where: Optional label for the log/error message (e.g. agent name)
+    """
+    if is_cancelled():
+        raise JobCancelled(f"Job cancelled{f' during {where}' if where else ''}")
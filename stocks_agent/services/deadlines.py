@@ -0,0 +1,124 @@
+"""
+Deadline-aware agent execution.
+
+Each query has a global latency budget (measured from `started_at` in the graph
+state) and each agent a maximum run time. An agent node that overruns returns a
+timed-out marker instead of its output, so the explainability step runs on the
+partial results instead of waiting for the slowest agent.
+
+The overrunning call cannot be killed (agents are synchronous). It gets a cancel
+event that its checkpoints observe (services.cancellation). If it still finishes,
+BaseAgent caches the result, so the next query for that ticker can use it.
+"""
+
+import os
+import sys
+import time
+import logging
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Dict, Any, Callable, Optional
+
+# Import config first to ensure .env is loaded
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+import config
+from services.cancellation import bind_cancel_event, reset_cancel_event
+
+logger = logging.getLogger(__name__)
+
+# Threads running agent calls under a deadline (overrun calls keep theirs until they return)
+DEADLINE_POOL_SIZE = int(os.getenv("STOCKSAGENT_DEADLINE_THREADS", "32"))
+
+# Graph node -> state key holding its output
+AGENT_OUTPUT_KEYS = {
+    "news_agent": "news_output",
+    "twitter_agent": "twitter_output",
+    "technical_agent": "technical_output",
+    "fundamental_agent": "fundamental_output",
+    "montecarlo_agent": "montecarlo_output",
+}
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=DEADLINE_POOL_SIZE, thread_name_prefix="agent_deadline")
+    return _executor
+
+
+def query_deadline(state: Dict[str, Any]) -> float:
+    """Epoch time by which agents must finish so explainability still fits in the budget."""
+    deadline_config = config.get_config().deadlines
+    started_at = state.get("started_at") or time.time()
+    return started_at + deadline_config.query_budget_seconds - deadline_config.explainability_reserve_seconds
+
+
+def agent_time_limit(agent_name: str, state: Dict[str, Any]) -> Optional[float]:
+    """
+    Seconds the agent may run: min(its own deadline, remaining query budget).
+    None if deadlines are disabled or the agent has no configured deadline.
+    """
+    deadline_config = config.get_config().deadlines
+    if not deadline_config.enabled:
+        return None
+    agent_timeout = deadline_config.agent_timeout_seconds.get(agent_name)
+    if agent_timeout is None:
+        return None
+    return max(0.0, min(agent_timeout, query_deadline(state) - time.time()))
+
+
+def timed_out_update(agent_name: str, time_limit: float) -> Dict[str, Any]:
+    """State update recorded for an agent that missed its deadline."""
+    message = f"{agent_name} did not finish within its {time_limit:.1f}s deadline"
+    return {
+        AGENT_OUTPUT_KEYS[agent_name]: {
+            "status": "timed_out",
+            "late": True,
+            "deadline_seconds": round(time_limit, 2),
+            "error": message,
+        },
+        "late_agents": [agent_name],
+        "errors": [message],
+    }
+
+
+def call_with_deadline(agent_name: str, state: Dict[str, Any], fn: Callable[..., Dict[str, Any]], *args) -> Dict[str, Any]:
+    """
+    Run `fn(*args)` under the agent's deadline.
+
+    Returns:
+        fn's state update, or timed_out_update() if the deadline passed first
+    """
+    time_limit = agent_time_limit(agent_name, state)
+    if time_limit is None:
+        return fn(*args)
+
+    if time_limit <= 0:
+        logger.warning(f"[{agent_name}] Query budget already spent, skipping agent")
+        return timed_out_update(agent_name, 0.0)
+
+    deadline_event = threading.Event()
+
+    def _run():
+        token = bind_cancel_event(deadline_event)
+        try:
+            return fn(*args)
+        finally:
+            reset_cancel_event(token)
+
+    # Carry the job's cancel event (and other context) into the worker thread
+    context = contextvars.copy_context()
+    future = _get_executor().submit(context.run, _run)
+    try:
+        return future.result(timeout=time_limit)
+    except FutureTimeoutError:
+        deadline_event.set()
+        logger.warning(f"[{agent_name}] Deadline of {time_limit:.1f}s exceeded, continuing with partial results")
+        return timed_out_update(agent_name, time_limit)
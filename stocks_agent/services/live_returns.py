@@ -0,0 +1,416 @@
+"""
+Live Rolling Log-Return Service.
+
+Long-running streaming counterpart of PathwayLogReturnService. It follows the live
+5-minute bar stream and keeps, per ticker, a fixed-size ring buffer of bar-to-bar
+log returns with running sums, so each new bar updates the mean and realized
+volatility in O(1) instead of recomputing the window.
+
+Windows are published to a table that other processes read:
+    {root}/{ticker}.parquet    date, log_ret for the current window (write_bars format)
+    {root}/{ticker}.json       last date/close, count, mean, volatility, updated_at
+
+Per-bar updates can also go to a Kafka topic (LiveReturnUpdate messages). The
+Monte Carlo agent reads a fresh published window via get_live_return_table()
+instead of reloading bars and recomputing returns.
+
+Run:
+    python stocks_agent/services/live_returns.py [TICKER ...]
+
+Another pipeline can feed bars directly through LiveReturnService.on_bar, e.g. from
+a pw.io.subscribe callback on the indicators price stream.
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import asyncio
+import logging
+import datetime
+import threading
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Import config first to ensure .env is loaded
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config
+from services.bar_store import MARKET_TZ, read_bars, to_market_timestamp, write_bars
+
+logger = logging.getLogger(__name__)
+
+BARS_PER_DAY = 75               # 09:15-15:30 in 5-minute candles
+TRADING_DAYS_PER_YEAR = 250
+
+
+def _to_epoch_ns(dates: Any) -> np.ndarray:
+    """
+    Epoch nanoseconds of `dates`, the same scale as to_market_timestamp(d).value.
+    (`asi8` is in the index's own unit, e.g. microseconds for bar-store dates under pandas 3.)
+    """
+    index = pd.DatetimeIndex(pd.to_datetime(dates))
+    if index.tz is None:
+        index = index.tz_localize(MARKET_TZ)
+    return index.as_unit("ns").asi8
+
+
+class RollingReturns:
+    """
+    Ring buffer of one ticker's latest bar log returns, with running sums for
+    the mean and variance.
+
+    A bar with the same timestamp as the newest one (a candle still forming)
+    replaces its return instead of appending; older bars are ignored.
+    """
+
+    def __init__(self, capacity: int):
+        if capacity < 2:
+            raise ValueError(f"capacity must be at least 2, got {capacity}")
+        self.capacity = capacity
+        self._returns = np.zeros(capacity, dtype=np.float64)
+        self._dates = np.zeros(capacity, dtype=np.int64)
+        self._start = 0
+        self.count = 0
+        self._sum = 0.0
+        self._sum_sq = 0.0
+        # Running sums drift with float error; they are recomputed every `capacity` appends
+        self._appends = 0
+        self.last_date: Optional[int] = None
+        self.last_close: Optional[float] = None
+        self._prev_close: Optional[float] = None
+
+    def _newest(self) -> int:
+        return (self._start + self.count - 1) % self.capacity
+
+    def _append(self, date_ns: int, log_ret: float):
+        if self.count == self.capacity:
+            evicted = self._returns[self._start]
+            self._sum -= evicted
+            self._sum_sq -= evicted * evicted
+            slot = self._start
+            self._start = (self._start + 1) % self.capacity
+        else:
+            slot = (self._start + self.count) % self.capacity
+            self.count += 1
+        self._returns[slot] = log_ret
+        self._dates[slot] = date_ns
+        self._sum += log_ret
+        self._sum_sq += log_ret * log_ret
+
+        self._appends += 1
+        if self._appends >= self.capacity:
+            values = self.values()
+            self._sum = float(values.sum())
+            self._sum_sq = float(np.dot(values, values))
+            self._appends = 0
+
+    def update(self, date: Any, close: float) -> bool:
+        """
+        Add one bar. Returns True if the window changed.
+        """
+        if close is None or not np.isfinite(close) or close <= 0:
+            return False
+        date_ns = to_market_timestamp(date).value
+
+        if self.last_date is None or date_ns > self.last_date:
+            if self.last_close is not None:
+                self._append(date_ns, float(np.log(close / self.last_close)))
+            self._prev_close = self.last_close
+            self.last_date, self.last_close = date_ns, float(close)
+            return True
+
+        if date_ns == self.last_date and close != self.last_close:
+            if self._prev_close is not None and self.count:
+                slot = self._newest()
+                old, new = self._returns[slot], float(np.log(close / self._prev_close))
+                self._returns[slot] = new
+                self._sum += new - old
+                self._sum_sq += new * new - old * old
+            self.last_close = float(close)
+            return True
+        return False
+
+    def extend(self, dates: Any, closes: np.ndarray):
+        """Seed from a block of history (oldest first), vectorized."""
+        closes = np.asarray(closes, dtype=np.float64)
+        dates = _to_epoch_ns(dates)
+        valid = np.isfinite(closes) & (closes > 0)
+        dates, closes = dates[valid], closes[valid]
+        if len(closes) == 0:
+            return
+        if self.last_date is not None:
+            newer = dates > self.last_date
+            dates, closes = dates[newer], closes[newer]
+            if len(closes) == 0:
+                return
+            dates = np.concatenate([[self.last_date], dates])
+            closes = np.concatenate([[self.last_close], closes])
+
+        returns = np.diff(np.log(closes))
+        for date_ns, log_ret in zip(dates[1:][-self.capacity:], returns[-self.capacity:]):
+            self._append(int(date_ns), float(log_ret))
+        self._prev_close = float(closes[-2]) if len(closes) > 1 else self.last_close
+        self.last_date, self.last_close = int(dates[-1]), float(closes[-1])
+
+    def values(self) -> np.ndarray:
+        """Log returns in the window, oldest first."""
+        end = self._start + self.count
+        if end <= self.capacity:
+            return self._returns[self._start:end].copy()
+        return np.concatenate([self._returns[self._start:], self._returns[:end - self.capacity]])
+
+    def dates(self) -> pd.DatetimeIndex:
+        """Bar timestamps matching values()."""
+        end = self._start + self.count
+        if end <= self.capacity:
+            raw = self._dates[self._start:end]
+        else:
+            raw = np.concatenate([self._dates[self._start:], self._dates[:end - self.capacity]])
+        return pd.DatetimeIndex(pd.to_datetime(raw, utc=True)).tz_convert(MARKET_TZ)
+
+    @property
+    def latest(self) -> float:
+        return float(self._returns[self._newest()]) if self.count else 0.0
+
+    @property
+    def mean(self) -> float:
+        return self._sum / self.count if self.count else 0.0
+
+    @property
+    def volatility(self) -> float:
+        """Sample standard deviation of bar log returns (realized volatility per bar)."""
+        if self.count < 2:
+            return 0.0
+        variance = (self._sum_sq - self._sum * self._sum / self.count) / (self.count - 1)
+        return float(np.sqrt(max(variance, 0.0)))
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "last_date": to_market_timestamp(pd.Timestamp(self.last_date, tz="UTC")).isoformat() if self.last_date is not None else None,
+            "last_close": self.last_close,
+            "count": self.count,
+            "mean": self.mean,
+            "volatility": self.volatility,
+            "annualized_volatility": self.volatility * float(np.sqrt(BARS_PER_DAY * TRADING_DAYS_PER_YEAR)),
+        }
+
+
+class LiveReturnTable:
+    """Published per-ticker return windows on disk (one Parquet + JSON pair per ticker)."""
+
+    def __init__(self, root_dir: Any):
+        self.root = Path(root_dir)
+
+    def _paths(self, ticker: str) -> Tuple[Path, Path]:
+        clean = re.sub(r'[^a-zA-Z0-9]', '', ticker)
+        return self.root / f"{clean}.parquet", self.root / f"{clean}.json"
+
+    def write(self, ticker: str, window: RollingReturns, window_days: int):
+        data_path, meta_path = self._paths(ticker)
+        self.root.mkdir(parents=True, exist_ok=True)
+        write_bars(pd.DataFrame({"date": window.dates(), "log_ret": window.values()}), data_path)
+
+        meta = {"ticker": ticker, "window_days": window_days, "updated_at": time.time(), **window.summary()}
+        tmp_meta = meta_path.with_suffix(".json.tmp")
+        with open(tmp_meta, "w") as f:
+            json.dump(meta, f)
+        os.replace(tmp_meta, meta_path)
+
+    def read(
+        self,
+        ticker: str,
+        start: Any = None,
+        max_age_seconds: Optional[float] = None
+    ) -> Optional[Tuple[np.ndarray, Dict[str, Any]]]:
+        """
+        Log returns since `start` and the window metadata, or None if the ticker
+        has no published window, it is older than `max_age_seconds`, or it does
+        not reach back to `start`.
+        """
+        data_path, meta_path = self._paths(ticker)
+        if not (data_path.exists() and meta_path.exists()):
+            return None
+        try:
+            with open(meta_path) as f:
+                meta = json.load(f)
+        except (json.JSONDecodeError, OSError) as e:
+            logger.warning(f"Unreadable live return metadata {meta_path}: {e}")
+            return None
+
+        if max_age_seconds is not None and time.time() - meta.get("updated_at", 0) > max_age_seconds:
+            return None
+        if start is not None:
+            window_start = to_market_timestamp(datetime.date.today()) - pd.Timedelta(days=meta.get("window_days", 0))
+            if to_market_timestamp(start) < window_start:
+                return None
+
+        df = read_bars(data_path, start=start, columns=["date", "log_ret"])
+        return df["log_ret"].to_numpy(dtype=np.float64), meta
+
+
+class LiveReturnService:
+    """
+    Per-ticker rolling return windows fed from the live bar stream.
+
+    Thread-safe: on_bar() may be called from connector callbacks while
+    snapshot()/returns() serve readers in the same process.
+    """
+
+    def __init__(
+        self,
+        window_days: Optional[int] = None,
+        table: Optional[LiveReturnTable] = None,
+        kafka_topic: Optional[str] = None
+    ):
+        live_config = config.get_config().live_returns
+        self.window_days = window_days or live_config.window_days
+        self.capacity = self.window_days * BARS_PER_DAY
+        self.table = table
+        self.kafka_topic = kafka_topic
+        self._windows: Dict[str, RollingReturns] = {}
+        self._lock = threading.Lock()
+
+    def _window(self, ticker: str) -> RollingReturns:
+        window = self._windows.get(ticker)
+        if window is None:
+            window = self._windows[ticker] = RollingReturns(self.capacity)
+        return window
+
+    def seed(self, ticker: str, bars: pd.DataFrame):
+        """Fill a ticker's window from historical bars (DataFrame with date, close)."""
+        if bars.empty:
+            return
+        bars = bars.sort_values("date")
+        with self._lock:
+            self._window(ticker).extend(bars["date"], bars["close"].to_numpy(dtype=np.float64))
+
+    def on_bar(self, ticker: str, date: Any, close: float) -> Optional[Dict[str, Any]]:
+        """
+        Apply one bar. Returns the ticker's updated summary, or None if the bar
+        was stale or a duplicate.
+        """
+        with self._lock:
+            window = self._window(ticker)
+            if not window.update(date, close):
+                return None
+            return {"ticker": ticker, "log_ret": window.latest, **window.summary()}
+
+    def snapshot(self, ticker: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            window = self._windows.get(ticker)
+            return {"ticker": ticker, **window.summary()} if window else None
+
+    def returns(self, ticker: str) -> np.ndarray:
+        with self._lock:
+            window = self._windows.get(ticker)
+            return window.values() if window else np.empty(0)
+
+    def publish(self, ticker: str):
+        """Write a ticker's current window to the table."""
+        if self.table is None:
+            return
+        with self._lock:
+            window = self._windows.get(ticker)
+            if window is None or window.count == 0:
+                return
+            self.table.write(ticker, window, self.window_days)
+
+    async def run(self, tickers: List[str], poll_seconds: Optional[float] = None):
+        """
+        Poll the latest 5-minute bars for `tickers` during market hours, update
+        the windows, and publish changed tickers to the table and Kafka.
+        """
+        from services.zerodha_service import ZerodhaDataManager
+
+        poll_seconds = poll_seconds or config.get_config().live_returns.poll_seconds
+        dm = ZerodhaDataManager()
+        today = datetime.date.today()
+        for ticker in tickers:
+            bars = await asyncio.to_thread(
+                dm.get_bars, ticker, today - datetime.timedelta(days=self.window_days), today, "5minute"
+            )
+            self.seed(ticker, bars)
+            self.publish(ticker)
+        logger.info(f"Seeded {len(tickers)} tickers with {self.window_days} days of returns")
+
+        producer = None
+        if self.kafka_topic:
+            from services.kafka_service import KafkaProducerService
+            producer = KafkaProducerService()
+            await producer.connect()
+
+        try:
+            while True:
+                if not is_market_open():
+                    await asyncio.sleep(60)
+                    continue
+                started = time.monotonic()
+                for ticker in tickers:
+                    try:
+                        candles = await asyncio.to_thread(dm.get_recent_data, ticker, 10)
+                    except Exception as e:
+                        logger.error(f"Error fetching bars for {ticker}: {e}")
+                        continue
+                    updates = [u for u in (self.on_bar(ticker, c["date"], c["close"]) for c in candles) if u]
+                    if not updates:
+                        continue
+                    self.publish(ticker)
+                    if producer:
+                        await producer.send(self.kafka_topic, updates[-1], key=ticker)
+                await asyncio.sleep(max(0.0, poll_seconds - (time.monotonic() - started)))
+        finally:
+            if producer:
+                await producer.close()
+
+
+def is_market_open(now: Optional[datetime.datetime] = None) -> bool:
+    """NSE/BSE session (09:15-15:30 IST, weekdays), with a few minutes' slack either side."""
+    now = to_market_timestamp(now or pd.Timestamp.now(tz=MARKET_TZ))
+    if now.weekday() >= 5:
+        return False
+    return datetime.time(9, 10) <= now.time() <= datetime.time(15, 40)
+
+
+_live_return_table: Optional[LiveReturnTable] = None
+_live_return_table_lock = threading.Lock()
+
+
+def get_live_return_table() -> Optional[LiveReturnTable]:
+    """
+    Get the process-wide published return table, created from config on first use.
+
+    Returns:
+        LiveReturnTable, or None if disabled in config
+    """
+    global _live_return_table
+    live_config = config.get_config().live_returns
+    if not live_config.enabled:
+        return None
+    if _live_return_table is None:
+        with _live_return_table_lock:
+            if _live_return_table is None:
+                _live_return_table = LiveReturnTable(live_config.path)
+    return _live_return_table
+
+
+if __name__ == "__main__":
+    config.configure_logging()
+    live_config = config.get_config().live_returns
+    tickers = sys.argv[1:]
+    if not tickers:
+        with open(config.get_config().zerodha.universe_path) as f:
+            tickers = list(json.load(f))
+    service = LiveReturnService(
+        table=LiveReturnTable(live_config.path),
+        kafka_topic=live_config.kafka_topic or None
+    )
+    try:
+        asyncio.run(service.run(tickers))
+    except KeyboardInterrupt:
+        logger.info("Live return service stopped")
@@ -0,0 +1,406 @@
+"""
+Shared LLM Gateway.
+
+Every LLM call in StocksAgent (orchestrator routing, news/tweet sentiment,
+explainability synthesis, DCF) goes through `LLMGateway.call()`, which adds:
+
+- prompt-hash response caching: local SQLite tier + optional Redis tier, with TTL
+  (both tiers are best effort: their errors are logged, never raised to callers)
+- in-flight coalescing: identical concurrent prompts share one request
+- per-model token-bucket rate limiting (requests/min and tokens/min)
+- token and latency accounting per model and per caller
+
+The gateway is client-agnostic: callers pass the request payload (used for the
+cache key and token estimate) and a zero-argument function that performs the
+actual OpenAI / LangChain / LiteLLM request.
+"""
+
+import os
+import sys
+import json
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from collections import defaultdict
+from concurrent.futures import Future
+from pathlib import Path
+from typing import Dict, Any, Callable, Optional, Tuple
+
+# Import config first to ensure .env is loaded
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+import config
+
+logger = logging.getLogger(__name__)
+
+try:
+    import redis
+    REDIS_AVAILABLE = True
+except ImportError:
+    redis = None
+    REDIS_AVAILABLE = False
+
+# Rough prompt-size estimate used for rate limiting when exact counts are unknown
+CHARS_PER_TOKEN = 4
+# How long a disk-cache operation waits for another process's write lock
+SQLITE_BUSY_TIMEOUT_SECONDS = 1.0
+
+
+def _identity(value: Any) -> Any:
+    return value
+
+
+def estimate_tokens(payload: Any) -> int:
+    """Approximate token count of a request payload."""
+    return max(1, len(json.dumps(payload, default=str)) // CHARS_PER_TOKEN)
+
+
+def extract_usage(result: Any) -> Tuple[Optional[int], Optional[int]]:
+    """
+    (prompt_tokens, completion_tokens) from an OpenAI/LiteLLM response or a
+    LangChain AIMessage. (None, None) if the result carries no usage.
+    """
+    usage_metadata = getattr(result, "usage_metadata", None)
+    if usage_metadata:
+        return usage_metadata.get("input_tokens"), usage_metadata.get("output_tokens")
+    usage = getattr(result, "usage", None)
+    if usage is not None:
+        return getattr(usage, "prompt_tokens", None), getattr(usage, "completion_tokens", None)
+    return None, None
+
+
+class TokenBucket:
+    """Requests/minute + tokens/minute bucket for one model (blocking acquire)."""
+
+    def __init__(self, requests_per_minute: int, tokens_per_minute: int):
+        self.request_rate = requests_per_minute / 60.0
+        self.token_rate = tokens_per_minute / 60.0
+        self.request_capacity = float(requests_per_minute)
+        self.token_capacity = float(tokens_per_minute)
+        self._requests = self.request_capacity
+        self._tokens = self.token_capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        elapsed = now - self._updated
+        self._requests = min(self.request_capacity, self._requests + elapsed * self.request_rate)
+        self._tokens = min(self.token_capacity, self._tokens + elapsed * self.token_rate)
+        self._updated = now
+
+    def acquire(self, tokens: int) -> float:
+        """
+        Block until one request and `tokens` tokens are available.
+
+        Returns:
+            Seconds spent waiting
+        """
+        # A single request larger than the bucket only waits for a full bucket
+        tokens = min(float(tokens), self.token_capacity)
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self._requests >= 1 and self._tokens >= tokens:
+                    self._requests -= 1
+                    self._tokens -= tokens
+                    return waited
+                wait = max(
+                    (1 - self._requests) / self.request_rate if self._requests < 1 else 0.0,
+                    (tokens - self._tokens) / self.token_rate if self._tokens < tokens else 0.0,
+                )
+            time.sleep(wait)
+            waited += wait
+
+
+class LLMResponseCache:
+    """
+    Prompt-hash response cache: SQLite on local disk, optionally backed by Redis
+    so cached responses are shared across processes and hosts.
+
+    The SQLite file may be shared by several processes (server, Kafka consumer);
+    a locked or failing disk tier is treated as a cache miss / skipped write.
+    """
+
+    def __init__(self, path: str, redis_url: Optional[str] = None, key_prefix: str = "stocksagent:llm"):
+        self.path = Path(path)
+        self.key_prefix = key_prefix
+        self._lock = threading.Lock()
+        self._redis = None
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(self.path), timeout=SQLITE_BUSY_TIMEOUT_SECONDS, check_same_thread=False)
+        # WAL lets readers in other processes proceed while one process writes
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, expires_at REAL, value TEXT)"
+        )
+        self._db.commit()
+
+        if redis_url and REDIS_AVAILABLE:
+            try:
+                client = redis.Redis.from_url(redis_url, socket_timeout=1, socket_connect_timeout=1)
+                client.ping()
+                self._redis = client
+            except Exception as e:
+                logger.warning(f"Redis unavailable for LLM cache: {e}. Using disk only.")
+
+    def get(self, key: str) -> Optional[Any]:
+        now = time.time()
+        try:
+            with self._lock:
+                row = self._db.execute("SELECT expires_at, value FROM responses WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    if row[0] > now:
+                        return json.loads(row[1])
+                    self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                    self._db.commit()
+        except sqlite3.Error as e:
+            logger.warning(f"Disk LLM cache get failed: {e}")
+
+        if self._redis is not None:
+            try:
+                raw = self._redis.get(f"{self.key_prefix}:{key}")
+                if raw is not None:
+                    doc = json.loads(raw)
+                    self._set_disk(key, doc["value"], doc["expires_at"])
+                    return doc["value"]
+            except Exception as e:
+                logger.warning(f"Redis LLM cache get failed: {e}")
+        return None
+
+    def set(self, key: str, value: Any, ttl_seconds: int):
+        if ttl_seconds <= 0:
+            return
+        expires_at = time.time() + ttl_seconds
+        self._set_disk(key, value, expires_at)
+        if self._redis is not None:
+            try:
+                doc = json.dumps({"expires_at": expires_at, "value": value}, default=str)
+                self._redis.setex(f"{self.key_prefix}:{key}", int(ttl_seconds), doc)
+            except Exception as e:
+                logger.warning(f"Redis LLM cache set failed: {e}")
+
+    def _set_disk(self, key: str, value: Any, expires_at: float):
+        try:
+            with self._lock:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO responses (key, expires_at, value) VALUES (?, ?, ?)",
+                    (key, expires_at, json.dumps(value, default=str))
+                )
+                self._db.commit()
+        except sqlite3.Error as e:
+            logger.warning(f"Disk LLM cache set failed: {e}")
+
+    def purge_expired(self) -> int:
+        """Delete expired rows from the disk tier. Returns rows removed."""
+        try:
+            with self._lock:
+                cursor = self._db.execute("DELETE FROM responses WHERE expires_at <= ?", (time.time(),))
+                self._db.commit()
+                return cursor.rowcount
+        except sqlite3.Error as e:
+            logger.warning(f"Disk LLM cache purge failed: {e}")
+            return 0
+
+
+class LLMGateway:
+    """
+    Single entry point for LLM requests.
+
+    Example:
+        gateway = get_llm_gateway()
+        text = gateway.call(
+            model="gpt-4o-mini",
+            payload={"messages": messages, "temperature": 0},
+            fn=lambda: client.chat.completions.create(model="gpt-4o-mini", messages=messages),
+            caller="news_agent",
+            encode=lambda r: r.choices[0].message.content,
+        )
+    """
+
+    def __init__(
+        self,
+        cache: Optional[LLMResponseCache] = None,
+        rate_limits: Optional[Dict[str, Tuple[int, int]]] = None,
+        default_ttl_seconds: int = 6 * 60 * 60
+    ):
+        self.cache = cache
+        self.rate_limits = rate_limits or {}
+        self.default_ttl_seconds = default_ttl_seconds
+
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._inflight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, float]] = defaultdict(lambda: defaultdict(float))
+
+    @staticmethod
+    def make_key(model: str, payload: Any) -> str:
+        """Stable hash of model + request payload."""
+        raw = json.dumps({"model": model, "payload": payload}, sort_keys=True, default=str)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _bucket(self, model: str) -> TokenBucket:
+        bucket = self._buckets.get(model)
+        if bucket is None:
+            with self._lock:
+                if model not in self._buckets:
+                    rpm, tpm = self.rate_limits.get(model) or self.rate_limits.get("default") or (500, 100_000)
+                    self._buckets[model] = TokenBucket(rpm, tpm)
+                bucket = self._buckets[model]
+        return bucket
+
+    def _record(self, model: str, caller: str, **counters: float):
+        with self._lock:
+            for scope in (f"model:{model}", f"caller:{caller}"):
+                for name, value in counters.items():
+                    self._stats[scope][name] += value
+
+    def call(
+        self,
+        model: str,
+        payload: Any,
+        fn: Callable[[], Any],
+        caller: str = "unknown",
+        cache: bool = True,
+        ttl_seconds: Optional[int] = None,
+        encode: Callable[[Any], Any] = _identity,
+        decode: Callable[[Any], Any] = _identity,
+        validate: Optional[Callable[[Any], bool]] = None,
+    ) -> Any:
+        """
+        Execute (or serve from cache) one LLM request.
+
+        Args:
+            model: Model name (rate-limit bucket and cache namespace)
+            payload: JSON-serializable request description (messages, params, tools...)
+            fn: Performs the request and returns the raw response
+            caller: Name used for accounting (e.g. "news_agent")
+            cache: Whether the response may be cached (disable for time-dependent prompts)
+            ttl_seconds: Cache TTL (defaults to the gateway's)
+            encode: raw response -> JSON-serializable value (what is cached and coalesced)
+            decode: cached value -> what the caller expects back
+            validate: encoded value -> whether it is usable (e.g. parses as the expected
+                JSON). Invalid responses are returned but not cached, and invalid cached
+                entries are ignored, so a retry asks the model again.
+
+        Returns:
+            decode(encode(response))
+        """
+        key = self.make_key(model, payload)
+
+        if cache and self.cache is not None:
+            cached = self.cache.get(key)
+            if cached is not None and (validate is None or validate(cached)):
+                self._record(model, caller, calls=1, cache_hits=1)
+                return decode(cached)
+
+        # Coalesce identical in-flight prompts onto one request
+        with self._lock:
+            leader_future = self._inflight.get(key)
+            is_leader = leader_future is None
+            if is_leader:
+                leader_future = Future()
+                self._inflight[key] = leader_future
+
+        if not is_leader:
+            self._record(model, caller, calls=1, coalesced=1)
+            return decode(leader_future.result())
+
+        try:
+            prompt_estimate = estimate_tokens(payload)
+            waited = self._bucket(model).acquire(prompt_estimate)
+
+            started = time.perf_counter()
+            response = fn()
+            latency = time.perf_counter() - started
+
+            prompt_tokens, completion_tokens = extract_usage(response)
+            value = encode(response)
+
+            self._record(
+                model, caller,
+                calls=1,
+                requests=1,
+                latency_seconds=latency,
+                rate_limit_wait_seconds=waited,
+                prompt_tokens=prompt_tokens if prompt_tokens is not None else prompt_estimate,
+                completion_tokens=completion_tokens or 0,
+            )
+
+            if cache and self.cache is not None and (validate is None or validate(value)):
+                try:
+                    self.cache.set(key, value, ttl_seconds if ttl_seconds is not None else self.default_ttl_seconds)
+                except Exception as e:
+                    # The request itself succeeded; a cache failure must not fail it
+                    logger.warning(f"LLM cache set failed for {caller}: {e}")
+
+            leader_future.set_result(value)
+            return decode(value)
+        except BaseException as e:
+            self._record(model, caller, calls=1, errors=1)
+            leader_future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """Counters per model and per caller, with average request latency."""
+        with self._lock:
+            snapshot = {scope: dict(counters) for scope, counters in self._stats.items()}
+        for counters in snapshot.values():
+            requests = counters.get("requests", 0)
+            counters["avg_latency_seconds"] = (counters.get("latency_seconds", 0) / requests) if requests else 0.0
+        return snapshot
+
+
+_gateway: Optional[LLMGateway] = None
+_gateway_lock = threading.Lock()
+
+
+def get_llm_gateway() -> LLMGateway:
+    """Get the process-wide LLM gateway."""
+    global _gateway
+    if _gateway is None:
+        with _gateway_lock:
+            if _gateway is None:
+                llm_config = config.get_config().llm
+                cache = None
+                if llm_config.cache_enabled:
+                    try:
+                        cache = LLMResponseCache(llm_config.cache_path, llm_config.redis_url, llm_config.key_prefix)
+                    except (OSError, sqlite3.Error) as e:
+                        logger.warning(f"LLM response cache disabled: {e}")
+                _gateway = LLMGateway(
+                    cache=cache,
+                    rate_limits=llm_config.rate_limits,
+                    default_ttl_seconds=llm_config.default_ttl_seconds,
+                )
+    return _gateway
+
+
+def langchain_payload(messages: Any, **params) -> Dict[str, Any]:
+    """Cache-key payload for a list of LangChain messages plus call parameters."""
+    serialized = []
+    for message in messages:
+        serialized.append({
+            "type": getattr(message, "type", type(message).__name__),
+            "content": getattr(message, "content", str(message)),
+            "tool_calls": getattr(message, "tool_calls", None) or None,
+            "tool_call_id": getattr(message, "tool_call_id", None),
+        })
+    return {"messages": serialized, **params}
+
+
+def encode_ai_message(message: Any) -> Dict[str, Any]:
+    from langchain_core.messages import message_to_dict
+    return message_to_dict(message)
+
+
+def decode_ai_message(value: Dict[str, Any]) -> Any:
+    from langchain_core.messages import messages_from_dict
+    return messages_from_dict([value])[0]
@@ -5,13 +5,17 @@ Computes log returns using Pathway's streaming pipeline with sliding windows.
 """
 
 import os
+import sys
 import logging
 from pathlib import Path
-from typing import Optional, List, Tuple
+from typing import Tuple
+from collections import Counter
 from datetime import timedelta
 
 import numpy as np
-import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from services.bar_store import read_bars, write_bars
 
 logger = logging.getLogger(__name__)
 
@@ -28,34 +32,39 @@ if PATHWAY_AVAILABLE:
         date: str
 
     class LogReturnAccumulator(pw.BaseCustomAccumulator):
-        """Accumulates (timestamp, price) pairs for log return calculation."""
+        """
+        Accumulates (timestamp, price) pairs for log return calculation.
         
-        def __init__(self, price_data: List[Tuple]):
-            self.price_data = list(price_data)
+        Pairs are kept as a multiset (pair -> count), so retracting a row is a
+        dict lookup rather than a linear list.remove.
+        """
+        
+        def __init__(self, price_data: Counter):
+            self.price_data = price_data
         
         @classmethod
         def from_row(cls, row: Tuple) -> 'LogReturnAccumulator':
             timestamp, price = row
-            return cls([(timestamp, price)])
+            return cls(Counter({(timestamp, price): 1}))
         
         def update(self, other: 'LogReturnAccumulator') -> None:
-            self.price_data.extend(other.price_data)
+            self.price_data.update(other.price_data)
         
         def retract(self, other: 'LogReturnAccumulator') -> None:
-            for item in other.price_data:
-                try:
-                    self.price_data.remove(item)
-                except ValueError:
-                    pass
+            for item, count in other.price_data.items():
+                remaining = self.price_data.get(item, 0) - count
+                if remaining > 0:
+                    self.price_data[item] = remaining
+                else:
+                    self.price_data.pop(item, None)
         
         def compute_result(self) -> float:
-            if len(self.price_data) < 2:
+            if sum(self.price_data.values()) < 2:
                 return 0.0
             
             try:
-                sorted_data = sorted(self.price_data, key=lambda x: x[0])
-                first_price = sorted_data[0][1]
-                last_price = sorted_data[-1][1]
+                first_price = min(self.price_data, key=lambda x: x[0])[1]
+                last_price = max(self.price_data, key=lambda x: x[0])[1]
                 
                 if first_price <= 0 or last_price <= 0:
                     return 0.0
@@ -87,6 +96,7 @@ class PathwayLogReturnService:
     def compute_log_returns_pathway(self, input_csv_path: str) -> str:
         """
         Compute log returns using Pathway pipeline.
+        Accepts Parquet bars (read_bars) or a CSV; results are written as CSV.
         """
         if not self._pathway_available:
             return self.compute_log_returns_fallback(input_csv_path)
@@ -97,11 +107,20 @@ class PathwayLogReturnService:
         
         logger.info(f"Initializing Pathway pipeline for {input_path}...")
         
-        data = pw.io.csv.read(
-            str(input_path),
-            schema=InputSchema,
-            mode="static"
-        )
+        if input_path.suffix == ".parquet":
+            bars = read_bars(input_path, columns=["date", "close"])
+            bars["date"] = bars["date"].dt.strftime("%Y-%m-%d %H:%M:%S%z")
+            data = pw.debug.table_from_pandas(bars, schema=InputSchema)
+            output_path = input_path.with_name(f"{input_path.stem}_logret.csv")
+        else:
+            data = pw.io.csv.read(
+                str(input_path),
+                schema=InputSchema,
+                mode="static"
+            )
+            output_path = input_path.with_name(
+                f"{input_path.stem}{input_path.suffix}"
+            )
         
         data = data.with_columns(
             timestamp=data.date.dt.strptime(fmt="%Y-%m-%d %H:%M:%S%z")
@@ -129,10 +148,6 @@ class PathwayLogReturnService:
             log_ret=log_return_reducer(pw.this.timestamp, pw.this.close),
         )
         
-        output_path = input_path.with_name(
-            f"{input_path.stem}{input_path.suffix}"
-        )
-        
         logger.info(f"Writing results to: {output_path}")
         pw.io.csv.write(result_table, str(output_path))
         
@@ -148,6 +163,7 @@ class PathwayLogReturnService:
     def compute_log_returns_fallback(self, input_csv_path: str) -> str:
         """
         Fallback method to compute log returns without Pathway.
+        Results are written as Parquet next to the input.
         """
         input_path = Path(input_csv_path)
         if not input_path.exists():
@@ -155,10 +171,10 @@ class PathwayLogReturnService:
         
         logger.info(f"Computing log returns (fallback mode) for {input_path}...")
         
-        df = pd.read_csv(input_path)
+        df = read_bars(input_path)
         
         if 'close' not in df.columns:
-            raise ValueError(f"CSV missing 'close' column. Available: {df.columns.tolist()}")
+            raise ValueError(f"Bars missing 'close' column. Available: {df.columns.tolist()}")
         
         if 'date' in df.columns:
             df = df.sort_values('date').reset_index(drop=True)
@@ -169,10 +185,8 @@ class PathwayLogReturnService:
         # Drop first row (NaN from shift)
         df = df.dropna(subset=['log_ret'])
         
-        output_path = input_path.with_name(
-            f"{input_path.stem}_processed{input_path.suffix}"
-        )
-        df.to_csv(output_path, index=False)
+        output_path = input_path.with_name(f"{input_path.stem}_processed.parquet")
+        write_bars(df, output_path)
         
         logger.info(f"Saved {len(df)} rows with log returns to {output_path}")
         return str(output_path)
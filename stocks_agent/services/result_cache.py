@@ -0,0 +1,244 @@
+"""
+Agent Result Cache.
+
+Two-tier TTL cache (in-process memory + optional Redis) for agent outputs.
+Keyed by (agent, ticker, input-hash) so repeated analyses of the same ticker
+(e.g. a trade signal and a news trigger minutes apart) skip the refetch/LLM work.
+"""
+
+import os
+import sys
+import copy
+import json
+import time
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Tuple
+
+# Import config first to ensure .env is loaded
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+import config
+
+logger = logging.getLogger(__name__)
+
+try:
+    import redis
+    REDIS_AVAILABLE = True
+except ImportError:
+    redis = None
+    REDIS_AVAILABLE = False
+
+
+class AgentResultCache:
+    """
+    TTL cache for agent state updates.
+
+    Lookups hit the in-memory tier first, then Redis (if configured).
+    Redis hits are promoted into memory for the remaining TTL.
+    """
+
+    def __init__(
+        self,
+        redis_url: Optional[str] = None,
+        key_prefix: str = "stocksagent:result",
+        max_memory_entries: int = 512
+    ):
+        """
+        Initialize the cache.
+
+        Args:
+            redis_url: Redis connection URL (memory-only if None or redis not installed)
+            key_prefix: Namespace prefix for all keys
+            max_memory_entries: Max entries kept in memory (LRU eviction)
+        """
+        self.key_prefix = key_prefix
+        self.max_memory_entries = max_memory_entries
+
+        self._memory: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._redis = None
+
+        self.hits = 0
+        self.misses = 0
+
+        if redis_url:
+            self._connect_redis(redis_url)
+
+    def _connect_redis(self, redis_url: str):
+        """Establish Redis connection (optional tier)."""
+        if not REDIS_AVAILABLE:
+            logger.warning("redis not installed. Result cache running memory-only.")
+            return
+        try:
+            client = redis.Redis.from_url(redis_url, socket_timeout=1, socket_connect_timeout=1)
+            client.ping()
+            self._redis = client
+            logger.info("Result cache connected to Redis")
+        except Exception as e:
+            logger.warning(f"Redis connection failed: {e}. Result cache running memory-only.")
+            self._redis = None
+
+    @property
+    def has_redis(self) -> bool:
+        """Check if the Redis tier is active."""
+        return self._redis is not None
+
+    def make_key(self, agent_name: str, ticker: str, input_data: Dict[str, Any]) -> str:
+        """
+        Build a cache key from agent name, ticker and a stable hash of the input.
+
+        Args:
+            agent_name: Name of the agent
+            ticker: Ticker (or comma-joined tickers) the input targets
+            input_data: Validated input dict
+
+        Returns:
+            Namespaced cache key
+        """
+        payload = json.dumps(input_data, sort_keys=True, default=str)
+        input_hash = hashlib.sha1(payload.encode("utf-8")).hexdigest()[:16]
+        return f"{self.key_prefix}:{agent_name}:{ticker.upper()}:{input_hash}"
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up a cached result.
+
+        Returns:
+            Deep copy of the cached state update, or None on miss/expiry
+        """
+        now = time.time()
+
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > now:
+                    self._memory.move_to_end(key)
+                    self.hits += 1
+                    return copy.deepcopy(value)
+                del self._memory[key]
+
+        if self._redis is not None:
+            try:
+                raw = self._redis.get(key)
+                if raw is not None:
+                    doc = json.loads(raw)
+                    self._set_memory(key, copy.deepcopy(doc["value"]), doc["expires_at"])
+                    with self._lock:
+                        self.hits += 1
+                    return doc["value"]
+            except Exception as e:
+                logger.warning(f"Redis get failed for {key}: {e}")
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def set(self, key: str, value: Dict[str, Any], ttl_seconds: int):
+        """
+        Store a result in both tiers.
+
+        Args:
+            key: Cache key from make_key()
+            value: State update dict returned by the agent
+            ttl_seconds: Freshness window
+        """
+        if ttl_seconds <= 0:
+            return
+
+        expires_at = time.time() + ttl_seconds
+        self._set_memory(key, copy.deepcopy(value), expires_at)
+
+        if self._redis is not None:
+            try:
+                doc = json.dumps({"expires_at": expires_at, "value": value}, default=str)
+                self._redis.setex(key, int(ttl_seconds), doc)
+            except Exception as e:
+                logger.warning(f"Redis set failed for {key}: {e}")
+
+    def _set_memory(self, key: str, value: Dict[str, Any], expires_at: float):
+        """Insert into the memory tier with LRU eviction."""
+        with self._lock:
+            self._memory[key] = (expires_at, value)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_memory_entries:
+                self._memory.popitem(last=False)
+
+    def clear(self):
+        """Drop all entries from the memory tier and this prefix in Redis."""
+        with self._lock:
+            self._memory.clear()
+
+        if self._redis is not None:
+            try:
+                for key in self._redis.scan_iter(match=f"{self.key_prefix}:*"):
+                    self._redis.delete(key)
+            except Exception as e:
+                logger.warning(f"Redis clear failed: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters and tier info."""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits / total) if total else 0.0,
+                "memory_entries": len(self._memory),
+                "redis": self.has_redis,
+            }
+
+
+_result_cache: Optional[AgentResultCache] = None
+_result_cache_lock = threading.Lock()
+
+
+def get_agent_ttl(agent_name: str) -> int:
+    """
+    Freshness policy lookup. Returns 0 (no caching) for agents without a configured TTL.
+    """
+    return int(config.get_config().cache.agent_ttl_seconds.get(agent_name, 0))
+
+
+# Agent output markers for failed or degraded results
+FAILED_STATUSES = ("error", "failed", "fallback", "timed_out")
+FAILED_CONTRIBUTION_SUFFIXES = ("(Failed)", "(Fallback)")
+
+
+def is_cacheable(result: Any) -> bool:
+    """
+    True for clean agent results. Failures and fallback/mock outputs (an `errors`
+    list, an output with an `error` or failed `status`, or a contribution tagged
+    "(Failed)"/"(Fallback)") are not cached so the next request retries.
+    """
+    if not isinstance(result, dict) or result.get("errors"):
+        return False
+    for value in result.values():
+        if isinstance(value, dict) and (value.get("error") or value.get("status") in FAILED_STATUSES):
+            return False
+    contributions = result.get("agent_contributions") or []
+    return not any(str(c).endswith(FAILED_CONTRIBUTION_SUFFIXES) for c in contributions)
+
+
+def get_result_cache() -> Optional[AgentResultCache]:
+    """
+    Get the process-wide result cache (None if disabled in config).
+    """
+    global _result_cache
+
+    cache_config = config.get_config().cache
+    if not cache_config.enabled:
+        return None
+
+    if _result_cache is None:
+        with _result_cache_lock:
+            if _result_cache is None:
+                _result_cache = AgentResultCache(
+                    redis_url=cache_config.redis_url,
+                    key_prefix=cache_config.key_prefix,
+                    max_memory_entries=cache_config.max_memory_entries
+                )
+    return _result_cache
@@ -4,13 +4,21 @@ import logging
 import datetime
 import re
 import sys
-from typing import Optional, List, Dict, Any, Union
+import time
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, List, Dict, Any, Union, Tuple
 from pathlib import Path
 from functools import lru_cache
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 from dotenv import load_dotenv
 import pandas as pd
 from kiteconnect import KiteConnect, exceptions as kite_exceptions
+from stocks_agent.supporting_functions.instrument_index import get_instrument_index
+from services.bar_store import BarStore, get_bar_store, write_bars
+import config
 
 
 logging.basicConfig(
@@ -36,12 +44,98 @@ class ConfigurationError(DataPipelineError):
     pass
 
 
+# Longest range (days) Kite returns in one historical_data call, per interval
+INTERVAL_MAX_DAYS = {
+    "minute": 60,
+    "3minute": 100,
+    "5minute": 100,
+    "10minute": 100,
+    "15minute": 200,
+    "30minute": 200,
+    "60minute": 400,
+    "day": 2000,
+}
+
+# Worth retrying: throttling (429) and connection failures surface as these
+TRANSIENT_KITE_ERRORS = (kite_exceptions.NetworkException, kite_exceptions.DataException)
+
+
+class HistoricalRateLimiter:
+    """Process-wide limiter for Kite historical_data calls (requests/second, blocking acquire)."""
+
+    def __init__(self, requests_per_second: float):
+        self.interval = 1.0 / requests_per_second
+        self._next_slot = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """
+        Block until the next request slot.
+
+        Returns:
+            Seconds spent waiting
+        """
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.interval
+        wait = slot - now
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+
+_historical_limiter: Optional[HistoricalRateLimiter] = None
+_historical_limiter_lock = threading.Lock()
+
+
+def get_historical_limiter() -> HistoricalRateLimiter:
+    """Limiter shared by every ZerodhaDataManager in the process."""
+    global _historical_limiter
+    if _historical_limiter is None:
+        with _historical_limiter_lock:
+            if _historical_limiter is None:
+                _historical_limiter = HistoricalRateLimiter(config.get_config().zerodha.historical_requests_per_second)
+    return _historical_limiter
+
+
+def _as_datetime(value: Union[datetime.date, datetime.datetime], end_of_day: bool = False) -> datetime.datetime:
+    """Dates become midnight (or the day's last second for an inclusive range end)."""
+    if isinstance(value, datetime.datetime):
+        return value
+    moment = datetime.time(23, 59, 59) if end_of_day else datetime.time.min
+    return datetime.datetime.combine(value, moment)
+
+
+def plan_chunks(
+    start_date: Union[datetime.date, datetime.datetime],
+    end_date: Union[datetime.date, datetime.datetime],
+    interval: str
+) -> List[Tuple[datetime.datetime, datetime.datetime]]:
+    """
+    Split [start_date, end_date] into the fewest ranges Kite accepts for `interval`.
+
+    Consecutive chunks share their boundary timestamp; the stitched result is de-duplicated.
+    """
+    start = _as_datetime(start_date)
+    end = _as_datetime(end_date, end_of_day=True)
+    step = datetime.timedelta(days=INTERVAL_MAX_DAYS.get(interval, 60))
+
+    chunks = []
+    chunk_start = start
+    while chunk_start < end:
+        chunk_end = min(chunk_start + step, end)
+        chunks.append((chunk_start, chunk_end))
+        chunk_start = chunk_end
+    return chunks or [(start, end)]
+
+
 class ZerodhaDataManager:
     """
     Manages authentication and data retrieval from the Zerodha Kite Connect API.
     """
 
-    def __init__(self, universe_path: str = None, instruments_path: str = None):
+    def __init__(self, universe_path: str = None, instruments_path: str = None, bar_store: Optional[BarStore] = None):
         self._load_credentials()
         self.kite = self._initialize_client()
         # Use provided paths or default to DATA_DIR
@@ -51,7 +145,8 @@ class ZerodhaDataManager:
             instruments_path = DATA_DIR / "Zerodha_Instrument_Tokens.csv"
         self.instruments_path = Path(instruments_path)
         self.universe = self._load_universe(universe_path)
-        self.instrument_df = None  
+        # Local candle store; None disables it and every request goes to Kite
+        self.bar_store = bar_store if bar_store is not None else get_bar_store()
         
     def _load_credentials(self):
         """Validates existence of required environment variables."""
@@ -88,54 +183,20 @@ class ZerodhaDataManager:
     def _get_instrument_token(self, ticker: str) -> int:
         """
         Retrieves instrument token with LRU cache.
-        Loads CSV only once into memory (lazy loading) and uses Regex for cleaner matching.
+        Uses the process-wide instrument index (CSV parsed once, shared with ticker extraction).
         """
         if ticker in self.universe.keys():
             return self.universe[ticker]
 
-        # 1. Optimized DF Loading: Load once and cache in memory
-        if self.instrument_df is None:
-            if not Path(self.instruments_path).exists():
-                raise ConfigurationError(f"Instrument token file not found: {self.instruments_path}")
-            self.instrument_df = pd.read_csv(self.instruments_path)
-            # Ensure we are working with string types for matching
-            self.instrument_df['tradingsymbol'] = self.instrument_df['tradingsymbol'].astype(str)
+        try:
+            index = get_instrument_index(self.instruments_path)
+        except FileNotFoundError:
+            raise ConfigurationError(f"Instrument token file not found: {self.instruments_path}")
 
-        df = self.instrument_df
-        
-        # 2. Optimized Ticker Conversion: Use Regex for cleaner suffix removal
-        ticker_upper = ticker.strip().upper()
-        
-        # Removes .NS, .BO, and company suffixes (LTD, LIMITED) found at the end of the string
-        ticker_clean = re.sub(r'(\.NS|\.BO|\sLTD\.?|\sLIMITED)$', '', ticker_upper).strip()
-        ticker_no_spaces = ticker_clean.replace(' ', '')
-        
-        # Try exact match on tradingsymbol
-        mask = df['tradingsymbol'].str.upper() == ticker_clean
-        if mask.any():
-            return int(df.loc[mask, 'instrument_token'].iloc[0])
-        
-        # Try without spaces
-        mask = df['tradingsymbol'].str.upper() == ticker_no_spaces
-        print(f"Trying no spaces match for {ticker_no_spaces}")
-        if mask.any():
-            token = int(df.loc[mask, 'instrument_token'].iloc[0])
-            print(f"Found token {token} for {ticker_no_spaces}")
+        token = index.lookup_token(ticker)
+        if token is not None:
             return token
         
-        # Try first word
-        words = ticker_clean.split()
-        if words:
-            first_word = words[0]
-            mask = df['tradingsymbol'].str.upper() == first_word
-            if mask.any():
-                return int(df.loc[mask, 'instrument_token'].iloc[0])
-        
-        # Try partial match on name
-        mask = df['name'].str.upper().str.contains(ticker_clean, regex=False, na=False)
-        if mask.any():
-            return int(df.loc[mask, 'instrument_token'].iloc[0])
-        
         raise ValueError(f"Instrument token not found for: {ticker}")
 
 
@@ -145,32 +206,82 @@ class ZerodhaDataManager:
         clean_name = re.sub(r'[^a-zA-Z0-9]', '', ticker)
         return clean_name
 
+    def _fetch_chunk(self, ticker: str, token: int, start_date: datetime.datetime, end_date: datetime.datetime, interval: str) -> List[Dict[str, Any]]:
+        """One rate-limited historical_data call, retried on transient failures."""
+        zerodha_config = config.get_config().zerodha
+        limiter = get_historical_limiter()
+
+        for attempt in range(zerodha_config.fetch_retries + 1):
+            limiter.acquire()
+            try:
+                logger.debug(f"Fetching {interval} data for {ticker} ({token}) from {start_date} to {end_date}")
+                return self.kite.historical_data(
+                    instrument_token=token,
+                    from_date=start_date,
+                    to_date=end_date,
+                    interval=interval
+                )
+            except TRANSIENT_KITE_ERRORS as e:
+                if attempt == zerodha_config.fetch_retries:
+                    raise
+                backoff = zerodha_config.retry_backoff_seconds * (2 ** attempt) * (1 + random.random())
+                logger.warning(f"Transient error fetching {ticker} ({e}), retrying in {backoff:.1f}s")
+                time.sleep(backoff)
+
     def fetch_data(self, ticker: str, start_date: datetime.datetime, end_date: datetime.datetime, interval: str) -> List[Dict[str, Any]]:
         """
         Core logic to fetch data. Returns raw list of dictionaries.
+        Ranges longer than Kite allows per call are split into chunks (plan_chunks),
+        fetched concurrently and stitched back together in date order.
         """
         token = self._get_instrument_token(ticker)
+        chunks = plan_chunks(start_date, end_date, interval)
         
         try:
-            logger.debug(f"Fetching {interval} data for {ticker} ({token}) from {start_date} to {end_date}")
-            data = self.kite.historical_data(
-                instrument_token=token,
-                from_date=start_date,
-                to_date=end_date,
-                interval=interval
-            )
-            return data
+            if len(chunks) == 1:
+                return self._fetch_chunk(ticker, token, chunks[0][0], chunks[0][1], interval)
+
+            workers = min(len(chunks), config.get_config().zerodha.fetch_workers)
+            logger.info(f"Fetching {ticker} {interval} in {len(chunks)} chunks ({workers} workers)")
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="kite_fetch") as pool:
+                results = list(pool.map(
+                    lambda chunk: self._fetch_chunk(ticker, token, chunk[0], chunk[1], interval),
+                    chunks
+                ))
+
+            # Chunks share boundary candles; keep one per timestamp
+            by_date = {}
+            for candles in results:
+                for candle in candles or []:
+                    by_date[candle["date"]] = candle
+            return [by_date[key] for key in sorted(by_date)]
             
         except kite_exceptions.InputException as e:
             logger.error(f"Input error for {ticker}: {e}")
             raise DataPipelineError(f"Invalid input params: {e}")
-        except kite_exceptions.NetworkException as e:
+        except TRANSIENT_KITE_ERRORS as e:
             logger.error(f"Network error fetching {ticker}: {e}")
             raise DataPipelineError("Network connection to Zerodha failed.")
         except Exception as e:
             logger.error(f"Unexpected error fetching {ticker}: {e}")
             raise
 
+    def get_bars(self, ticker: str, start_date: Union[datetime.date, datetime.datetime], end_date: Union[datetime.date, datetime.datetime], interval: str) -> pd.DataFrame:
+        """
+        Candles for a range as a DataFrame, served from the local bar store.
+        Only ranges not fetched before (typically the tail since the last call) hit Kite.
+        """
+        if self.bar_store is None:
+            return pd.DataFrame(self.fetch_data(ticker, start_date, end_date, interval))
+
+        token = self._get_instrument_token(ticker)
+        return self.bar_store.get(
+            token, interval, start_date, end_date,
+            fetch=lambda gap_start, gap_end: self.fetch_data(
+                ticker, gap_start.to_pydatetime(), gap_end.to_pydatetime(), interval
+            )
+        )
+
     def get_recent_data(self, ticker: str, duration_minutes: int = 5) -> List[Dict[str, Any]]:
         """
         Fetches the most recent X minutes of data.
@@ -178,26 +289,28 @@ class ZerodhaDataManager:
         end_date = datetime.datetime.now()
         start_date = end_date - datetime.timedelta(minutes=duration_minutes)
         
-        data = self.fetch_data(ticker, start_date, end_date, interval="5minute")
+        df = self.get_bars(ticker, start_date, end_date, interval="5minute")
         
-        if not data:
+        if df.empty:
             logger.warning(f"No data returned for {ticker} in the last {duration_minutes} minutes.")
             return []
             
-        return data
+        records = df.to_dict("records")
+        for record in records:
+            if isinstance(record.get("date"), pd.Timestamp):
+                record["date"] = record["date"].to_pydatetime()
+        return records
 
     def download_historical_csv(self, ticker: str, start_date: datetime.date, end_date: datetime.date, interval: str = "5minute", output_dir: str = "historical_data") -> Optional[str]:
         """
-        Fetches data and saves to CSV. Returns the file path on success.
+        Fetches data (via the bar store) and saves to CSV. Returns the file path on success.
         """
         try:
-            data = self.fetch_data(ticker, start_date, end_date, interval)
+            df = self.get_bars(ticker, start_date, end_date, interval)
             
-            if not data:
+            if df.empty:
                 logger.warning(f"No data found for {ticker} in specified range.")
                 return None
-
-            df = pd.DataFrame(data)
             
             clean_ticker = self._sanitize_filename(ticker)
             save_dir = Path(output_dir)
@@ -214,6 +327,46 @@ class ZerodhaDataManager:
             return None
 
 
+    def download_historical(self, ticker: str, start_date: datetime.date, end_date: datetime.date, interval: str = "5minute", output_dir: str = "historical_data") -> Optional[str]:
+        """
+        Fetches data (via the bar store) and saves it as typed Parquet for read_bars().
+        Returns the file path on success.
+        """
+        try:
+            df = self.get_bars(ticker, start_date, end_date, interval)
+
+            if df.empty:
+                logger.warning(f"No data found for {ticker} in specified range.")
+                return None
+
+            file_path = Path(output_dir) / f"{self._sanitize_filename(ticker)}_{interval}.parquet"
+            write_bars(df, file_path)
+            logger.info(f"Saved {len(df)} rows to {file_path}")
+            return str(file_path)
+
+        except DataPipelineError:
+            return None
+
+    def backfill(self, tickers: List[str], start_date: datetime.date, end_date: datetime.date, interval: str = "5minute") -> Dict[str, Any]:
+        """
+        Load a range for many tickers into the bar store concurrently.
+        All requests share the process-wide rate limiter, so the worker count only sets how many wait in line.
+
+        Returns:
+            {ticker: number of candles, or the error message}
+        """
+        def _load(ticker: str) -> Any:
+            try:
+                return len(self.get_bars(ticker, start_date, end_date, interval))
+            except Exception as e:
+                logger.error(f"Backfill failed for {ticker}: {e}")
+                return f"Error: {e}"
+
+        workers = config.get_config().zerodha.fetch_workers
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="kite_backfill") as pool:
+            counts = list(pool.map(_load, tickers))
+        return dict(zip(tickers, counts))
+
 if __name__ == "__main__":
     # Ensure you have set these env vars before running:
     # export ZERODHA_API_KEY="your_key"
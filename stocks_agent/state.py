@@ -1,4 +1,5 @@
 from typing import TypedDict, Optional, List, Dict, Any, Annotated
+import time
 import operator
 from langchain_core.messages import BaseMessage
 
@@ -10,6 +11,8 @@ def update_dict(current: Dict[str, Any], new_val: Dict[str, Any]) -> Dict[str, A
     """
     if current is None:
         return new_val
+    if new_val is None:
+        return current
     return {**current, **new_val}
 
 class StockAgentState(TypedDict, total=False):
@@ -58,6 +61,12 @@ class StockAgentState(TypedDict, total=False):
     # Track errors
     errors: Annotated[List[str], operator.add]
 
+    # 8. Deadlines
+    # Epoch time the query started; the query budget is measured from here
+    started_at: float
+    # Agents that missed their deadline (their output is a "timed_out" marker)
+    late_agents: Annotated[List[str], operator.add]
+
     #techncial agent flag for no-llm reasoning
     no_llm_flag: bool
 
@@ -66,6 +75,71 @@ class StockAgentState(TypedDict, total=False):
 AgentState = StockAgentState
 
 
+def build_initial_state(query: str) -> StockAgentState:
+    """Initial graph state for an HTTP query."""
+    return {
+        "query": query,
+        "ticker": [],
+        "parsed_intent": {},
+        "news_output": None,
+        "twitter_output": None,
+        "montecarlo_output": None,
+        "technical_output": None,
+        "fundamental_output": None,
+        "final_response": None,
+        "agent_contributions": [],
+        "no_llm_flag": True,
+        "started_at": time.time()
+    }
+
+
+def extract_ticker(parsed_intent: Dict[str, Any]) -> Optional[str]:
+    """Pull the primary ticker out of the orchestrator's parsed intent."""
+    parsed_intent = parsed_intent or {}
+    decision = parsed_intent.get("decision", {})
+    ticker = decision.get("ticker") if decision else None
+    
+    # If not in decision, try tickers list
+    if not ticker:
+        tickers = parsed_intent.get("tickers", [])
+        ticker = tickers[0] if tickers else None
+    return ticker
+
+
+# Fields of the graph state an agent node may read, besides its own `_agent_input`.
+# Everything else (other agents' outputs, messages, the full parsed intent) stays
+# out of the Send() payload; agent outputs come back through the reducers above.
+AGENT_PAYLOAD_FIELDS = ("query", "message_type", "no_llm_flag", "started_at")
+AGENT_PAYLOAD_INTENT_FIELDS = ("tickers", "company_names")
+
+
+class AgentPayload(TypedDict, total=False):
+    """
+    Payload passed to an agent node via Send().
+    Constant size regardless of how many agent outputs the state holds.
+    """
+    _agent_input: Dict[str, Any]
+    query: str
+    message_type: str
+    no_llm_flag: bool
+    started_at: float
+    # Only tickers / company_names from the orchestrator's parsed intent
+    parsed_intent: Dict[str, Any]
+
+
+def build_agent_payload(state: StockAgentState, agent_input: Any) -> AgentPayload:
+    """Build the minimal Send() payload for one agent."""
+    parsed_intent = state.get("parsed_intent") or {}
+    payload: AgentPayload = {
+        field: state[field] for field in AGENT_PAYLOAD_FIELDS if field in state
+    }
+    payload["parsed_intent"] = {
+        field: parsed_intent[field] for field in AGENT_PAYLOAD_INTENT_FIELDS if field in parsed_intent
+    }
+    payload["_agent_input"] = agent_input.model_dump() if hasattr(agent_input, "model_dump") else agent_input
+    return payload
+
+
 class AgentInput(TypedDict):
     """
     Input passed to individual agents via Send().
@@ -0,0 +1,86 @@
+"""
+State size per hop benchmark for the Send() fan-out.
+
+Compares the payload each agent receives under the old contract (a full copy of
+StockAgentState plus `_agent_input`) with the trimmed AgentPayload, as the state
+carries more and larger agent outputs (e.g. a Kafka re-run or a checkpointed thread).
+
+Run:
+    python stocks_agent/state_size_benchmark.py
+"""
+
+import os
+import sys
+import json
+import time
+import pickle
+from typing import Dict, Any
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from state import build_initial_state, build_agent_payload
+from schemas.inputs import TechnicalInput, FundamentalInput, MontecarloInput
+
+AGENTS = ["news_agent", "twitter_agent", "technical_agent", "fundamental_agent", "montecarlo_agent"]
+OUTPUT_KEYS = ["news_output", "twitter_output", "technical_output", "fundamental_output", "montecarlo_output"]
+COPY_ROUNDS = 200
+
+
+def make_state(output_kb: int) -> Dict[str, Any]:
+    """Graph state after the orchestrator, with every agent output ~output_kb in size."""
+    state = build_initial_state("Should I buy RELIANCE?")
+    state["parsed_intent"] = {
+        "decision": {"tickers": ["RELIANCE"], "run_news": True, "run_twitter": True,
+                     "run_technical": True, "run_fundamental": True, "run_montecarlo": True},
+        "agent_inputs": {
+            "news_agent": {"ticker": "RELIANCE"},
+            "twitter_agent": {"ticker": "RELIANCE", "hours_delta": 24},
+            "technical_agent": TechnicalInput(ticker="RELIANCE", interval="day"),
+            "fundamental_agent": FundamentalInput(tickers=["RELIANCE"]),
+            "montecarlo_agent": MontecarloInput(ticker="RELIANCE"),
+        },
+        "tickers": ["RELIANCE"],
+        "company_names": ["RELIANCE INDUSTRIES"],
+    }
+    filler = "x" * 1024
+    for key in OUTPUT_KEYS:
+        state[key] = {"summary": "...", "details": [filler] * output_kb}
+    return state
+
+
+def legacy_payload(state: Dict[str, Any], agent_input: Any) -> Dict[str, Any]:
+    """The pre-AgentPayload Send() argument."""
+    return {**state, "_agent_input": agent_input}
+
+
+def measure(build, state: Dict[str, Any]) -> Dict[str, float]:
+    agent_inputs = state["parsed_intent"]["agent_inputs"]
+    payloads = [build(state, agent_inputs[agent]) for agent in AGENTS]
+
+    pickled = sum(len(pickle.dumps(payload)) for payload in payloads)
+    as_json = sum(len(json.dumps(payload, default=str)) for payload in payloads)
+
+    started = time.perf_counter()
+    for _ in range(COPY_ROUNDS):
+        for payload in payloads:
+            pickle.loads(pickle.dumps(payload))
+    per_hop_us = (time.perf_counter() - started) / (COPY_ROUNDS * len(payloads)) * 1e6
+
+    return {
+        "pickle_kb": pickled / len(payloads) / 1024,
+        "json_kb": as_json / len(payloads) / 1024,
+        "roundtrip_us": per_hop_us,
+    }
+
+
+if __name__ == "__main__":
+    print(f"{'outputs':>9} | {'contract':9} | {'pickle KB/hop':>14} | {'json KB/hop':>12} | {'serde us/hop':>13}")
+    print("-" * 70)
+    for output_kb in (0, 4, 32, 256):
+        state = make_state(output_kb)
+        for label, build in (("full", legacy_payload), ("trimmed", build_agent_payload)):
+            stats = measure(build, state)
+            print(
+                f"{output_kb:>7}KB | {label:9} | {stats['pickle_kb']:>14.2f} | "
+                f"{stats['json_kb']:>12.2f} | {stats['roundtrip_us']:>13.1f}"
+            )
@@ -0,0 +1,250 @@
+"""
+Process-wide instrument index.
+
+Loads the Zerodha instruments CSV once and keeps hash maps for exact symbol /
+alias lookups plus a trigram index that narrows fuzzy matching to a handful of
+candidates. Shared by ticker extraction (orchestrator) and ZerodhaDataManager.
+"""
+
+import os
+import re
+import json
+import time
+import logging
+import threading
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple
+
+from thefuzz import process
+
+logger = logging.getLogger(__name__)
+
+REPO_ROOT = Path(__file__).resolve().parent.parent.parent
+DEFAULT_INSTRUMENTS_FILE = REPO_ROOT / "data/Zerodha_Instrument_Tokens.csv"
+YAHOO_CACHE_FILE = REPO_ROOT / "data/yahoo_ticker_cache.json"
+# Names Yahoo had no listing for are re-queried after this long
+YAHOO_MISS_TTL_SECONDS = 7 * 24 * 60 * 60
+
+TARGET_EXCHANGE = 'BSE'
+FUZZY_CANDIDATES = 50
+
+NOISE_WORDS = [
+    r'\bLIMITED\b', r'\bLTD\b', r'\bPRIVATE\b', r'\bPVT\b',
+    r'\bINDIA\b', r'\bIND\b', r'\bTHE\b'
+]
+_NOISE_RE = re.compile("|".join(NOISE_WORDS))
+_TICKER_SUFFIX_RE = re.compile(r'(\.NS|\.BO|\sLTD\.?|\sLIMITED)$')
+
+
+def clean_company_name(name: str) -> str:
+    """Upper-case and strip legal/noise words (LIMITED, LTD, INDIA, ...)."""
+    return re.sub(r'\s+', ' ', _NOISE_RE.sub('', name.upper())).strip()
+
+
+class TrigramIndex:
+    """
+    Inverted trigram index over a list of strings.
+
+    Candidates sharing the most trigrams with the query are re-scored with
+    thefuzz (same scorer as a full `process.extractOne` scan).
+    """
+
+    def __init__(self, choices: List[str]):
+        self.choices = choices
+        self._postings: Dict[str, List[int]] = defaultdict(list)
+        for idx, choice in enumerate(choices):
+            for gram in self._trigrams(choice):
+                self._postings[gram].append(idx)
+
+    @staticmethod
+    def _trigrams(text: str) -> set:
+        padded = f"  {text.upper()} "
+        return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+    def candidates(self, query: str, limit: int = FUZZY_CANDIDATES) -> List[str]:
+        """Top `limit` choices by shared-trigram count."""
+        counts: Dict[int, int] = defaultdict(int)
+        for gram in self._trigrams(query):
+            for idx in self._postings.get(gram, ()):
+                counts[idx] += 1
+        best = sorted(counts.items(), key=lambda item: item[1], reverse=True)[:limit]
+        return [self.choices[idx] for idx, _ in best]
+
+    def extract_one(self, query: str) -> Optional[Tuple[str, int]]:
+        """Best (choice, score) among trigram candidates, or None."""
+        candidates = self.candidates(query)
+        if not candidates:
+            return None
+        return process.extractOne(query, candidates)
+
+
+class InstrumentIndex:
+    """
+    In-memory view of the instruments CSV.
+
+    - `symbol_to_token`: exact tradingsymbol -> token across all exchanges
+    - `bse_by_symbol` / `bse_by_name`: BSE rows keyed by tradingsymbol / name
+    - `aliases`: normalized names and symbols -> BSE tradingsymbol
+    - trigram indexes over BSE names and symbols for fuzzy matching
+    """
+
+    def __init__(self, instruments_path: Path):
+        import pandas as pd
+
+        self.instruments_path = Path(instruments_path)
+        started = time.perf_counter()
+
+        cols_to_use = ['instrument_token', 'tradingsymbol', 'name', 'exchange']
+        df = pd.read_csv(self.instruments_path, usecols=cols_to_use)
+        df['tradingsymbol'] = df['tradingsymbol'].astype(str)
+
+        # All exchanges: first row per symbol wins (matches previous iloc[0] lookups)
+        self.symbol_to_token: Dict[str, int] = {}
+        self._name_tokens: List[Tuple[str, int]] = []
+        for symbol, name, token in zip(df['tradingsymbol'], df['name'], df['instrument_token']):
+            self.symbol_to_token.setdefault(symbol.upper(), int(token))
+            if isinstance(name, str):
+                self._name_tokens.append((name.upper(), int(token)))
+
+        df_bse = df[df['exchange'] == TARGET_EXCHANGE].dropna(subset=['name'])
+        self.bse_by_name: Dict[str, Dict[str, Any]] = {}
+        self.bse_by_symbol: Dict[str, Dict[str, Any]] = {}
+        for row in df_bse.to_dict('records'):
+            self.bse_by_name.setdefault(row['name'], row)
+            self.bse_by_symbol.setdefault(row['tradingsymbol'], row)
+
+        self.aliases: Dict[str, str] = {}
+        for symbol in self.bse_by_symbol:
+            self.aliases.setdefault(symbol.upper(), symbol)
+        for name, row in self.bse_by_name.items():
+            self.aliases.setdefault(name.upper(), row['tradingsymbol'])
+            cleaned = clean_company_name(name)
+            if cleaned:
+                self.aliases.setdefault(cleaned, row['tradingsymbol'])
+
+        self.name_index = TrigramIndex(list(self.bse_by_name.keys()))
+        self.symbol_index = TrigramIndex(list(self.bse_by_symbol.keys()))
+
+        logger.info(
+            f"Instrument index built from {self.instruments_path} in "
+            f"{(time.perf_counter() - started) * 1000:.0f}ms "
+            f"({len(self.symbol_to_token)} symbols, {len(self.bse_by_name)} BSE names)"
+        )
+
+    def lookup_alias(self, query: str) -> Optional[Dict[str, Any]]:
+        """Exact symbol/name/cleaned-name hit on BSE instruments."""
+        key = query.strip().upper()
+        symbol = self.aliases.get(key) or self.aliases.get(clean_company_name(key))
+        return self.bse_by_symbol.get(symbol) if symbol else None
+
+    def fuzzy_name(self, query: str) -> Optional[Tuple[str, int]]:
+        return self.name_index.extract_one(query)
+
+    def fuzzy_symbol(self, query: str) -> Optional[Tuple[str, int]]:
+        return self.symbol_index.extract_one(query)
+
+    def lookup_token(self, ticker: str) -> Optional[int]:
+        """
+        Resolve an instrument token using the same cascade ZerodhaDataManager used:
+        exact symbol, symbol without spaces, first word, then partial name match.
+        """
+        ticker_upper = ticker.strip().upper()
+
+        # Removes .NS, .BO, and company suffixes (LTD, LIMITED) found at the end of the string
+        ticker_clean = _TICKER_SUFFIX_RE.sub('', ticker_upper).strip()
+        ticker_no_spaces = ticker_clean.replace(' ', '')
+
+        for candidate in (ticker_clean, ticker_no_spaces):
+            if candidate in self.symbol_to_token:
+                return self.symbol_to_token[candidate]
+
+        words = ticker_clean.split()
+        if words and words[0] in self.symbol_to_token:
+            return self.symbol_to_token[words[0]]
+
+        for name, token in self._name_tokens:
+            if ticker_clean in name:
+                return token
+
+        return None
+
+
+class YahooResolutionCache:
+    """
+    Persistent company-name -> symbol cache for Yahoo search results.
+    Misses (Yahoo answered but had no listing) are cached as {"miss_at": epoch
+    seconds} for `miss_ttl_seconds`, so unknown names are not re-queried on every
+    query but can resolve once they are listed. Failed requests are not cached.
+    """
+
+    def __init__(self, cache_path: Path = YAHOO_CACHE_FILE, miss_ttl_seconds: float = YAHOO_MISS_TTL_SECONDS):
+        self.cache_path = Path(cache_path)
+        self.miss_ttl_seconds = miss_ttl_seconds
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Any] = {}
+        if self.cache_path.exists():
+            try:
+                with open(self.cache_path, "r") as f:
+                    self._entries = json.load(f)
+            except (OSError, json.JSONDecodeError) as e:
+                logger.warning(f"Ignoring unreadable Yahoo cache {self.cache_path}: {e}")
+
+    def __contains__(self, company_name: str) -> bool:
+        entry = self._entries.get(company_name.strip().upper())
+        if isinstance(entry, str):
+            return True
+        # Misses expire; bare nulls from older cache files count as expired
+        return isinstance(entry, dict) and time.time() - entry.get("miss_at", 0) < self.miss_ttl_seconds
+
+    def get(self, company_name: str) -> Optional[str]:
+        entry = self._entries.get(company_name.strip().upper())
+        return entry if isinstance(entry, str) else None
+
+    def put(self, company_name: str, symbol: Optional[str]):
+        """Record a resolved symbol, or a miss (symbol None) with the current time."""
+        with self._lock:
+            self._entries[company_name.strip().upper()] = symbol if symbol else {"miss_at": time.time()}
+            try:
+                self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+                tmp_path = self.cache_path.with_suffix(".tmp")
+                with open(tmp_path, "w") as f:
+                    json.dump(self._entries, f, indent=2, sort_keys=True)
+                os.replace(tmp_path, self.cache_path)
+            except OSError as e:
+                logger.warning(f"Failed to persist Yahoo cache: {e}")
+
+
+_indexes: Dict[str, InstrumentIndex] = {}
+_indexes_lock = threading.Lock()
+_yahoo_cache: Optional[YahooResolutionCache] = None
+
+
+def get_instrument_index(instruments_path=DEFAULT_INSTRUMENTS_FILE) -> InstrumentIndex:
+    """
+    Get the process-wide index for an instruments file (built on first use).
+
+    Raises:
+        FileNotFoundError: If the instruments file does not exist
+    """
+    key = str(Path(instruments_path).resolve())
+    index = _indexes.get(key)
+    if index is not None:
+        return index
+
+    with _indexes_lock:
+        if key not in _indexes:
+            if not os.path.exists(key):
+                raise FileNotFoundError(f"Critical: Instrument file not found at {instruments_path}")
+            _indexes[key] = InstrumentIndex(Path(key))
+        return _indexes[key]
+
+
+def get_yahoo_cache() -> YahooResolutionCache:
+    """Get the process-wide persistent Yahoo resolution cache."""
+    global _yahoo_cache
+    if _yahoo_cache is None:
+        with _indexes_lock:
+            if _yahoo_cache is None:
+                _yahoo_cache = YahooResolutionCache()
+    return _yahoo_cache
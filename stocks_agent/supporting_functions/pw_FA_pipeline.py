@@ -19,6 +19,10 @@ sys.path.append(str(Path(__file__).parent))
 from utils_FA import transform_company_data  
 from mongo_client import dcf_collection  
 
+# Shared LLM gateway (same `services.*` module path the agents use)
+sys.path.append(str(Path(__file__).parent.parent))
+from services.llm_gateway import get_llm_gateway
+
 
 # CONFIGURATION
 try:
@@ -304,42 +308,65 @@ def create_dcf_prompt(company_data: pw.Json) -> str:
         return f"Error creating prompt: {str(e)}"
 
 
+def _strip_code_fence(content: str) -> str:
+    """Sometimes models return ```json {data} ``` even when asked not to."""
+    import re
+
+    if "```" in content:
+        match = re.search(r"```(?:json)?\s*(.*?)\s*```", content, re.DOTALL)
+        if match:
+            return match.group(1)
+    return content
+
+
+def _is_json_response(content: str) -> bool:
+    """Whether an LLM response parses as JSON (only those are cached)."""
+    import json
+
+    try:
+        json.loads(_strip_code_fence(content.strip()))
+        return True
+    except (json.JSONDecodeError, AttributeError):
+        return False
+
+
 @pw.udf
 def call_llm_dcf(prompt: str, model_name: str) -> pw.Json:
     """Call LLM and return a structured JSON dictionary."""
     import json
-    import re
 
     try:
         # 1. Skip if input is an error string
         if isinstance(prompt, str) and prompt.strip().lower().startswith("error:"):
             return pw.Json({"error": prompt})
 
-        # 2. Call LiteLLM
-        response = completion(
-            model=f"openai/{model_name}",
-            messages=[
-                {
-                    "role": "system",
-                    "content": (
-                        "You are a quantitative financial analyst. "
-                        "You strictly output data in valid JSON format only."
-                    ),
-                },
-                {"role": "user", "content": prompt},
-            ],
-            temperature=0.2, 
-            max_tokens=2000,
-            response_format={"type": "json_object"}, 
-        )
-
-        content = response.choices[0].message.content.strip()
-
-        # Sometimes models return ```json {data} ``` even when asked not to.
-        if "```" in content:
-            match = re.search(r"```(?:json)?\s*(.*?)\s*```", content, re.DOTALL)
-            if match:
-                content = match.group(1)
+        # 2. Call LiteLLM (through the gateway: cached per prompt, rate limited)
+        messages = [
+            {
+                "role": "system",
+                "content": (
+                    "You are a quantitative financial analyst. "
+                    "You strictly output data in valid JSON format only."
+                ),
+            },
+            {"role": "user", "content": prompt},
+        ]
+        content = get_llm_gateway().call(
+            model=model_name,
+            payload={"messages": messages, "temperature": 0.2, "max_tokens": 2000, "response_format": "json_object"},
+            fn=lambda: completion(
+                model=f"openai/{model_name}",
+                messages=messages,
+                temperature=0.2, 
+                max_tokens=2000,
+                response_format={"type": "json_object"}, 
+            ),
+            caller="call_llm_dcf",
+            encode=lambda response: response.choices[0].message.content,
+            validate=_is_json_response,
+        ).strip()
+
+        content = _strip_code_fence(content)
 
         try:
             parsed_data = json.loads(content)
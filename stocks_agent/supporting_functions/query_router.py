@@ -0,0 +1,310 @@
+"""
+Rule-based query router.
+
+Fast local alternative to the orchestrator's routing LLM. A regex/keyword grammar
+extracts the ticker entity, lookback window and interval, and a small weighted
+keyword classifier scores each `run_*` flag of AgentRoutingDecision. Queries the
+router is not confident about return None so the caller can fall back to the LLM.
+"""
+
+import re
+import math
+import time
+import logging
+import threading
+from typing import Dict, Any, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+CONFIDENCE_THRESHOLD = 0.75
+MAX_ENTITY_WORDS = 4
+
+#   Agent flag classifier: (pattern, weight) per flag, plus a bias.
+#   Score = bias + sum(weights of matched patterns); p = sigmoid(score).
+FLAG_FEATURES: Dict[str, List[Tuple[str, float]]] = {
+    "run_technical": [
+        (r"\btechnical(s)?\b", 4.0),
+        (r"\b(rsi|macd|bollinger|ema|sma|vwap|indicator(s)?)\b", 4.0),
+        (r"\b(price action|chart(s)?|pattern(s)?|support|resistance|breakout|trend)\b", 3.0),
+        (r"\b(overbought|oversold|entry|exit|momentum)\b", 3.0),
+        (r"\b(should i (buy|sell)|buy or sell|trade)\b", 4.0),
+    ],
+    "run_fundamental": [
+        (r"\bfundamental(s)?\b", 4.0),
+        (r"\b(dcf|discounted cash flow|intrinsic value|fair value|valuation)\b", 4.0),
+        (r"\b(under ?priced|over ?priced|undervalued|overvalued|financial health)\b", 3.5),
+        (r"\b(long[- ]term investment|is .+ safe|safety|stable|stability)\b", 4.0),
+    ],
+    "run_news": [
+        (r"\bnews\b", 4.0),
+        (r"\b(headline(s)?|recent events|catalyst(s)?|announcement(s)?)\b", 3.5),
+        (r"\bwhy is .+ (moving|up|down|falling|rising)\b", 3.5),
+        (r"\b(should i (buy|sell)|buy or sell)\b", 4.0),
+    ],
+    "run_twitter": [
+        (r"\b(twitter|tweet(s)?|x\.com)\b", 4.5),
+        (r"\b(social (media )?sentiment|retail (hype|sentiment)|hype|fud|what (are )?people (are )?saying)\b", 4.0),
+    ],
+    "run_montecarlo": [
+        (r"\bmonte ?carlo\b", 4.5),
+        (r"\b(risk|var|value at risk|probability|probability of loss|simulat(e|ion|ions))\b", 3.5),
+        (r"\b(future projection(s)?|projection(s)?|worst case|best case|safe|safety)\b", 4.0),
+        (r"\b(should i (buy|sell)|buy or sell)\b", 4.0),
+    ],
+}
+FLAG_BIAS = -2.0
+
+#   Interval grammar (first match wins, checked in order)
+INTERVAL_RULES: List[Tuple[str, str]] = [
+    (r"\b(last hour|past hour|minute|1 ?min)\b", "minute"),
+    (r"\b(today|now|intraday|right now|this morning|this afternoon)\b", "5minute"),
+    (r"\b(this week|swing|few days|couple of days)\b", "60minute"),
+    (r"\b(trend|history|historical|long[- ]term|year(s)?|month(s)?|daily)\b", "day"),
+]
+DEFAULT_INTERVAL = "5minute"
+
+#   Lookback window grammar -> hours
+UNIT_HOURS = {"hour": 1, "day": 24, "week": 168, "month": 720, "year": 8760}
+WORD_NUMBERS = {"a": 1, "an": 1, "one": 1, "two": 2, "three": 3, "four": 4, "five": 5,
+                "six": 6, "seven": 7, "ten": 10, "couple": 2, "few": 3}
+LOOKBACK_RE = re.compile(
+    r"\b(?:last|past|previous|over the last|over the past)\s+"
+    r"(?:(\d+|a|an|one|two|three|four|five|six|seven|ten|couple of|few)\s+)?"
+    r"(hour|day|week|month|year)s?\b",
+    re.IGNORECASE
+)
+
+#   Forward horizons ("over the next 2 weeks") are not entity words; the router does not use them
+HORIZON_RE = re.compile(
+    r"\b(?:next|coming|upcoming)\s+"
+    r"(?:(\d+|a|an|one|two|three|four|five|six|seven|ten|couple of|few)\s+)?"
+    r"(hour|day|week|month|year|session|quarter)s?\b",
+    re.IGNORECASE
+)
+
+#   Explicit calendar expressions the router does not resolve (LLM handles them)
+EXPLICIT_DATE_RE = re.compile(
+    r"\b(since|between|from .+ to|until|till|in (19|20)\d{2}|(19|20)\d{2}"
+    r"|jan(uary)?|feb(ruary)?|mar(ch)?|apr(il)?|jun(e)?|jul(y)?|aug(ust)?"
+    r"|sep(tember)?|oct(ober)?|nov(ember)?|dec(ember)?|\d{1,2}:\d{2}|yesterday)\b",
+    re.IGNORECASE
+)
+
+#   Multiple entities / comparisons -> let the LLM split them
+MULTI_ENTITY_RE = re.compile(r"\b(vs\.?|versus|compare|comparison|between)\b|,", re.IGNORECASE)
+#   Conjunctions that split two candidate entities ("news of SBI and ICICI")
+ENTITY_CONJUNCTIONS = {"and", "&"}
+
+#   Words stripped from the query before what remains is taken as the entity
+INTENT_WORDS = {
+    "technical", "technicals", "analysis", "analyse", "analyze", "analyzing", "fundamental",
+    "fundamentals", "monte", "carlo", "montecarlo", "simulation", "simulations", "simulate",
+    "risk", "risks", "var", "probability", "loss", "news", "headlines", "headline", "twitter",
+    "tweets", "tweet", "sentiment", "social", "media", "retail", "hype", "fud", "dcf",
+    "valuation", "value", "intrinsic", "fair", "price", "action", "chart", "charts", "pattern",
+    "patterns", "support", "resistance", "indicators", "indicator", "rsi", "macd", "bollinger",
+    "bands", "trend", "trends", "overbought", "oversold", "momentum", "safe", "safety", "buy",
+    "sell", "hold", "trade", "entry", "exit", "outlook", "report", "check", "run", "give",
+    "show", "tell", "get", "me", "us", "a", "an", "the", "of", "for", "on", "about", "in",
+    "is", "are", "was", "should", "i", "we", "do", "does", "what", "whats", "what's", "how",
+    "why", "it", "its", "stock", "stocks", "share", "shares", "company", "today", "now",
+    "intraday", "this", "week", "last", "past", "previous", "over", "hour", "hours", "day",
+    "days", "weeks", "month", "months", "year", "years", "and", "or", "with", "to", "please",
+    "can", "you", "my", "any", "recent", "latest", "current", "currently", "people", "saying",
+    "say", "case", "worst", "best", "projection", "projections", "future", "health",
+    "financial", "long", "term", "short", "swing", "daily", "history", "historical",
+    "undervalued", "overvalued", "underpriced", "overpriced", "quick", "full", "deep", "dive",
+    "performance", "doing", "moving", "up", "down", "at", "be", "will", "there", "x",
+}
+ENTITY_TOKEN_RE = re.compile(r"[A-Za-z][A-Za-z0-9&.\-']*|&")
+
+_COMPILED_FEATURES = {
+    flag: [(re.compile(pattern, re.IGNORECASE), weight) for pattern, weight in features]
+    for flag, features in FLAG_FEATURES.items()
+}
+_COMPILED_INTERVALS = [(re.compile(pattern, re.IGNORECASE), interval) for pattern, interval in INTERVAL_RULES]
+
+
+def _sigmoid(x: float) -> float:
+    return 1.0 / (1.0 + math.exp(-x))
+
+
+def is_known_instrument(entity: str) -> bool:
+    """Exact symbol/company-name hit in the instrument index (False if it is unavailable)."""
+    try:
+        from stocks_agent.supporting_functions.instrument_index import get_instrument_index
+        return get_instrument_index().lookup_alias(entity) is not None
+    except (ImportError, OSError) as e:
+        logger.debug(f"Instrument index unavailable for router: {e}")
+        return False
+
+
+class QueryRouter:
+    """
+    Local router producing AgentRoutingDecision fields without an LLM call.
+
+    `route()` returns a dict of decision fields when confident, else None.
+    Hit rate and latency are tracked for observability.
+    """
+
+    def __init__(self, confidence_threshold: float = CONFIDENCE_THRESHOLD):
+        self.confidence_threshold = confidence_threshold
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.fallbacks = 0
+        self.total_latency_ms = 0.0
+
+    def classify_flags(self, query: str) -> Tuple[Dict[str, bool], float]:
+        """
+        Score each run_* flag with the keyword classifier.
+
+        Returns:
+            tuple: (flags, confidence) where confidence is the least certain flag probability
+        """
+        flags = {}
+        confidence = 1.0
+        for flag, features in _COMPILED_FEATURES.items():
+            score = FLAG_BIAS
+            for pattern, weight in features:
+                if pattern.search(query):
+                    score += weight
+            p = _sigmoid(score)
+            flags[flag] = p >= 0.5
+            confidence = min(confidence, max(p, 1.0 - p))
+        return flags, confidence
+
+    @staticmethod
+    def extract_interval(query: str) -> str:
+        """Map time-horizon words to a candle interval."""
+        for pattern, interval in _COMPILED_INTERVALS:
+            if pattern.search(query):
+                return interval
+        return DEFAULT_INTERVAL
+
+    @staticmethod
+    def extract_timeframe_hours(query: str) -> int:
+        """Parse 'last N days/weeks/...' into hours (default 24)."""
+        match = LOOKBACK_RE.search(query)
+        if not match:
+            return 24
+        count_raw = (match.group(1) or "1").lower().replace(" of", "")
+        count = int(count_raw) if count_raw.isdigit() else WORD_NUMBERS.get(count_raw, 1)
+        return count * UNIT_HOURS[match.group(2).lower()]
+
+    @staticmethod
+    def extract_entity(query: str) -> Optional[str]:
+        """
+        Whatever remains after removing intent/filler words is the company or ticker.
+        Returns None when nothing (or too much) remains, when "and"/"&" joins two
+        candidate entities, or when a multi-word remainder is not a known symbol
+        or company name.
+        """
+        cleaned = HORIZON_RE.sub(" ", LOOKBACK_RE.sub(" ", query))
+
+        # Group consecutive non-intent tokens; a conjunction between two groups means two entities
+        groups: List[List[str]] = [[]]
+        conjunction_pending = False
+        for raw in ENTITY_TOKEN_RE.findall(cleaned):
+            token = raw.strip(".'-")
+            word = token.lower()
+            if word and word not in INTENT_WORDS and word not in ENTITY_CONJUNCTIONS and not token.isdigit():
+                if conjunction_pending and groups[-1]:
+                    return None
+                conjunction_pending = False
+                groups[-1].append(token)
+                continue
+            if word in ENTITY_CONJUNCTIONS and groups[-1]:
+                conjunction_pending = True
+                groups.append([])
+            elif groups[-1] and not conjunction_pending:
+                groups.append([])
+
+        tokens = [token for group in groups for token in group]
+        if not tokens or len(tokens) > MAX_ENTITY_WORDS:
+            return None
+        entity = " ".join(tokens)
+        if len(tokens) > 1 and not is_known_instrument(entity):
+            return None
+        return entity
+
+    def route(self, query: str) -> Optional[Dict[str, Any]]:
+        """
+        Try to route a query locally.
+
+        Returns:
+            dict of AgentRoutingDecision fields, or None to fall back to the LLM
+        """
+        started = time.perf_counter()
+        decision = self._route(query)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+
+        with self._lock:
+            self.total_latency_ms += elapsed_ms
+            if decision is not None:
+                self.hits += 1
+            else:
+                self.fallbacks += 1
+            total = self.hits + self.fallbacks
+            hit_rate = self.hits / total
+
+        outcome = "hit" if decision is not None else "fallback"
+        logger.info(f"QueryRouter {outcome} in {elapsed_ms:.2f}ms (hit rate {hit_rate:.1%} over {total})")
+        return decision
+
+    def _route(self, query: str) -> Optional[Dict[str, Any]]:
+        if not query or not query.strip():
+            return None
+
+        if EXPLICIT_DATE_RE.search(query) or MULTI_ENTITY_RE.search(query):
+            return None
+
+        entity = self.extract_entity(query)
+        if entity is None:
+            return None
+
+        flags, confidence = self.classify_flags(query)
+        if not any(flags.values()) or confidence < self.confidence_threshold:
+            return None
+
+        return {
+            "tickers": [entity],
+            "timeframe": self.extract_timeframe_hours(query),
+            "interval": self.extract_interval(query),
+            "start_date": None,
+            "end_date": None,
+            **flags,
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit rate and average latency."""
+        with self._lock:
+            total = self.hits + self.fallbacks
+            return {
+                "hits": self.hits,
+                "fallbacks": self.fallbacks,
+                "hit_rate": (self.hits / total) if total else 0.0,
+                "avg_latency_ms": (self.total_latency_ms / total) if total else 0.0,
+            }
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    router = QueryRouter()
+
+    test_queries = [
+        "Technical analysis of Reliance",
+        "Monte Carlo for TCS",
+        "Should I buy Infosys?",
+        "Is HDFC Bank safe?",
+        "What are people saying about Tata Motors on Twitter?",
+        "News for INDIGO in the last 2 days",
+        "Compare RELIANCE and TCS",
+        "Give news of SBI and ICICI",
+        "Probability of loss on TCS over the next 2 weeks",
+        "Daily chart for Reliance since Jan 2023",
+    ]
+
+    for q in test_queries:
+        print(f"{q!r:60} -> {router.route(q)}")
+
+    print(router.stats())
@@ -1,9 +1,6 @@
-import pandas as pd
-import os
 import requests
-import re
 import time
-from thefuzz import process
+import threading
 from pathlib import Path
 import sys
 
@@ -12,6 +9,12 @@ stocks_agent_dir = current_file.parent.parent.parent
 if str(stocks_agent_dir) not in sys.path:
     sys.path.insert(0, str(stocks_agent_dir))
 
+from stocks_agent.supporting_functions.instrument_index import (
+    clean_company_name,
+    get_instrument_index,
+    get_yahoo_cache,
+)
+
 FUZZY_MATCH_THRESHOLD = 90
 FUZZY_TICKER_MATCH_THRESHOLD = 90 
 TARGET_EXCHANGE = 'BSE' 
@@ -22,11 +25,6 @@ USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTM
 REQUEST_DELAY = 0.5
 EXCHANGE_PRIORITY = ['BSE', 'NSE']
 
-NOISE_WORDS = [
-    r'\bLIMITED\b', r'\bLTD\b', r'\bPRIVATE\b', r'\bPVT\b', 
-    r'\bINDIA\b', r'\bIND\b', r'\bTHE\b'
-]
-
 MANUAL_MAPPING = {
     "SENSEX": "SENSEX",
     "BSE SENSEX": "SENSEX",
@@ -34,13 +32,24 @@ MANUAL_MAPPING = {
     "NIFTY": "NIFTY"
 }
 
-def clean_company_name(name: str) -> str:
-    name = name.upper()
-    for pattern in NOISE_WORDS:
-        name = re.sub(pattern, '', name)
-    return name.strip()
+_last_yahoo_request = 0.0
+_yahoo_lock = threading.Lock()
 
-def get_ticker_key_yahoo(company_name: str) -> str:
+
+def _throttle_yahoo():
+    """Keep live Yahoo calls at least REQUEST_DELAY apart (no sleep when idle)."""
+    global _last_yahoo_request
+    with _yahoo_lock:
+        wait = REQUEST_DELAY - (time.monotonic() - _last_yahoo_request)
+        if wait > 0:
+            time.sleep(wait)
+        _last_yahoo_request = time.monotonic()
+
+def _search_yahoo(company_name: str) -> str:
+    """
+    Yahoo search for a BSE/NSE symbol. Returns None if Yahoo has no listing;
+    request and response errors (timeouts, HTTP errors, bad JSON) propagate.
+    """
     upper_name = company_name.upper()
     if upper_name in MANUAL_MAPPING:
         return MANUAL_MAPPING[upper_name]
@@ -55,82 +64,96 @@ def get_ticker_key_yahoo(company_name: str) -> str:
     }
     headers = {'User-Agent': USER_AGENT}
 
-    try:
-        response = requests.get(SEARCH_URL, params=params, headers=headers)
-        response.raise_for_status()
-        data = response.json()
+    _throttle_yahoo()
+    response = requests.get(SEARCH_URL, params=params, headers=headers, timeout=5)
+    response.raise_for_status()
+    data = response.json()
 
-        if 'quotes' not in data or not data['quotes']:
-            return None
+    if 'quotes' not in data or not data['quotes']:
+        return None
 
-        candidates = []
-        for quote in data['quotes']:
-            exchange = quote.get('exchange', '')
-            symbol = quote.get('symbol', '')
-            
-            if exchange in EXCHANGE_PRIORITY:
-                candidates.append((symbol, exchange))
+    candidates = []
+    for quote in data['quotes']:
+        exchange = quote.get('exchange', '')
+        symbol = quote.get('symbol', '')
+        
+        if exchange in EXCHANGE_PRIORITY:
+            candidates.append((symbol, exchange))
 
-        if not candidates:
-            return None
+    if not candidates:
+        return None
 
-        candidates.sort(key=lambda x: EXCHANGE_PRIORITY.index(x[1]) if x[1] in EXCHANGE_PRIORITY else 999)
-        best_match_symbol = candidates[0][0]
-        
-        if best_match_symbol == '^BSESN': return 'SENSEX'
-        if best_match_symbol == '^NSEI': return 'NIFTY'
+    candidates.sort(key=lambda x: EXCHANGE_PRIORITY.index(x[1]) if x[1] in EXCHANGE_PRIORITY else 999)
+    best_match_symbol = candidates[0][0]
+    
+    if best_match_symbol == '^BSESN': return 'SENSEX'
+    if best_match_symbol == '^NSEI': return 'NIFTY'
 
-        return best_match_symbol.split('.')[0]
+    return best_match_symbol.split('.')[0]
 
+def get_ticker_key_yahoo(company_name: str) -> str:
+    try:
+        return _search_yahoo(company_name)
     except Exception as e:
         print(f"Yahoo API Error for {company_name}: {e}")
         return None
 
-def get_bse_tickers(company_list, file_path=INSTRUMENTS_FILE):
-    if not os.path.exists(file_path):
-        raise FileNotFoundError(f"Critical: Instrument file not found at {file_path}")
+def get_ticker_key_yahoo_cached(company_name: str) -> str:
+    """Yahoo lookup backed by the persistent resolution cache (failed requests are not cached)."""
+    cache = get_yahoo_cache()
+    if company_name in cache:
+        return cache.get(company_name)
+
+    try:
+        symbol = _search_yahoo(company_name)
+    except Exception as e:
+        print(f"Yahoo API Error for {company_name}: {e}")
+        return None
+    cache.put(company_name, symbol)
+    return symbol
 
-    print(f"Loading instruments from: {file_path} ...")
+def get_bse_tickers(company_list, file_path=INSTRUMENTS_FILE):
+    # Built once per process; later calls are pure hash/trigram lookups
+    index = get_instrument_index(file_path)
     
     try:
-        cols_to_use = ['instrument_token', 'tradingsymbol', 'name', 'exchange']
-        df = pd.read_csv(file_path, usecols=cols_to_use)
-        
-        df_bse = df[df['exchange'] == TARGET_EXCHANGE].dropna(subset=['name']).copy()
-        
-        df_unique_names = df_bse.drop_duplicates(subset=['name'], keep='first')
-        df_unique_tickers = df_bse.drop_duplicates(subset=['tradingsymbol'], keep='first')
-        
-        if df_bse.empty:
+        if not index.bse_by_name:
             return {}
 
-        name_choices = df_unique_names['name'].tolist()
-        name_to_data = df_unique_names.set_index('name').to_dict('index')
-        
-        ticker_choices = df_unique_tickers['tradingsymbol'].tolist()
-        ticker_to_data = df_unique_tickers.set_index('tradingsymbol', drop=False).to_dict('index')
-
         results = {}
 
         for company in company_list:
             query = str(company).strip().upper()
             match_found = False
-            
-            best_match_name, score_name = process.extractOne(query, name_choices)
-            if score_name >= FUZZY_MATCH_THRESHOLD:
-                data = name_to_data[best_match_name]
+
+            data = index.lookup_alias(query)
+            if data is not None:
                 results[company] = {
                     "ticker": data['tradingsymbol'],
-                    "company_name": best_match_name,
-                    "match_type": "local_name_fuzzy",
-                    "confidence": score_name
+                    "company_name": data['name'],
+                    "match_type": "local_exact",
+                    "confidence": 100
                 }
                 match_found = True
             
             if not match_found:
-                best_match_ticker, score_ticker = process.extractOne(query, ticker_choices)
-                if score_ticker >= FUZZY_TICKER_MATCH_THRESHOLD:
-                    data = ticker_to_data[best_match_ticker]
+                best = index.fuzzy_name(query)
+                if best and best[1] >= FUZZY_MATCH_THRESHOLD:
+                    best_match_name, score_name = best
+                    data = index.bse_by_name[best_match_name]
+                    results[company] = {
+                        "ticker": data['tradingsymbol'],
+                        "company_name": best_match_name,
+                        "match_type": "local_name_fuzzy",
+                        "confidence": score_name
+                    }
+                    match_found = True
+            
+            if not match_found:
+                best = index.fuzzy_symbol(query)
+                if best and best[1] >= FUZZY_TICKER_MATCH_THRESHOLD:
+                    best_match_ticker, score_ticker = best
+                    data = index.bse_by_symbol[best_match_ticker]
                     results[company] = {
                         "ticker": data['tradingsymbol'],
                         "company_name": data['name'],
@@ -141,11 +164,11 @@ def get_bse_tickers(company_list, file_path=INSTRUMENTS_FILE):
 
             if not match_found:
                 print(f"Triggering Yahoo Search for: {company}...")
-                yahoo_symbol = get_ticker_key_yahoo(company)
+                yahoo_symbol = get_ticker_key_yahoo_cached(company)
                 
                 if yahoo_symbol:
-                    if yahoo_symbol in ticker_to_data:
-                        data = ticker_to_data[yahoo_symbol]
+                    if yahoo_symbol in index.bse_by_symbol:
+                        data = index.bse_by_symbol[yahoo_symbol]
                         results[company] = {
                             "ticker": data['tradingsymbol'],
                             "company_name": data['name'],
@@ -160,7 +183,6 @@ def get_bse_tickers(company_list, file_path=INSTRUMENTS_FILE):
                             "confidence": 90
                         }
                     match_found = True
-                    time.sleep(REQUEST_DELAY)
 
             if not match_found:
                 print(f"Failed to find match for: {company}")